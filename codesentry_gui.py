@@ -0,0 +1,2323 @@
+# CodeSentry的图形界面，判题引擎和命令行模式在gui_judger.py中
+# 由gui_judger.main()在启动界面时导入，只有这个模块依赖PyQt5
+import sys
+import os
+import time
+import traceback
+import sqlite3
+import zlib
+from io import StringIO
+
+from gui_judger import (DetailCache, EventBatcher, FULL_SCORE, JudgeJob, JudgeScheduler, LineIndex, OutputDiff,
+                        PRIORITY_BACKGROUND, PRIORITY_DETAIL, PRIORITY_INTERACTIVE, PRIORITY_NAMES, ProcessUsage,
+                        STARTUP_TIMING, TaskEventSummary, binary_cache, check_all_assignments, create_zip_package,
+                        detail_cache_budget, find_judger_batch, format_startup_timing, format_student_id,
+                        get_all_assignment_folders, get_app_dir, get_folders_by_pattern, is_valid_student_id,
+                        judge_history, load_config, load_test_point_detail, mark_startup, run_judge, save_config,
+                        task_input_signature, test_data, test_point_files, test_point_fingerprint)
+
+from PyQt5 import sip
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
+                            QLabel, QPushButton, QTreeWidget, QTreeWidgetItem, 
+                            QDialog, QTabWidget, QMessageBox, QTextEdit, QScrollArea, 
+                            QLineEdit, QDialogButtonBox, QSpacerItem, QSizePolicy,
+                            QStyleFactory, QFrame, QCheckBox, QToolButton, QSpinBox,
+                            QListView, QStyledItemDelegate, QStyle, QAction, QAbstractItemView,
+                            QTableView, QHeaderView)
+from PyQt5.QtCore import (Qt, QTimer, QObject, QFileSystemWatcher, pyqtSignal,
+                          QAbstractListModel, QAbstractTableModel, QModelIndex, QSize, QRect, QEvent)
+from PyQt5.QtGui import QFont, QPalette, QColor, QIcon, QFontMetrics, QTextDocument, QKeySequence
+from PyQt5.QtGui import QIcon
+from PyQt5.QtWidgets import QApplication, QMainWindow
+mark_startup("导入PyQt5")
+
+
+class MyWindow(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("My App")
+        self.setWindowIcon(QIcon("icon.ico"))  # 使用.ico文件
+
+
+# 定义全局样式
+DARK_MODE = True  # 默认使用暗色模式
+
+# 定义颜色方案
+class Colors:
+    # 暗色主题 - 更优雅的深色配色
+    DARK = {
+        'bg_primary': '#1a1d23',       # 主背景色 - 稍微更深一点
+        'bg_secondary': '#242932',     # 次级背景 - 明暗区分更强
+        'bg_tertiary': '#2e333d',      # 三层背景 - 用于卡片、面板底色
+
+        'text_primary': '#e6eaf1',     # 主文本 - 更明亮，更易读
+        'text_secondary': '#a1a8b5',   # 次文本 - 稍提亮，更通透
+        
+        'accent': '#4fc3f7',           # 主强调色 - 更亮的蓝色（带点霓虹感）
+        'accent_alt': '#d57bee',       # 第二强调色 - 更偏紫粉，更醒目
+
+        'success': '#89d185',          # 成功提示 - 稍鲜亮
+        'warning': '#efc27b',          # 警告提示 - 提亮对比度
+        'error': '#ef6b73',            # 错误提示 - 更鲜明红
+
+        'border': '#1c1f26',           # 边框色 - 提高与背景的区分度
+        'highlight': '#454b57',        # 高亮色 - 用于鼠标悬停等
+
+        'link': '#5fdde5',             # 链接颜色 - 更加活泼灵动
+        'test_pass': '#89d185',        # 测试通过 - 同 success
+        'test_fail': '#ef6b73',        # 测试失败 - 同 error
+
+        'scrollbar': '#444b58',        # 滚动条 - 略提亮，更清晰
+        'checkbox': '#2e333d',         # 复选框 - 
+
+        'title_1': '#7bc6ff',  # 稍冷、偏霓虹蓝
+        'title_2': '#c1e192',  # 带点苹果绿 + 青柠感
+        'title_3': '#c89cf0',  # 粉紫中加入一点蓝调，更清爽
+
+        'package_button': '#ffffff'
+
+    }
+
+    
+    # 浅色主题 - 更柔和的浅色配色
+    LIGHT = {
+        'bg_primary': '#fafafa',
+        'bg_secondary': '#f0f0f0',
+        'bg_tertiary': '#e5e5e5',
+        'text_primary': '#383a42',
+        'text_secondary': '#696c77',
+        'accent': '#4078f2',
+        'accent_alt': '#a626a4',  # 添加第二强调色
+        'success': '#50a14f',
+        'warning': '#c18401',
+        'error': '#e45649',
+        'border': '#d0d0d0',
+        'highlight': '#e6e6e6',
+        'link': '#0184bc',
+        'test_pass': '#50a14f',
+        'test_fail': '#e45649',
+        'scrollbar': '#c1c1c1',
+        'checkbox': '#26a69a',  # 复选框颜色
+        'title_1': '#4ba0ff',   # 清新的淡蓝色，亮度提高，适合主标题
+        'title_2': '#a2d77d',   # 明亮的草绿色，温暖且有层次感
+        'title_3': '#d3a8f9',   # 淡紫色调，柔和但富有活力
+        'package_button': '#333333'
+    }
+    
+    @classmethod
+    def current(cls):
+        return cls.DARK if DARK_MODE else cls.LIGHT
+
+# 设置应用字体
+# 添加中文字体支持，优先级从高到低
+CHINESE_FONTS = ["微软雅黑", "Microsoft YaHei", "Source Han Sans CN", "思源黑体", "NotoSansCJK", "WenQuanYi Micro Hei", "文泉驿微米黑", "SimHei", "黑体"]
+
+# 现代等宽字体
+MONO_FONTS = ["JetBrains Mono", "Cascadia Code", "Fira Code", "Consolas", "Courier New"]
+
+def choose_fonts():
+    """选择界面使用的中文字体和等宽字体，返回 {"chinese": 字体名, "mono": 字体名}
+
+    逐个检查字体是否存在（QFont.exactMatch）在字体较多的电脑上很慢，选择结果保存在设置文件中，
+    之后启动时直接使用；候选列表改变时重新选择。之后字体被卸载时Qt会自动使用替代字体。
+    """
+    config = load_config()
+    cached = config.get('fonts')
+    if isinstance(cached, dict) and cached.get('candidates') == [CHINESE_FONTS, MONO_FONTS] \
+            and cached.get('chinese') and cached.get('mono'):
+        return {"chinese": cached['chinese'], "mono": cached['mono']}
+    
+    fonts = probe_fonts(CHINESE_FONTS, MONO_FONTS)
+    config['fonts'] = dict(fonts, candidates=[CHINESE_FONTS, MONO_FONTS])
+    save_config(config)
+    return fonts
+
+def probe_fonts(chinese_fonts, modern_fonts):
+    """按优先级检查系统中实际存在的字体"""
+    # 尝试设置中文字体
+    chosen_chinese_font = None
+    for font_name in chinese_fonts:
+        font = QFont(font_name, 10)
+        if font.exactMatch():
+            chosen_chinese_font = font_name
+            break
+    
+    # 尝试设置现代等宽字体
+    chosen_mono_font = None
+    for font_name in modern_fonts:
+        font = QFont(font_name, 10)
+        if font.exactMatch():
+            chosen_mono_font = font_name
+            break
+    
+    # 如果找不到中文字体，设置默认中文字体
+    if not chosen_chinese_font:
+        chosen_chinese_font = "Sans-serif"
+        
+    # 如果找不到等宽字体，设置默认等宽字体
+    if not chosen_mono_font:
+        chosen_mono_font = "Monospace"
+    
+    return {"chinese": chosen_chinese_font, "mono": chosen_mono_font}
+
+def set_app_fonts(app):
+    fonts = choose_fonts()
+    
+    # 设置应用的默认字体为中文字体
+    font = QFont(fonts["chinese"], 10)
+    app.setFont(font)
+    
+    return fonts
+
+# 设置应用主题
+def apply_theme(app, dark_mode=True):
+    global DARK_MODE
+    DARK_MODE = dark_mode
+    
+    colors = Colors.current()
+    
+    # 创建调色板
+    palette = QPalette()
+    
+    # 设置基本颜色
+    palette.setColor(QPalette.Window, QColor(colors['bg_primary']))
+    palette.setColor(QPalette.WindowText, QColor(colors['text_primary']))
+    palette.setColor(QPalette.Base, QColor(colors['bg_secondary']))
+    palette.setColor(QPalette.AlternateBase, QColor(colors['bg_tertiary']))
+    palette.setColor(QPalette.ToolTipBase, QColor(colors['bg_tertiary']))
+    palette.setColor(QPalette.ToolTipText, QColor(colors['text_primary']))
+    palette.setColor(QPalette.Text, QColor(colors['text_primary']))
+    palette.setColor(QPalette.Button, QColor(colors['bg_secondary']))
+    palette.setColor(QPalette.ButtonText, QColor(colors['text_primary']))
+    palette.setColor(QPalette.BrightText, QColor(colors['text_primary']))
+    palette.setColor(QPalette.Link, QColor(colors['link']))
+    palette.setColor(QPalette.Highlight, QColor(colors['accent']))
+    palette.setColor(QPalette.HighlightedText, QColor('#ffffff'))
+    
+    # 设置禁用状态的颜色
+    palette.setColor(QPalette.Disabled, QPalette.WindowText, QColor(colors['text_secondary']))
+    palette.setColor(QPalette.Disabled, QPalette.Text, QColor(colors['text_secondary']))
+    palette.setColor(QPalette.Disabled, QPalette.ButtonText, QColor(colors['text_secondary']))
+    
+    # 应用调色板
+    app.setPalette(palette)
+    
+    # 创建全局样式表
+    stylesheet = f"""
+    QMainWindow, QDialog {{
+        background-color: {colors['bg_primary']};
+        color: {colors['text_primary']};
+    }}
+    
+    QTabWidget::pane {{
+        border: 1px solid {colors['border']};
+        background-color: {colors['bg_secondary']};
+        border-radius: 6px;
+    }}
+    
+    QTabBar::tab {{
+        background-color: {colors['bg_tertiary']};
+        color: {colors['text_secondary']};
+        padding: 8px 12px;
+        margin-right: 2px;
+        border-top-left-radius: 6px;
+        border-top-right-radius: 6px;
+    }}
+    
+    QTabBar::tab:selected {{
+        background-color: {colors['bg_secondary']};
+        color: {colors['text_primary']};
+        border-bottom: 2px solid {colors['accent']};
+    }}
+    
+    QTabBar::tab:hover:!selected {{
+        background-color: {colors['highlight']};
+    }}
+    
+    QPushButton {{
+        background-color: {colors['bg_tertiary']};
+        color: {colors['text_primary']};
+        border: none;
+        border-radius: 6px;
+        padding: 8px 16px;
+        min-height: 32px;
+        font-weight: 500;
+    }}
+    
+    QPushButton:hover {{
+        background-color: {colors['highlight']};
+    }}
+    
+    QPushButton:pressed {{
+        background-color: {colors['accent']};
+        color: white;
+    }}
+    
+    QPushButton:disabled {{
+        background-color: {colors['bg_tertiary']};
+        color: {colors['text_secondary']};
+    }}
+    
+    QLineEdit {{
+        background-color: {colors['bg_tertiary']};
+        color: {colors['text_primary']};
+        border: 1px solid {colors['border']};
+        border-radius: 6px;
+        padding: 8px;
+        selection-background-color: {colors['accent']};
+    }}
+    
+    QTextEdit, QListView#resultView {{
+        background-color: {colors['bg_secondary']};
+        color: {colors['text_primary']};
+        border: 1px solid {colors['border']};
+        border-radius: 6px;
+        padding: 8px;
+        selection-background-color: {colors['accent']};
+        selection-color: white;
+    }}
+    
+    QLabel {{
+        color: {colors['text_primary']};
+    }}
+    
+    QTreeWidget {{
+        background-color: {colors['bg_secondary']};
+        alternate-background-color: {colors['bg_tertiary']};
+        color: {colors['text_primary']};
+        border: 1px solid {colors['border']};
+        border-radius: 6px;
+        outline: none;  /* 移除焦点轮廓 */
+    }}
+    
+    QTreeWidget::item {{
+        padding: 6px;
+        border-radius: 4px;
+    }}
+    
+    QTreeWidget::item:selected {{
+        background-color: {colors['accent']};
+        color: white;
+        outline: none;  /* 移除选中项的焦点轮廓 */
+    }}
+    
+    QTreeWidget::item:hover {{
+        background-color: {colors['highlight']};
+    }}
+    
+    /* 明确移除所有焦点轮廓 */
+    QTreeWidget::item:focus {{
+        outline: none;
+    }}
+    
+    QScrollBar:vertical {{
+        background-color: {colors['bg_secondary']};
+        width: 14px;
+        margin: 0px;
+    }}
+    
+    QScrollBar::handle:vertical {{
+        background-color: {colors['scrollbar']};
+        min-height: 20px;
+        border-radius: 7px;
+    }}
+    
+    QScrollBar::handle:vertical:hover {{
+        background-color: {colors['accent']};
+    }}
+    
+    QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {{
+        height: 0px;
+    }}
+    
+    QScrollBar:horizontal {{
+        background-color: {colors['bg_secondary']};
+        height: 14px;
+        margin: 0px;
+    }}
+    
+    QScrollBar::handle:horizontal {{
+        background-color: {colors['scrollbar']};
+        min-width: 20px;
+        border-radius: 7px;
+    }}
+    
+    QScrollBar::handle:horizontal:hover {{
+        background-color: {colors['accent']};
+    }}
+    
+    QScrollBar::add-line:horizontal, QScrollBar::sub-line:horizontal {{
+        width: 0px;
+    }}
+    
+    QToolButton {{
+        background-color: transparent;
+        border: none;
+        border-radius: 4px;
+        padding: 4px;
+    }}
+    
+    QToolButton:hover {{
+        background-color: {colors['highlight']};
+    }}
+    
+    QCheckBox {{
+        color: {colors['text_primary']};
+        spacing: 8px;
+    }}
+    
+    QCheckBox::indicator {{
+        width: 18px;
+        height: 18px;
+        border-radius: 4px;
+        border: 1px solid {colors['border']};
+        background-color: {colors['bg_tertiary']};
+    }}
+    
+    QCheckBox::indicator:checked {{
+        background-color: {colors['checkbox']};
+        border: 1px solid {colors['checkbox']};
+    }}
+    
+    QCheckBox::indicator:unchecked:hover {{
+        border: 1px solid {colors['checkbox']};
+    }}
+    
+    /* 成功提示样式 */
+    .success {{
+        color: {colors['success']};
+    }}
+    
+    /* 错误提示样式 */
+    .error {{
+        color: {colors['error']};
+    }}
+    
+    /* 警告提示样式 */
+    .warning {{
+        color: {colors['warning']};
+    }}
+    """
+    
+    app.setStyleSheet(stylesheet)
+
+class StudentIDDialog(QDialog):
+    """学号输入对话框"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("输入学号")
+        self.resize(400, 150)
+        self.setModal(True)
+        
+        # 创建布局
+        layout = QVBoxLayout()
+        layout.setSpacing(12)
+        layout.setContentsMargins(20, 20, 20, 20)
+        
+        # 添加说明文本
+        info_label = QLabel("请输入您的学号 (12位数字):")
+        info_label.setStyleSheet("font-weight: bold; font-size: 13px;")
+        layout.addWidget(info_label)
+        
+        # 添加学号输入框
+        self.id_input = QLineEdit()
+        self.id_input.setPlaceholderText("例如: 5270********")
+        self.id_input.setMaxLength(12)
+        self.id_input.setFocus()
+        layout.addWidget(self.id_input)
+        
+        # 添加错误提示标签(初始隐藏)
+        self.error_label = QLabel()
+        self.error_label.setStyleSheet(f"color: {Colors.current()['error']};")
+        self.error_label.setVisible(False)
+        layout.addWidget(self.error_label)
+        
+        # 添加格式化显示标签
+        self.formatted_label = QLabel()
+        self.formatted_label.setStyleSheet(f"color: {Colors.current()['accent']}; font-size: 14px;")
+        layout.addWidget(self.formatted_label)
+        
+        # 添加按钮
+        button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        button_box.accepted.connect(self.validate_and_accept)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+        
+        self.setLayout(layout)
+        
+        # 连接信号
+        self.id_input.textChanged.connect(self.update_formatted_display)
+    
+    def update_formatted_display(self):
+        """更新格式化显示"""
+        student_id = self.id_input.text().strip()
+        if len(student_id) == 12 and student_id.isdigit():
+            formatted = format_student_id(student_id)
+            self.formatted_label.setText(f"格式化显示: {formatted}")
+            self.formatted_label.setStyleSheet(f"color: {Colors.current()['success']}; font-size: 14px;")
+        else:
+            self.formatted_label.setText("")
+    
+    def validate_and_accept(self):
+        """验证学号是否有效，有效则接受"""
+        student_id = self.id_input.text().strip()
+        
+        if not is_valid_student_id(student_id):
+            self.error_label.setText("错误: 学号必须是12位数字")
+            self.error_label.setVisible(True)
+            self.id_input.setFocus()
+            return
+        
+        self.accept()
+    
+    def get_student_id(self):
+        """获取输入的学号"""
+        return self.id_input.text().strip()
+
+class ThemeToggleWidget(QWidget):
+    """主题切换组件"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.app = QApplication.instance()
+        
+        layout = QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(2)
+        
+        # 暗色/浅色模式图标
+        self.theme_toggle = QCheckBox("暗色模式")
+        self.theme_toggle.setChecked(DARK_MODE)
+        self.theme_toggle.setStyleSheet(f"""
+            QCheckBox {{
+                font-size: 14px;
+                font-weight: bold;
+            }}
+            
+            QCheckBox::indicator {{
+                width: 18px;
+                height: 18px;
+                border-radius: 4px;
+                border: 1px solid {Colors.current()['border']};
+                background-color: {Colors.current()['bg_tertiary']};
+            }}
+            
+            QCheckBox::indicator:checked {{
+                background-color: {Colors.current()['checkbox']};
+                border: 1px solid {Colors.current()['checkbox']};
+            }}
+            
+            QCheckBox::indicator:unchecked:hover {{
+                border: 1px solid {Colors.current()['checkbox']};
+            }}
+        """)
+        self.theme_toggle.stateChanged.connect(self.toggle_theme)
+        
+        layout.addWidget(self.theme_toggle)
+        self.setLayout(layout)
+    
+    def toggle_theme(self, state):
+        apply_theme(self.app, state == Qt.Checked)
+        self.theme_toggle.setText("暗色模式" if DARK_MODE else "浅色模式")
+        # 更新复选框样式以匹配新主题
+        self.theme_toggle.setStyleSheet(f"""
+            QCheckBox {{
+                font-size: 14px;
+                font-weight: bold;
+            }}
+            
+            QCheckBox::indicator {{
+                width: 18px;
+                height: 18px;
+                border-radius: 4px;
+                border: 1px solid {Colors.current()['border']};
+                background-color: {Colors.current()['bg_tertiary']};
+            }}
+            
+            QCheckBox::indicator:checked {{
+                background-color: {Colors.current()['checkbox']};
+                border: 1px solid {Colors.current()['checkbox']};
+            }}
+            
+            QCheckBox::indicator:unchecked:hover {{
+                border: 1px solid {Colors.current()['checkbox']};
+            }}
+        """)
+        
+        # 通知主窗口更新树控件样式
+        main_window = self.parent()
+        while main_window and not isinstance(main_window, QMainWindow):
+            main_window = main_window.parent()
+        
+        if main_window and hasattr(main_window, 'update_assignments_tree_style'):
+            main_window.update_assignments_tree_style()
+        
+        # 同样更新任务树样式
+        if main_window and hasattr(main_window, 'task_tree'):
+            task_tree = main_window.task_tree
+            colors = Colors.current()
+            task_tree.setStyleSheet(f"""
+                QTreeWidget {{
+                    background-color: {colors['bg_secondary']};
+                    alternate-background-color: {colors['bg_tertiary']};
+                    color: {colors['text_primary']};
+                    border: 1px solid {colors['border']};
+                    border-radius: 6px;
+                    outline: none;
+                }}
+                
+                QTreeWidget::item {{
+                    padding: 6px;
+                    border-radius: 4px;
+                }}
+                
+                QTreeWidget::item:selected {{
+                    background-color: {colors['accent']};
+                    color: white;
+                }}
+                
+                QTreeWidget::item:hover {{
+                    background-color: {colors['highlight']};
+                }}
+            """)
+
+class LongRunningDialog(QDialog):
+    """长时间运行提示对话框"""
+    def __init__(self, parent=None, task_name=""):
+        super().__init__(parent)
+        self.setWindowTitle("判题时间过长")
+        self.resize(700, 200)
+        self.setModal(True)
+        
+        # 创建布局
+        layout = QVBoxLayout()
+        layout.setSpacing(12)
+        layout.setContentsMargins(20, 20, 20, 20)
+        
+        # 添加说明文本
+        message = "判题时间过长，可能是算法较慢或代码错误。最多等待 20 秒，之后窗口会自动关闭。你也可以提前终止运行。"
+        info_label = QLabel(message)
+        info_label.setStyleSheet("font-size: 22px;")
+        info_label.setWordWrap(True)
+        layout.addWidget(info_label)
+        
+        # 添加当前任务信息
+        task_label = QLabel(f"当前运行: {task_name}")
+        task_label.setStyleSheet(f"color: {Colors.current()['accent']}; font-weight: bold;")
+        layout.addWidget(task_label)
+        
+        # 添加按钮
+        button_box = QHBoxLayout()
+        
+        # 添加间距
+        spacer = QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum)
+        button_box.addItem(spacer)
+        
+        # 直接查看按钮
+        self.view_button = QPushButton("终止")
+        self.view_button.setStyleSheet(f"""
+            background-color: {Colors.current()['accent']};
+            color: white;
+            padding: 8px 16px;
+            font-weight: bold;
+        """)
+        self.view_button.clicked.connect(self.accept)
+        button_box.addWidget(self.view_button)
+        
+        layout.addLayout(button_box)
+        self.setLayout(layout)
+
+class JudgeWorker:
+    """一道题目的判题任务，run在调度器（JudgeScheduler）的工作线程中执行"""
+    def __init__(self, task, assignment_path, use_check_all=False, on_progress=None):
+        self.use_check_all = use_check_all
+        self.task = task
+        self.assignment_path = assignment_path
+        self.on_progress = on_progress  # 收到一批判题事件时调用，发送频率受EventBatcher限制
+        self.task_result = None  # 使用内置引擎判题时的TaskResult
+        self.summary = TaskEventSummary(task)  # 收到的判题事件汇总（在界面线程中更新）
+        self.timer = None  # 界面用于长时间运行检测的定时器
+        self.job = None  # 调度器中对应的JudgeJob
+        
+    def run(self, job):
+        """执行判题，返回 (stdout, stderr, 运行时间)，被取消时抛出JudgeCancelled"""
+        start_time = time.time()
+        stdout = ""
+        stderr = ""
+        
+        # 作业目录通过参数传给判题函数，输出也按任务单独收集，不修改进程的工作目录和sys.stdout，
+        # 因此多个判题任务可以同时运行
+        if not self.use_check_all:
+            # 优先使用内置引擎并行运行所有测试点，读取不到测试数据表时运行judger_batch.py
+            batcher = EventBatcher(self.on_progress or (lambda events: None))
+            try:
+                stdout, stderr, self.task_result = run_judge(self.task, self.assignment_path,
+                                                             on_event=batcher.add,
+                                                             cancel_token=job.cancel_token)
+            finally:
+                batcher.flush()
+        else:
+            # 使用check_all_assignments函数运行测试，输出写入本任务自己的缓冲区
+            captured_output = StringIO()
+            check_all_assignments([self.task], self.assignment_path, cancel_token=job.cancel_token,
+                                  out=captured_output)
+            stdout = captured_output.getvalue()
+        
+        # 计算运行时间
+        return stdout, stderr, time.time() - start_time
+
+class SchedulerBridge(QObject):
+    """把调度器工作线程中的通知转发到界面线程"""
+    job_changed = pyqtSignal(object)  # JudgeJob的状态发生变化
+    job_progress = pyqtSignal(object, list)  # (作业路径, 题目), 一批判题事件
+
+class TaskWatcher(QObject):
+    """监视作业中各题目的源文件和测试数据
+
+    编辑器保存文件时往往连续写入多次（或先写临时文件再重命名），
+    所有变化在debounce_ms毫秒内合并，再比较文件快照，确实变化的题目通过tasks_changed信号发出一次
+    """
+    tasks_changed = pyqtSignal(list)
+    
+    def __init__(self, debounce_ms=800, parent=None):
+        super().__init__(parent)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_path_changed)
+        self.watcher.fileChanged.connect(self.on_path_changed)
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(debounce_ms)
+        self.debounce_timer.timeout.connect(self.flush)
+        self.assignment_path = None
+        self.signatures = {}  # 题目 -> 文件快照
+        self.path_tasks = {}  # 被监视的路径 -> 题目
+        self.pending = set()  # 等待合并处理的题目
+    
+    def set_assignment(self, assignment_path, tasks):
+        """开始监视一个作业中的题目，之前监视的路径全部移除"""
+        watched = self.watcher.files() + self.watcher.directories()
+        if watched:
+            self.watcher.removePaths(watched)
+        self.debounce_timer.stop()
+        self.assignment_path = os.path.abspath(assignment_path)
+        self.signatures.clear()
+        self.path_tasks.clear()
+        self.pending.clear()
+        for task in tasks:
+            self.signatures[task] = task_input_signature(task, self.assignment_path)
+            self.watch_task(task, self.signatures[task])
+    
+    def watch_task(self, task, signature):
+        """监视题目目录、测试数据目录和其中的文件
+
+        目录的变化只反映文件的增删和重命名，文件内容的修改需要单独监视文件本身；
+        编辑器通过重命名保存时原文件会从监视列表中移除，所以每次处理变化后都重新加入
+        """
+        paths = [os.path.join(self.assignment_path, task), os.path.join(self.assignment_path, 'data', task)]
+        paths += [path for path, _, _ in signature]
+        watched = set(self.watcher.files() + self.watcher.directories())
+        new_paths = []
+        for path in paths:
+            if os.path.exists(path):
+                self.path_tasks[path] = task
+                if path not in watched:
+                    new_paths.append(path)
+        if new_paths:
+            self.watcher.addPaths(new_paths)
+    
+    def on_path_changed(self, path):
+        task = self.path_tasks.get(path)
+        if task is None:
+            return
+        self.pending.add(task)
+        self.debounce_timer.start()  # 每次变化都重新计时
+    
+    def flush(self):
+        """处理合并后的变化，只发出文件快照确实改变的题目"""
+        changed = []
+        for task in sorted(self.pending):
+            signature = task_input_signature(task, self.assignment_path)
+            self.watch_task(task, signature)
+            if signature != self.signatures.get(task):
+                self.signatures[task] = signature
+                changed.append(task)
+        self.pending.clear()
+        if changed:
+            self.tasks_changed.emit(changed)
+
+class ResultRow:
+    """结果面板中的一行：一行文本、等宽文本块、测试点、分隔线或一段富文本
+
+    测试点行的detail与MainWindow.test_point_details中的字典是同一个对象。
+    行的大小和拆分好的文本行在第一次用到时计算并缓存，内容或字体变化时清除
+    """
+    TEXT, PRE, POINT, RULE, HTML = range(5)
+    __slots__ = ('kind', 'segments', 'text', 'color', 'test_point', 'linkable', 'detail',
+                 'size', 'lines', 'width', 'doc')
+
+    def __init__(self, kind, segments=(), text="", color=None, test_point=None, linkable=False, detail=None):
+        self.kind = kind
+        # (文字, 颜色, 是否加粗)，颜色可以是Colors中的键名，也可以是颜色值
+        self.segments = [(segment[0], segment[1], len(segment) > 2 and segment[2]) for segment in segments]
+        self.text = text
+        self.color = color
+        self.test_point = test_point
+        self.linkable = linkable  # 测试点行是否可以点击展开详情
+        self.detail = detail
+        self.size = None  # 缓存的行大小
+        self.lines = None  # 等宽文本块或展开的详情拆分后的文本行
+        self.width = 0  # lines中最长一行的宽度
+        self.doc = None  # 富文本行的QTextDocument
+
+    @classmethod
+    def line(cls, *segments):
+        return cls(cls.TEXT, segments=segments)
+
+    @classmethod
+    def pre(cls, text, color=None):
+        return cls(cls.PRE, text=text, color=color)
+
+    @classmethod
+    def point(cls, test_point, segments=(), linkable=False, detail=None):
+        return cls(cls.POINT, segments=segments, test_point=test_point, linkable=linkable, detail=detail)
+
+    @classmethod
+    def rule(cls):
+        return cls(cls.RULE)
+
+    @classmethod
+    def html(cls, html):
+        return cls(cls.HTML, text=html)
+
+    @property
+    def expanded(self):
+        return self.linkable and self.detail is not None and self.detail['expanded']
+
+    def link_text(self):
+        return f"查看测试点 {self.test_point} 详情 {'▼' if self.expanded else '▶'}"
+
+    def header_text(self):
+        """不含展开详情的一行文字"""
+        text = "".join(segment[0] for segment in self.segments)
+        if self.kind == self.POINT and self.linkable:
+            text = f"{text}  {self.link_text()}" if text else self.link_text()
+        return text
+
+    def plain_text(self):
+        if self.kind == self.PRE:
+            return self.text
+        if self.kind == self.RULE:
+            return "-" * 40
+        if self.kind == self.HTML:
+            doc = self.doc or QTextDocument()
+            if self.doc is None:
+                doc.setHtml(self.text)
+            return doc.toPlainText()
+        if self.expanded:
+            return f"{self.header_text()}\n{self.detail['content']}"
+        return self.header_text()
+
+class ResultListModel(QAbstractListModel):
+    """结果面板的数据，每个测试点一行
+
+    展开或收起测试点详情时只有这一行失效，视图收到row_resized后只重新计算这一行的大小
+    """
+    row_resized = pyqtSignal(QModelIndex)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.rows = []
+        self.point_rows = {}  # 可以展开的测试点编号 -> 行号
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        row = self.rows[index.row()]
+        if role == Qt.UserRole:
+            return row
+        if role == Qt.DisplayRole:
+            return row.header_text() if row.kind != row.PRE else row.text
+        return None
+
+    def set_rows(self, rows):
+        """替换全部内容"""
+        self.beginResetModel()
+        self.rows = list(rows)
+        self.point_rows = {row.test_point: number for number, row in enumerate(self.rows)
+                           if row.kind == ResultRow.POINT and row.linkable}
+        self.endResetModel()
+
+    def clear(self):
+        self.set_rows([])
+
+    def append_rows(self, rows):
+        """在末尾追加几行"""
+        if not rows:
+            return
+        start = len(self.rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+        self.rows.extend(rows)
+        for number, row in enumerate(rows, start):
+            if row.kind == ResultRow.POINT and row.linkable:
+                self.point_rows[row.test_point] = number
+        self.endInsertRows()
+
+    def update_point(self, test_point, detail):
+        """测试点详情的展开状态或内容变化后，只更新该测试点所在的行"""
+        number = self.point_rows.get(test_point)
+        if number is None:
+            return
+        row = self.rows[number]
+        row.detail = detail
+        row.size = None
+        row.lines = None
+        index = self.index(number)
+        self.dataChanged.emit(index, index)
+        self.row_resized.emit(index)
+
+    def invalidate_layout(self):
+        """字体变化后清除所有行缓存的大小"""
+        for row in self.rows:
+            row.size = None
+            row.lines = None
+            row.doc = None
+
+    def loading_rows(self):
+        """正在获取详情的测试点所在的行号"""
+        return [number for number in self.point_rows.values()
+                if self.rows[number].detail is not None and self.rows[number].detail.get('loading')]
+
+    def to_plain_text(self):
+        return "\n".join(row.plain_text() for row in self.rows)
+
+class ResultItemDelegate(QStyledItemDelegate):
+    """绘制结果面板的行
+
+    视图只为可见的行调用paint，长文本块和展开的详情也只绘制落在可见区域内的文本行
+    """
+    test_point_clicked = pyqtSignal(int)
+    diff_clicked = pyqtSignal(int)  # 点击了详情中打开对比窗口的链接
+    DIFF_LINK_TEXT = "⇄ 在对比窗口中查看完整的输入和输出"
+    SPINNER_FRAMES = "⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏"  # 正在获取详情时显示在链接后面的加载动画
+    PADDING = 2
+    DETAIL_INDENT = 20  # 详情框的左缩进
+    DETAIL_PADDING = 10  # 详情框的内边距
+    DETAIL_BORDER = 3  # 详情框左侧强调线的宽度
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.spinner_frame = 0
+
+    def link_text(self, row):
+        """测试点的链接文字，正在获取详情时带有加载动画"""
+        if row.detail is not None and row.detail.get('loading'):
+            return f"{row.link_text()} {self.SPINNER_FRAMES[self.spinner_frame]}"
+        return row.link_text()
+
+    @staticmethod
+    def split_lines(text, metrics):
+        """拆分文本并计算最长一行的宽度"""
+        lines = text.replace('\r', '').replace('\t', '    ').split('\n')
+        return lines, max((metrics.horizontalAdvance(line) for line in lines), default=0)
+
+    @staticmethod
+    def bold_font(font):
+        bold = QFont(font)
+        bold.setBold(True)
+        return bold
+
+    def segments_width(self, segments, font):
+        metrics, bold_metrics = QFontMetrics(font), QFontMetrics(self.bold_font(font))
+        return sum((bold_metrics if bold else metrics).horizontalAdvance(text) for text, _, bold in segments)
+
+    def header_height(self, font):
+        return QFontMetrics(font).lineSpacing() + 2 * self.PADDING
+
+    def measure(self, row, font):
+        """计算行的大小，展开的详情只在这里拆分一次"""
+        metrics = QFontMetrics(font)
+        line_height = metrics.lineSpacing()
+        if row.kind == ResultRow.TEXT:
+            return QSize(self.segments_width(row.segments, font) + 2 * self.PADDING, line_height + 2 * self.PADDING)
+        if row.kind == ResultRow.RULE:
+            return QSize(0, line_height)
+        if row.kind == ResultRow.PRE:
+            row.lines, row.width = self.split_lines(row.text, metrics)
+            return QSize(row.width + 4 * self.PADDING, len(row.lines) * line_height + 4 * self.PADDING)
+        if row.kind == ResultRow.HTML:
+            row.doc = QTextDocument()
+            row.doc.setDefaultFont(font)
+            row.doc.setHtml(row.text)
+            return QSize(int(row.doc.idealWidth()) + 1, int(row.doc.size().height()) + 1)
+        
+        width = self.segments_width(row.segments, font)
+        if row.linkable:
+            width += self.segments_width([("  " + self.link_text(row), None, True)], font)
+        height = self.header_height(font)
+        if row.expanded:
+            row.lines, row.width = self.split_lines(row.detail['content'], metrics)
+            if row.detail.get('files'):
+                row.lines.insert(0, "")  # 第一行留给对比窗口的链接
+            width = max(width, self.DETAIL_INDENT + row.width + 2 * self.DETAIL_PADDING)
+            height += len(row.lines) * line_height + 2 * self.DETAIL_PADDING + 2 * self.PADDING
+        return QSize(width + 2 * self.PADDING, height)
+
+    def sizeHint(self, option, index):
+        row = index.data(Qt.UserRole)
+        if row.size is None:
+            row.size = self.measure(row, option.font)
+        return row.size
+
+    @staticmethod
+    def color(name, colors, default='text_primary'):
+        return QColor(colors.get(name or default, name))
+
+    def draw_segments(self, painter, x, baseline, segments, font, colors):
+        bold_font = self.bold_font(font)
+        for text, color, bold in segments:
+            painter.setFont(bold_font if bold else font)
+            painter.setPen(self.color(color, colors))
+            painter.drawText(x, baseline, text)
+            x += painter.fontMetrics().horizontalAdvance(text)
+        painter.setFont(font)
+        return x
+
+    def draw_lines(self, painter, option, lines, x, top, color):
+        """只绘制落在可见区域内的文本行"""
+        metrics = QFontMetrics(option.font)
+        line_height = metrics.lineSpacing()
+        visible = option.rect
+        if option.widget is not None:
+            visible = visible.intersected(option.widget.viewport().rect())
+        first = max(0, (visible.top() - top) // line_height)
+        last = min(len(lines), (visible.bottom() - top) // line_height + 1)
+        painter.setPen(color)
+        for number in range(first, last):
+            painter.drawText(x, top + number * line_height + metrics.ascent(), lines[number])
+
+    def paint(self, painter, option, index):
+        row = index.data(Qt.UserRole)
+        if row.size is None:
+            self.sizeHint(option, index)
+        colors = Colors.current()
+        rect = option.rect
+        font = option.font
+        metrics = QFontMetrics(font)
+        painter.save()
+        painter.setFont(font)
+        if option.state & QStyle.State_Selected:
+            painter.fillRect(rect, QColor(colors['highlight']))
+        
+        left = rect.left() + self.PADDING
+        if row.kind == ResultRow.TEXT:
+            self.draw_segments(painter, left, rect.top() + self.PADDING + metrics.ascent(), row.segments, font, colors)
+        elif row.kind == ResultRow.RULE:
+            painter.setPen(self.color('text_secondary', colors))
+            middle = rect.center().y()
+            painter.drawLine(rect.left(), middle, rect.right(), middle)
+        elif row.kind == ResultRow.PRE:
+            self.draw_lines(painter, option, row.lines, left + self.PADDING, rect.top() + 2 * self.PADDING,
+                            self.color(row.color, colors))
+        elif row.kind == ResultRow.HTML:
+            painter.translate(rect.left() + max(0, (rect.width() - row.size.width()) // 2), rect.top())
+            row.doc.drawContents(painter)
+        else:
+            baseline = rect.top() + self.PADDING + metrics.ascent()
+            x = self.draw_segments(painter, left, baseline, row.segments, font, colors)
+            if row.linkable:
+                link = ("  " if row.segments else "") + self.link_text(row)
+                self.draw_segments(painter, x, baseline, [(link, 'accent', True)], font, colors)
+            if row.expanded:
+                box = QRect(rect.left() + self.DETAIL_INDENT, rect.top() + self.header_height(font),
+                            max(rect.width(), row.size.width()) - self.DETAIL_INDENT - self.PADDING,
+                            rect.height() - self.header_height(font) - self.PADDING)
+                painter.fillRect(box, QColor(colors['bg_tertiary']))
+                painter.fillRect(QRect(box.left(), box.top(), self.DETAIL_BORDER, box.height()),
+                                 QColor(colors['accent']))
+                self.draw_lines(painter, option, row.lines, box.left() + self.DETAIL_PADDING,
+                                box.top() + self.DETAIL_PADDING, self.color(None, colors))
+                if row.detail.get('files'):
+                    self.draw_segments(painter, box.left() + self.DETAIL_PADDING,
+                                       box.top() + self.DETAIL_PADDING + metrics.ascent(),
+                                       [(self.DIFF_LINK_TEXT, 'accent', True)], font, colors)
+        painter.restore()
+
+    def link_at(self, row, rect, pos, font):
+        """pos落在的链接：测试点标题行返回test_point_clicked，详情中的对比链接返回diff_clicked，否则为None"""
+        if row is None or row.kind != ResultRow.POINT or not row.linkable:
+            return None
+        header_bottom = rect.top() + self.header_height(font)
+        if pos.y() < header_bottom:
+            return self.test_point_clicked
+        link_top = header_bottom + self.DETAIL_PADDING
+        if row.expanded and row.detail.get('files') and link_top <= pos.y() < link_top + QFontMetrics(font).lineSpacing() \
+                and pos.x() < rect.left() + self.DETAIL_INDENT + self.DETAIL_PADDING \
+                + self.segments_width([(self.DIFF_LINK_TEXT, None, True)], font):
+            return self.diff_clicked
+        return None
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            link = self.link_at(index.data(Qt.UserRole), option.rect, event.pos(), option.font)
+            if link is not None:
+                link.emit(index.data(Qt.UserRole).test_point)
+                return True
+        return super().editorEvent(event, model, option, index)
+
+class ResultView(QListView):
+    """判题结果面板
+
+    只排列和绘制可见的行；展开测试点时只有这一行的大小变化，滚动位置由视图自己保持。
+    Ctrl+滚轮调整字号，Ctrl+C复制选中的行
+    """
+    MIN_POINT_SIZE = 6
+    MAX_POINT_SIZE = 40
+
+    def __init__(self, font, parent=None):
+        super().__init__(parent)
+        self.setObjectName("resultView")
+        self.setModel(ResultListModel(self))
+        self.setItemDelegate(ResultItemDelegate(self))
+        self.setFont(font)
+        self.model().row_resized.connect(self.itemDelegate().sizeHintChanged)
+        self.setUniformItemSizes(False)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setMouseTracking(True)
+        
+        # 有测试点正在获取详情时转动加载动画
+        self.spinner_timer = QTimer(self)
+        self.spinner_timer.setInterval(100)
+        self.spinner_timer.timeout.connect(self.advance_spinner)
+        for signal in (self.model().modelReset, self.model().rowsInserted, self.model().dataChanged):
+            signal.connect(self.start_spinner)
+        
+        # 右键菜单：复制选中的行或全部结果
+        copy_action = QAction("复制", self)
+        copy_action.setShortcut(QKeySequence.Copy)
+        copy_action.setShortcutContext(Qt.WidgetShortcut)
+        copy_action.triggered.connect(self.copy_selection)
+        copy_all_action = QAction("复制全部", self)
+        copy_all_action.triggered.connect(lambda: QApplication.clipboard().setText(self.model().to_plain_text()))
+        self.addAction(copy_action)
+        self.addAction(copy_all_action)
+        self.setContextMenuPolicy(Qt.ActionsContextMenu)
+
+    def toPlainText(self):
+        return self.model().to_plain_text()
+
+    def set_rows(self, rows, keep_scroll=False):
+        """替换全部内容，keep_scroll为True时保持当前的滚动位置（用于刷新实时进度）"""
+        position = self.verticalScrollBar().value()
+        self.model().set_rows(rows)
+        if keep_scroll and position:
+            self.doItemsLayout()
+            self.verticalScrollBar().setValue(position)
+
+    def start_spinner(self, *args):
+        if not self.spinner_timer.isActive():
+            self.spinner_timer.start()
+
+    def advance_spinner(self):
+        """只重绘正在获取详情的行，全部获取完成后停止计时器"""
+        loading = self.model().loading_rows()
+        if not loading:
+            self.spinner_timer.stop()
+            return
+        delegate = self.itemDelegate()
+        delegate.spinner_frame = (delegate.spinner_frame + 1) % len(delegate.SPINNER_FRAMES)
+        for number in loading:
+            self.update(self.model().index(number))
+
+    def copy_selection(self):
+        rows = sorted(index.row() for index in self.selectedIndexes())
+        if rows:
+            model = self.model()
+            QApplication.clipboard().setText("\n".join(model.rows[row].plain_text() for row in rows))
+
+    def wheelEvent(self, event):
+        if event.modifiers() & Qt.ControlModifier:
+            step = 1 if event.angleDelta().y() > 0 else -1 if event.angleDelta().y() < 0 else 0
+            font = self.font()
+            size = font.pointSize() + step
+            if step and self.MIN_POINT_SIZE <= size <= self.MAX_POINT_SIZE:
+                font.setPointSize(size)
+                self.setFont(font)
+            event.accept()
+            return
+        super().wheelEvent(event)
+
+    def changeEvent(self, event):
+        if event.type() == QEvent.FontChange:
+            self.model().invalidate_layout()
+            self.scheduleDelayedItemsLayout()
+        super().changeEvent(event)
+
+    def mouseMoveEvent(self, event):
+        index = self.indexAt(event.pos())
+        on_link = index.isValid() and self.itemDelegate().link_at(
+            index.data(Qt.UserRole), self.visualRect(index), event.pos(), self.font()) is not None
+        self.viewport().setCursor(Qt.PointingHandCursor if on_link else Qt.ArrowCursor)
+        super().mouseMoveEvent(event)
+
+class LineTableModel(QAbstractTableModel):
+    """按需读取LineIndex中的行，两列：行号和内容"""
+    HEADERS = ("行号", "内容")
+
+    def __init__(self, lines, parent=None):
+        super().__init__(parent)
+        self.lines = lines
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.lines)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return str(index.row() + 1) if index.column() == 0 else self.lines.line(index.row())
+        if role == Qt.ForegroundRole and index.column() == 0:
+            return QColor(Colors.current()['text_secondary'])
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+class DiffTableModel(QAbstractTableModel):
+    """按需读取OutputDiff的对齐行，四列：你的输出的行号和内容、标准输出的行号和内容"""
+    HEADERS = ("行号", "你的输出", "行号", "标准输出")
+
+    def __init__(self, diff, parent=None):
+        super().__init__(parent)
+        self.diff = diff
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.diff.row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        user, std, changed = self.diff.row(index.row())
+        column = index.column()
+        number, lines = (user, self.diff.user_lines) if column < 2 else (std, self.diff.std_lines)
+        if role == Qt.DisplayRole:
+            if number is None:
+                return ""
+            return str(number + 1) if column % 2 == 0 else lines.line(number)
+        if role == Qt.BackgroundRole and changed:
+            color = QColor(Colors.current()['test_fail' if column < 2 else 'test_pass'])
+            color.setAlpha(60)
+            return color
+        if role == Qt.ForegroundRole and column % 2 == 0:
+            return QColor(Colors.current()['text_secondary'])
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+class DiffViewerDialog(QDialog):
+    """测试点的输入和输出对比窗口
+
+    文件通过LineIndex内存映射，表格只读取和绘制可见的行，可以在各处差异之间跳转
+    """
+    CONTEXT_ROWS = 3  # 跳转到差异时上方保留的行数
+
+    def __init__(self, title, files, font, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.resize(1200, 700)
+        
+        # 输入和标准输出使用测试数据缓存中的内容，用户输出每次运行都会变化，单独映射
+        self.line_indexes = []
+        input_file, user_file, std_file = files
+        try:
+            for path, store in ((input_file, test_data), (user_file, None), (std_file, test_data)):
+                self.line_indexes.append(LineIndex(path, store))
+        except Exception:
+            self.close_files()
+            raise
+        input_lines, user_lines, std_lines = self.line_indexes
+        self.diff = OutputDiff(user_lines, std_lines)
+        self.finished.connect(self.close_files)
+        
+        layout = QVBoxLayout()
+        
+        # 概况和差异跳转按钮
+        header_layout = QHBoxLayout()
+        generated = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(os.path.getmtime(files[1])))
+        summary = QLabel(f"你的输出 {len(user_lines)} 行，标准输出 {len(std_lines)} 行，"
+                         f"共 {len(self.diff.hunk_rows)} 处差异（输出生成于 {generated}）")
+        summary.setStyleSheet(f"color: {Colors.current()['text_secondary']};")
+        header_layout.addWidget(summary)
+        header_layout.addStretch()
+        self.hunk_label = QLabel()
+        header_layout.addWidget(self.hunk_label)
+        self.previous_button = QPushButton("上一处差异")
+        self.previous_button.setShortcut(QKeySequence.FindPrevious)
+        self.previous_button.clicked.connect(lambda: self.jump_to_hunk(-1))
+        header_layout.addWidget(self.previous_button)
+        self.next_button = QPushButton("下一处差异")
+        self.next_button.setShortcut(QKeySequence.FindNext)
+        self.next_button.clicked.connect(lambda: self.jump_to_hunk(1))
+        header_layout.addWidget(self.next_button)
+        layout.addLayout(header_layout)
+        
+        tabs = QTabWidget()
+        self.diff_table = self.create_table(DiffTableModel(self.diff, self), font, (len(user_lines), len(std_lines)))
+        tabs.addTab(self.diff_table, "输出对比")
+        self.input_table = self.create_table(LineTableModel(input_lines, self), font, (len(input_lines),))
+        tabs.addTab(self.input_table, "标准输入")
+        layout.addWidget(tabs)
+        self.setLayout(layout)
+        
+        self.current_hunk = -1
+        self.jump_to_hunk(1)
+
+    def create_table(self, model, font, line_counts):
+        """行高固定的表格，只有可见的行会向模型取数据"""
+        table = QTableView()
+        table.setFont(font)
+        table.setModel(model)
+        table.setWordWrap(False)
+        table.setShowGrid(False)
+        table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        table.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
+        table.verticalHeader().hide()
+        table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        table.verticalHeader().setDefaultSectionSize(QFontMetrics(font).lineSpacing() + 4)
+        # 行号列按最大行号的位数设置宽度，不逐行计算内容宽度
+        metrics = QFontMetrics(font)
+        header = table.horizontalHeader()
+        for column, count in enumerate(line_counts):
+            header.resizeSection(2 * column, metrics.horizontalAdvance("9" * len(str(count))) + 16)
+            header.resizeSection(2 * column + 1, 520)
+        header.setStretchLastSection(True)
+        return table
+
+    def jump_to_hunk(self, step):
+        """跳转到上一处或下一处差异"""
+        hunks = self.diff.hunk_rows
+        if hunks:
+            self.current_hunk = max(0, min(len(hunks) - 1, self.current_hunk + step))
+            row = hunks[self.current_hunk]
+            model = self.diff_table.model()
+            self.diff_table.scrollTo(model.index(max(0, row - self.CONTEXT_ROWS), 0), QAbstractItemView.PositionAtTop)
+            self.diff_table.selectRow(row)
+            self.hunk_label.setText(f"第 {self.current_hunk + 1}/{len(hunks)} 处差异")
+        else:
+            self.hunk_label.setText("没有差异")
+        self.previous_button.setEnabled(self.current_hunk > 0)
+        self.next_button.setEnabled(self.current_hunk < len(hunks) - 1)
+
+    def close_files(self):
+        for lines in self.line_indexes:
+            lines.close()
+        self.line_indexes = []
+
+class MainWindow(QMainWindow):
+    def __init__(self, fonts=None):
+        super().__init__()
+        
+        # 设置窗口标题和大小
+        self.setWindowTitle("CodeSentry")
+        self.setWindowIcon(QIcon("arrow.ico"))  # 设置窗口图标
+        self.resize(1500, 800)  # 增加窗口宽度
+        
+        # 全局变量
+        self.current_assignment = None
+        self.current_task = None
+        self.test_point_details = {}  # 当前显示的测试点的详情状态，详情内容只在展开时保留，其余在detail_cache中
+        self.detail_cache = DetailCache(detail_cache_budget())
+        self.detail_source_key = None  # 当前显示的结果对应的源代码编译缓存键，用于计算详情缓存版本
+        self.current_run_id = None  # 当前显示的结果在判题历史中的记录id
+        self.last_result_rows = []  # 判题进行中时显示在实时进度下方的上次结果
+        self.fonts = fonts or choose_fonts()  # 存储字体信息
+        self.original_title = "CodeSentry"  # 没有判题任务时的窗口标题
+        self.judge_jobs = {}  # 排队中和正在进行的判题任务: (作业路径, 题目) -> JudgeWorker
+        self.detail_requests = {}  # 正在获取的测试点详情: 任务key -> (JudgeJob, 请求时显示的判题记录id, 详情缓存版本)
+        self.stale_jobs = set()  # 运行期间文件又发生变化、结束后需要重新判题的任务
+        self.long_running_dialog = None  # 长时间运行对话框
+        
+        # 判题任务调度器，工作线程中的通知通过SchedulerBridge转到界面线程处理
+        self.scheduler_bridge = SchedulerBridge()
+        self.scheduler_bridge.job_changed.connect(self.on_job_changed)
+        self.scheduler_bridge.job_progress.connect(self.on_judge_progress)
+        self.scheduler = JudgeScheduler(on_change=self.scheduler_bridge.job_changed.emit)
+        
+        # 保存源文件或修改测试数据后在后台重新编译和判题，切换回来时结果已经在缓存中
+        self.task_watcher = TaskWatcher(parent=self)
+        self.task_watcher.tasks_changed.connect(self.on_watched_tasks_changed)
+        
+        # 尝试切换到脚本或可执行文件所在目录
+        try:
+            if getattr(sys, 'frozen', False):  # 如果是EXE运行
+                script_dir = os.path.dirname(os.path.abspath(sys.executable))
+            else:  # Python运行时
+                script_dir = os.path.dirname(os.path.abspath(__file__))
+            
+            print(f"MainWindow中获取的脚本目录: {script_dir}")
+            
+            # 切换到脚本目录
+            current_dir = os.getcwd()
+            print(f"切换目录前的当前目录: {current_dir}")
+            
+            if current_dir != script_dir:
+                os.chdir(script_dir)
+                print(f"已切换到脚本目录: {os.getcwd()}")
+            else:
+                print("当前目录已经是脚本目录，无需切换")
+        except Exception as e:
+            error_msg = f"切换目录时出错: {str(e)}"
+            print(error_msg)
+            traceback.print_exc()
+            QMessageBox.critical(None, "错误", error_msg)
+        
+        # 作业文件夹在窗口显示之后再扫描（见scan_workspace），不拖慢启动
+        self.assignment_folders = []
+        
+        # 创建中央部件
+        central_widget = QWidget()
+        
+        # 创建主布局
+        main_layout = QHBoxLayout()
+        main_layout.setSpacing(15)
+        main_layout.setContentsMargins(15, 15, 15, 15)
+        
+        # 创建左侧面板
+        left_panel = QWidget()
+        left_layout = QVBoxLayout()
+        left_layout.setSpacing(15)
+        left_layout.setContentsMargins(0, 0, 0, 0)
+        
+        # 主题切换组件
+        self.theme_toggle = ThemeToggleWidget()
+        left_layout.addWidget(self.theme_toggle)
+        
+        # 添加分割线
+        separator = QFrame()
+        separator.setFrameShape(QFrame.HLine)
+        separator.setFrameShadow(QFrame.Sunken)
+        left_layout.addWidget(separator)
+        
+        # 作业列表
+        assignments_label = QLabel("Folders")
+        assignments_label.setStyleSheet("""
+            QLabel {
+                font-weight: bold;
+                color: #a5e6dc;
+                font-size: 24px;
+                margin-bottom: 2px;
+                font-family: 'JetBrains Mono', 'Fira Code', 'Source Code Pro', monospace;
+            }
+        """)
+        left_layout.addWidget(assignments_label)
+        
+        # 创建作业按钮区域
+        # 使用树形控件代替按钮列表，以获得更紧凑的布局
+        self.assignments_tree = QTreeWidget()
+        self.assignments_tree.setHeaderHidden(True)
+        self.assignments_tree.setAlternatingRowColors(True)
+        self.assignments_tree.setAnimated(True)
+        
+        # 设置更紧凑的样式 - 这里只设置初始样式，后续会在主题切换时更新
+        self.update_assignments_tree_style()
+        
+        # 连接点击事件
+        self.assignments_tree.itemClicked.connect(lambda item: self.update_task_list(item.text(0)))
+        
+        # 添加到布局中，并设置适当的高度
+        left_layout.addWidget(self.assignments_tree)
+        self.assignments_tree.setFixedHeight(150)
+        
+        # 扫描不到作业文件夹时显示的提示
+        self.no_assignment_label = QLabel("未找到作业文件夹")
+        self.no_assignment_label.setStyleSheet(f"color: {Colors.current()['error']};")
+        self.no_assignment_label.hide()
+        left_layout.addWidget(self.no_assignment_label)
+        
+        # 添加分割线
+        separator2 = QFrame()
+        separator2.setFrameShape(QFrame.HLine)
+        separator2.setFrameShadow(QFrame.Sunken)
+        left_layout.addWidget(separator2)
+        
+        # 题目列表
+        tasks_label = QLabel("Questions")
+        tasks_label.setStyleSheet(f"font-weight: bold; color: {Colors.current()['title_2']}; font-size: 24px; margin-bottom: 2px; font-family: 'JetBrains Mono', 'Fira Code', 'Source Code Pro', monospace;")
+        left_layout.addWidget(tasks_label)
+        
+        # 创建题目列表部件
+        self.task_tree = QTreeWidget()
+        self.task_tree.setHeaderHidden(True)
+        self.task_tree.setAlternatingRowColors(True)
+        self.task_tree.itemClicked.connect(self.on_task_clicked)
+        self.task_tree.setAnimated(True)
+        left_layout.addWidget(self.task_tree)
+        
+        # 添加垂直空白区域，使"一键打包"按钮位于底部
+        vertical_spacer = QSpacerItem(20, 40, QSizePolicy.Minimum, QSizePolicy.Expanding)
+        left_layout.addItem(vertical_spacer)
+        
+        # 添加分割线
+        separator3 = QFrame()
+        separator3.setFrameShape(QFrame.HLine)
+        separator3.setFrameShadow(QFrame.Sunken)
+        left_layout.addWidget(separator3)
+        
+        # 添加一键打包按钮
+        self.package_button = QPushButton("Package")
+        self.package_button.setStyleSheet(f"""
+            QPushButton {{
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #7bc6ff, stop:1 #c1e192);
+                color: white;
+                font-weight: normal;
+                padding: 12px;
+                border-radius: 6px;
+                min-height: 45px;
+                font-size: 30px;
+                border: none;
+                font-family: 'JetBrains Mono', 'Fira Code', 'Source Code Pro', 'Cascadia Code', monospace;
+            }}
+            
+            QPushButton:hover {{
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #4fc79b, stop:1 #52f6c9);
+            }}
+            
+            QPushButton:pressed {{
+                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #2fa67b, stop:1 #32d6a9);
+            }}
+        """)
+        self.package_button.clicked.connect(self.on_package_button_clicked)
+        left_layout.addWidget(self.package_button)
+        
+        # 设置左侧面板
+        left_panel.setLayout(left_layout)
+        left_panel.setFixedWidth(250)  # 稍微减小左侧面板宽度，为右侧腾出空间
+        
+        # 创建右侧面板
+        right_panel = QWidget()
+        right_layout = QVBoxLayout()
+        right_layout.setSpacing(10)
+        right_layout.setContentsMargins(0, 0, 0, 0)
+        
+        # 结果标题
+        results_header = QWidget()
+        results_header_layout = QHBoxLayout()
+        results_header_layout.setContentsMargins(0, 0, 0, 10)
+        
+        results_label = QLabel("Result")
+        results_label.setStyleSheet(f"font-weight: bold; color: {Colors.current()['title_3']}; font-size: 30px; margin-bottom: 0px; font-family: 'JetBrains Mono', 'Fira Code', 'Source Code Pro', monospace;")
+        results_header_layout.addWidget(results_label)
+        
+        results_header_layout.addStretch()
+        
+        # 编译缓存命中情况
+        self.cache_stats_label = QLabel(binary_cache.format_stats())
+        self.cache_stats_label.setStyleSheet(f"color: {Colors.current()['text_secondary']}; font-size: 12px;")
+        results_header_layout.addWidget(self.cache_stats_label)
+        
+        results_header.setLayout(results_header_layout)
+        right_layout.addWidget(results_header)
+        
+        # 结果显示区域，使用等宽字体确保分隔线能正确对齐显示（使用启动时已经选好的字体）
+        font = QFont(self.fonts["mono"], 10)
+        font.setStyleHint(QFont.Monospace)
+        self.result_view = ResultView(font)
+        self.result_model = self.result_view.model()
+        self.result_view.itemDelegate().test_point_clicked.connect(self.process_test_point)
+        self.result_view.itemDelegate().diff_clicked.connect(self.open_diff_viewer)
+        right_layout.addWidget(self.result_view)
+        
+        # 任务队列面板
+        queue_header = QWidget()
+        queue_header_layout = QHBoxLayout()
+        queue_header_layout.setContentsMargins(0, 0, 0, 0)
+        
+        queue_label = QLabel("Queue")
+        queue_label.setStyleSheet(f"font-weight: bold; color: {Colors.current()['title_3']}; font-size: 18px; font-family: 'JetBrains Mono', 'Fira Code', 'Source Code Pro', monospace;")
+        queue_header_layout.addWidget(queue_label)
+        queue_header_layout.addStretch()
+        
+        # 同时运行的任务数
+        workers_label = QLabel("并行任务数")
+        workers_label.setStyleSheet(f"color: {Colors.current()['text_secondary']}; font-size: 12px;")
+        queue_header_layout.addWidget(workers_label)
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, max(8, 2 * (os.cpu_count() or 1)))
+        self.workers_spin.setValue(self.scheduler.max_workers)
+        self.workers_spin.valueChanged.connect(self.scheduler.set_max_workers)
+        queue_header_layout.addWidget(self.workers_spin)
+        
+        queue_header.setLayout(queue_header_layout)
+        right_layout.addWidget(queue_header)
+        
+        self.queue_tree = QTreeWidget()
+        self.queue_tree.setHeaderLabels(["任务", "类型", "状态", "等待", "耗时"])
+        self.queue_tree.setRootIsDecorated(False)
+        self.queue_tree.setAlternatingRowColors(True)
+        self.queue_tree.setColumnWidth(0, 360)
+        self.queue_tree.setFixedHeight(150)
+        right_layout.addWidget(self.queue_tree)
+        
+        # 队列面板的刷新：状态变化时合并为一次刷新，有任务运行时每秒刷新一次耗时
+        self.queue_refresh_timer = QTimer(self)
+        self.queue_refresh_timer.setSingleShot(True)
+        self.queue_refresh_timer.timeout.connect(self.refresh_queue_panel)
+        self.queue_tick_timer = QTimer(self)
+        self.queue_tick_timer.timeout.connect(self.refresh_queue_panel)
+        self.queue_tick_timer.start(1000)
+        
+        # 设置右侧面板
+        right_panel.setLayout(right_layout)
+        right_panel.setMinimumWidth(1200)  # 设置右侧面板最小宽度，确保能显示长分隔线
+        
+        # 添加面板到主布局
+        main_layout.addWidget(left_panel)
+        main_layout.addWidget(right_panel)
+        
+        # 设置中央部件的布局
+        central_widget.setLayout(main_layout)
+        self.setCentralWidget(central_widget)
+        
+        # 添加初始提示
+        colors = Colors.current()
+        welcome_html = f"""
+        <div style="text-align: center; margin-top: 100px;">
+            <h2 style="color: {colors['accent']};">欢迎使用代码检查系统</h2>
+            <p style="font-size: 14px; margin-bottom: 30px;">请从左侧选择一个作业文件夹开始</p>
+            <div style="color: {colors['text_secondary']}; font-size: 12px;">
+                <p>• 选择作业文件夹后，可以在左侧题目列表中选择题目进行测试</p>
+                <p>• 测试结果会显示在此区域</p>
+                <p>• 点击"查看测试点详情"可以展开或收起详细信息</p>
+                <p>• 使用底部的"一键打包"按钮可以快速打包作业文件</p>
+            </div>
+        </div>
+        """
+        self.result_view.set_rows([ResultRow.html(welcome_html)])
+        
+        # 窗口显示后再扫描作业文件夹
+        QTimer.singleShot(0, self.scan_workspace)
+    
+    def scan_workspace(self):
+        """扫描程序所在目录下的作业文件夹，并打开最新的作业"""
+        mark_startup("首次事件循环")
+        self.assignment_folders = get_all_assignment_folders(get_app_dir())
+        print(f"MainWindow中获取的作业文件夹列表: {self.assignment_folders}")
+        
+        # 添加作业文件夹到树控件
+        self.assignments_tree.clear()
+        for folder in self.assignment_folders:
+            item = QTreeWidgetItem([folder])
+            self.assignments_tree.addTopLevelItem(item)
+        self.no_assignment_label.setVisible(not self.assignment_folders)
+        mark_startup("扫描作业目录")
+        
+        if self.assignment_folders:
+            # 使用最新的作业文件夹：编号最大的assignment，没有时为编号最大的challenge（列表已排好序）
+            assignment_folders = [folder for folder in self.assignment_folders if folder.startswith('assignment')]
+            self.update_task_list((assignment_folders or self.assignment_folders)[-1])
+            mark_startup("加载题目列表")
+        
+        if STARTUP_TIMING:
+            print(format_startup_timing(), file=sys.stderr)
+        
+        if not self.assignment_folders:
+            # 显示错误消息框
+            QMessageBox.warning(None, "警告", "未找到作业文件夹，请确保程序位于正确目录！")
+    
+    def update_task_list(self, assignment_path):
+        """更新题目列表"""
+        # 确保使用绝对路径，切换作业后不再需要之前作业的测试数据
+        if self.current_assignment != os.path.abspath(assignment_path):
+            test_data.clear()
+        self.current_assignment = os.path.abspath(assignment_path)
+        self.task_tree.clear()
+        
+        # 更新窗口标题
+        self.original_title = f"CodeSentry - {assignment_path}"
+        self.update_window_title()
+        
+        # 获取该作业下的所有题目文件夹
+        folders = get_folders_by_pattern(self.current_assignment)
+        
+        # 添加题目到树形部件
+        for folder in sorted(folders):
+            item = QTreeWidgetItem([folder])
+            self.task_tree.addTopLevelItem(item)
+        self.task_watcher.set_assignment(self.current_assignment, folders)
+        
+        # 判过的题目在后台重新验证，源文件或测试数据没有变化时只会复用缓存结果
+        try:
+            judged_tasks = judge_history.judged_tasks(self.current_assignment)
+        except sqlite3.Error:
+            judged_tasks = set()
+        for folder in sorted(judged_tasks.intersection(folders)):
+            self.run_task(folder, PRIORITY_BACKGROUND)
+        
+        # 清空结果
+        self.result_view.set_rows([
+            ResultRow.line((f"已选择作业文件夹: {assignment_path}", 'text_secondary')),
+            ResultRow.line(("请在左侧选择一个题目进行测试", 'text_secondary')),
+        ])
+    
+    def on_task_clicked(self, item, column):
+        """当题目被点击时"""
+        self.current_task = item.text(0)
+        self.run_task(self.current_task)
+    
+    def process_test_point(self, test_point):
+        """处理测试点详情"""
+        
+        if not self.current_task or not self.current_assignment:
+            return
+        
+        # 确保使用绝对路径
+        assignment_path = os.path.abspath(self.current_assignment)
+        
+        detail = self.test_point_details.get(test_point)
+        if detail is not None and detail.get('loading'):
+            # 后台预取还没完成时提前该测试点的详情任务
+            request = self.detail_requests.get(('detail', assignment_path, self.current_task, test_point))
+            if request is not None:
+                self.scheduler.raise_priority(request[0], PRIORITY_DETAIL)
+            detail['expanded'] = not detail['expanded']
+        elif detail is not None and detail['expanded']:
+            # 收起后详情只保存在缓存中
+            detail['expanded'] = False
+            detail.pop('content', None)
+        else:
+            # 展开时从缓存中读取，已经被淘汰且无法重新生成时再运行一次
+            cached = self.cached_detail(test_point)
+            if cached is None:
+                detail = self.request_detail(test_point, PRIORITY_DETAIL)
+            else:
+                detail = self.test_point_details[test_point] = {'content': cached[0], 'files': cached[1]}
+            detail['expanded'] = True
+        
+        # 只更新该测试点所在的行
+        self.result_model.update_point(test_point, detail)
+    
+    def detail_version(self, test_point):
+        """当前显示的结果中测试点详情的缓存版本，源代码、测试数据或判题设置改变后版本都会改变"""
+        return test_point_fingerprint(self.current_task, test_point, self.current_assignment, self.detail_source_key)
+    
+    def detail_cache_keys(self, test_point):
+        """当前题目测试点详情可以使用的 (缓存键, 版本)：当前版本生成的详情，以及当前显示的历史记录中保存的详情"""
+        key = (os.path.abspath(self.current_assignment), self.current_task, test_point)
+        yield key, self.detail_version(test_point)
+        if self.current_run_id is not None:
+            yield key, ('run', self.current_run_id)
+    
+    def cached_detail(self, test_point):
+        """从缓存中读取当前题目测试点的详情 (内容, 文件)，没有时返回None"""
+        for key, version in self.detail_cache_keys(test_point):
+            cached = self.detail_cache.get(key, version)
+            if cached is not None:
+                return cached
+        return None
+    
+    def request_detail(self, test_point, priority):
+        """在调度器中运行测试用例获取当前题目某个测试点的详情，完成后在on_detail_job_changed中显示
+
+        返回详情字典，在获取完成之前显示为加载中
+        """
+        task = self.current_task
+        assignment_path = os.path.abspath(self.current_assignment)
+        detail = self.test_point_details[test_point] = {
+            'content': "正在获取详情...",
+            'expanded': False,
+            'loading': True
+        }
+        # 判题进行中时当前显示的是上次的结果，详情不一定对应那次记录，不保存
+        run_id = None if self.is_task_judging(task) else self.current_run_id
+        key = ('detail', assignment_path, task, test_point)
+        job = self.scheduler.submit(
+            key, lambda job: load_test_point_detail(task, test_point, assignment_path, job.cancel_token),
+            priority, f"{task} 测试点 {test_point} 详情")
+        self.detail_requests[key] = (job, run_id, self.detail_version(test_point))
+        return detail
+    
+    def prefetch_details(self, test_points):
+        """判题结束后在后台并行获取所有未通过测试点的详情，点击时可以直接显示
+
+        各个任务编译同一份源代码，BinaryCache对相同的源文件只编译一次，其余任务直接使用缓存
+        """
+        for test_point in test_points:
+            if test_point not in self.test_point_details and not any(
+                    self.detail_cache.contains(key, version) for key, version in self.detail_cache_keys(test_point)):
+                self.result_model.update_point(test_point, self.request_detail(test_point, PRIORITY_BACKGROUND))
+    
+    def cancel_detail_requests(self):
+        """切换题目或显示新的结果时，取消还没有完成的测试点详情任务"""
+        for job, _, _ in list(self.detail_requests.values()):
+            self.scheduler.cancel(job)
+        self.detail_requests.clear()
+    
+    def open_diff_viewer(self, test_point):
+        """在对比窗口中查看测试点完整的输入和输出"""
+        detail = self.test_point_details.get(test_point)
+        files = detail.get('files') if detail else None
+        if not files or not all(os.path.isfile(path) for path in files):
+            QMessageBox.information(self, "提示", "没有找到该测试点保留的输出文件，请重新判题后再查看详情")
+            return
+        
+        font = QFont(self.fonts["mono"], 10)
+        font.setStyleHint(QFont.Monospace)
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            viewer = DiffViewerDialog(f"{self.current_task} 测试点 {test_point} 输出对比", files, font, self)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, "错误", f"打开对比窗口时出错: {str(e)}")
+            return
+        finally:
+            QApplication.restoreOverrideCursor()
+        viewer.show()
+    
+    def on_detail_job_changed(self, job):
+        """测试点详情任务结束后更新显示"""
+        if job.state not in (JudgeJob.FINISHED, JudgeJob.FAILED, JudgeJob.CANCELLED):
+            return
+        # 已经被取消或被新的请求替换掉的任务
+        request = self.detail_requests.get(job.key)
+        if request is None or request[0] is not job:
+            return
+        _, run_id, version = self.detail_requests.pop(job.key)
+        _, assignment_path, task, test_point = job.key
+        
+        # 用户已经切换到其他题目，或者结果已经刷新
+        detail = self.test_point_details.get(test_point)
+        if (assignment_path, task) != (os.path.abspath(self.current_assignment or ""), self.current_task) \
+                or detail is None or not detail.get('loading'):
+            return
+        
+        if job.state == JudgeJob.FINISHED:
+            content, detail['files'], result = job.result
+            self.detail_cache.put((assignment_path, task, test_point), version, content, detail['files'], result)
+            # 预取的详情在展开之前只保存在缓存中
+            if detail['expanded']:
+                detail['content'] = content
+            else:
+                detail.pop('content', None)
+            if run_id is not None and run_id == self.current_run_id:
+                try:
+                    judge_history.save_detail(run_id, test_point, content)
+                except sqlite3.Error:
+                    traceback.print_exc()
+        else:
+            detail['content'] = f"获取详情失败: {job.error}" if job.error else "获取详情已取消"
+        detail.pop('loading')
+        self.cache_stats_label.setText(binary_cache.format_stats())
+        self.result_model.update_point(test_point, detail)
+    
+    def run_task(self, task, priority=PRIORITY_INTERACTIVE):
+        """把题目的判题任务加入调度器，不同题目的判题可以同时进行
+
+        priority为PRIORITY_INTERACTIVE时表示用户点击了该题目，会同时更新结果显示
+        """
+        interactive = priority == PRIORITY_INTERACTIVE
+        if not self.current_assignment or not task:
+            return
+        
+        # 确保使用绝对路径
+        assignment_path = os.path.abspath(self.current_assignment)
+        key = (assignment_path, task)
+        
+        # 该题目已经在排队或判题中时提高其优先级，并显示它的实时进度
+        if key in self.judge_jobs:
+            worker = self.judge_jobs[key]
+            if worker.job is not None:
+                self.scheduler.raise_priority(worker.job, priority)
+            if interactive:
+                self.show_running_task(task)
+            return
+        
+        if interactive:
+            # 清空之前的结果和测试点详情
+            self.result_model.clear()
+            self.test_point_details.clear()
+            self.cancel_detail_requests()
+            self.current_run_id = None
+            self.last_result_rows = []
+            
+            # 有历史记录时先显示上次的结果，否则显示正在运行的提示
+            if not self.show_last_result(task):
+                self.result_view.set_rows([ResultRow.line(("正在运行判题，请稍候...", 'text_secondary'))])
+        
+        try:
+            # 创建判题任务，找不到judger_batch.py时使用check_all_assignments函数；
+            # 判题事件带上任务的键转发到界面线程，以便区分同时进行的多个判题任务
+            worker = JudgeWorker(
+                task, assignment_path,
+                use_check_all=find_judger_batch(assignment_path) is None,
+                on_progress=lambda events, key=key: self.scheduler_bridge.job_progress.emit(key, events)
+            )
+            
+            # 设置定时器检查是否运行时间过长，任务开始运行时启动
+            worker.timer = QTimer(self)
+            worker.timer.setSingleShot(True)
+            worker.timer.timeout.connect(lambda key=key: self.check_long_running(key))
+            
+            # 加入调度器
+            self.judge_jobs[key] = worker
+            worker.job = self.scheduler.submit(('judge',) + key, worker.run, priority, task)
+            self.update_window_title()
+            
+        except Exception as e:
+            # 出现异常，恢复状态
+            self.finish_job(key)
+                
+            self.result_view.set_rows([ResultRow.line((f"准备测试时出错: {str(e)}", 'error'))])
+            traceback.print_exc()
+    
+    def is_task_judging(self, task):
+        """当前作业中的该题目是否正在判题"""
+        return self.current_assignment is not None and (os.path.abspath(self.current_assignment), task) in self.judge_jobs
+    
+    def is_current_job(self, key):
+        """判题任务是否对应当前显示的题目"""
+        return (self.current_assignment is not None and
+                key == (os.path.abspath(self.current_assignment), self.current_task))
+    
+    def update_window_title(self):
+        """根据正在进行的判题任务更新窗口标题"""
+        if self.judge_jobs:
+            tasks = "、".join(sorted(task for _, task in self.judge_jobs))
+            self.setWindowTitle(f"运行{tasks}中...")
+        else:
+            self.setWindowTitle(self.original_title)
+    
+    def finish_job(self, key):
+        """判题任务结束后的清理：停止计时器、关闭对应的提示对话框，返回该任务的工作线程"""
+        worker = self.judge_jobs.pop(key, None)
+        if worker is not None and worker.timer is not None and worker.timer.isActive():
+            worker.timer.stop()
+        # 正常情况下任务结束后才会调用；准备判题出错时任务可能已经在调度器中，不再跟踪之前先取消
+        if worker is not None and worker.job is not None and worker.job.state in (JudgeJob.QUEUED, JudgeJob.RUNNING):
+            self.scheduler.cancel(worker.job)
+        
+        # 关闭该任务的长时间运行对话框（如果存在）
+        if (self.long_running_dialog and self.long_running_dialog.isVisible()
+                and self.long_running_dialog.job_key == key):
+            self.long_running_dialog.close()
+            self.long_running_dialog = None
+        
+        self.update_window_title()
+        return worker
+    
+    def on_job_changed(self, job):
+        """调度器中任务状态变化的回调函数（在界面线程中执行）"""
+        self.schedule_queue_refresh()
+        if job.key[0] == 'detail':
+            self.on_detail_job_changed(job)
+            return
+        
+        key = job.key[1:]
+        worker = self.judge_jobs.get(key)
+        if worker is None:
+            return
+        if job.state == JudgeJob.RUNNING:
+            if job.priority == PRIORITY_INTERACTIVE and not worker.timer.isActive():
+                worker.timer.start(3000)  # 3秒后检查
+        elif job.state == JudgeJob.QUEUED:
+            # 被更高优先级的任务抢占后重新排队，之前收到的进度作废
+            worker.summary = TaskEventSummary(worker.task)
+        elif job.state == JudgeJob.FINISHED:
+            self.on_judge_finished(key, *job.result)
+        elif job.state == JudgeJob.CANCELLED:
+            self.on_judge_cancelled(key, job.run_time or 0.0)
+        elif job.state == JudgeJob.FAILED:
+            self.on_judge_error(key, job.error)
+        
+        # 运行期间文件又被修改过，按最新的文件重新判题
+        if key in self.stale_jobs and key not in self.judge_jobs:
+            self.stale_jobs.discard(key)
+            if self.current_assignment and key[0] == os.path.abspath(self.current_assignment):
+                self.run_task(key[1], PRIORITY_BACKGROUND)
+    
+    def on_watched_tasks_changed(self, tasks):
+        """题目的源文件或测试数据发生变化后在后台重新编译和判题"""
+        assignment_path = os.path.abspath(self.current_assignment)
+        for task in tasks:
+            worker = self.judge_jobs.get((assignment_path, task))
+            if worker is not None and worker.job is not None and worker.job.state == JudgeJob.RUNNING:
+                # 正在运行的任务读取的可能是旧文件，结束后再判一次
+                self.stale_jobs.add((assignment_path, task))
+            else:
+                self.run_task(task, PRIORITY_BACKGROUND)
+    
+    def schedule_queue_refresh(self):
+        if not self.queue_refresh_timer.isActive():
+            self.queue_refresh_timer.start(100)
+    
+    def refresh_queue_panel(self):
+        """刷新任务队列面板：排队中、运行中和最近结束的任务及其等待和运行时间"""
+        queued, running, finished = self.scheduler.snapshot()
+        if self.sender() is self.queue_tick_timer and not queued and not running:
+            return
+        colors = Colors.current()
+        self.queue_tree.clear()
+        for job in queued + running + finished:
+            run_time = job.run_time
+            item = QTreeWidgetItem([
+                job.description,
+                PRIORITY_NAMES.get(job.priority, str(job.priority)),
+                JudgeJob.STATE_NAMES[job.state],
+                f"{job.wait_time:.2f}s",
+                f"{run_time:.2f}s" if run_time is not None else "-",
+            ])
+            if job.state == JudgeJob.RUNNING:
+                item.setForeground(2, QColor(colors['accent']))
+            elif job.state == JudgeJob.FAILED:
+                item.setForeground(2, QColor(colors['error']))
+            self.queue_tree.addTopLevelItem(item)
+    
+    def on_judge_finished(self, key, stdout, stderr, elapsed_time):
+        """判题完成的回调函数"""
+        worker = self.finish_job(key)
+        if worker is None:
+            return
+        assignment_path, task = key
+        
+        # 保存到判题历史
+        task_result = worker.task_result
+        try:
+            run_id = judge_history.record_run(assignment_path, task, stdout, stderr, elapsed_time, task_result)
+        except (sqlite3.Error, OSError):
+            run_id = None
+            traceback.print_exc()
+        
+        # 用户正在查看其他题目时，结果只保存到历史中，切换回来时再显示
+        if not self.is_current_job(key):
+            return
+        
+        # 新结果替换掉之前显示的历史结果
+        self.test_point_details.clear()
+        self.cancel_detail_requests()
+        self.current_run_id = run_id
+        failed_points = self.show_result(stdout, stderr, elapsed_time, task_result, summary=worker.summary)
+        self.prefetch_details(failed_points)
+    
+    def show_last_result(self, task):
+        """显示题目在判题历史中最近一次的结果，没有记录时返回False"""
+        try:
+            run = judge_history.latest_run(self.current_assignment, task)
+        except (sqlite3.Error, OSError, zlib.error):
+            traceback.print_exc()
+            return False
+        if run is None:
+            return False
+        
+        self.current_run_id = run['id']
+        assignment_path = os.path.abspath(self.current_assignment)
+        # 历史记录中的详情生成时的测试数据未知，只在显示这条记录时使用
+        version = ('run', run['id'])
+        for index, content in run['details'].items():
+            # 缓存中已有的详情可以在淘汰后重新生成，不用历史记录替换
+            if not self.detail_cache.contains((assignment_path, task, index), version):
+                # 对比窗口使用最近一次获取详情时保留的用户输出
+                self.detail_cache.put((assignment_path, task, index), version, content,
+                                      test_point_files(self.current_assignment, task, index))
+        finished = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(run['finished_at']))
+        header = ResultRow.line((f"上次判题结果（{finished}），正在后台重新判题...", 'text_secondary'))
+        self.show_result(run['stdout'], run['stderr'], run['elapsed'], run['task_result'], header)
+        self.last_result_rows = self.result_model.rows
+        return True
+    
+    def on_judge_progress(self, key, events):
+        """收到一批判题事件时，更新实时进度"""
+        worker = self.judge_jobs.get(key)
+        if worker is None:
+            return
+        for event in events:
+            worker.summary.apply(event)
+        if self.is_current_job(key):
+            self.result_view.set_rows(self.progress_rows(worker.summary), keep_scroll=True)
+    
+    def show_running_task(self, task):
+        """切换到正在判题的题目时，显示上次的结果和实时进度"""
+        self.test_point_details.clear()
+        self.cancel_detail_requests()
+        self.current_run_id = None
+        self.last_result_rows = []
+        self.show_last_result(task)
+        worker = self.judge_jobs[(os.path.abspath(self.current_assignment), task)]
+        queued = worker.job is not None and worker.job.state == JudgeJob.QUEUED
+        self.result_view.set_rows(self.progress_rows(worker.summary, queued))
+    
+    def progress_rows(self, summary, queued=False):
+        """生成判题进行中的实时进度：进度计数、已完成测试点的结果和失败信息"""
+        rows = []
+        done = len(summary.points)
+        total = summary.total if summary.total is not None else "?"
+        if queued:
+            rows.append(ResultRow.line(("判题任务排队中，请稍候...", 'text_secondary')))
+        else:
+            status = "正在编译..." if summary.compiling else f"已完成 {done}/{total} 个测试点"
+            rows.append(ResultRow.line((f"正在运行判题，{status}", 'text_secondary')))
+        if summary.compiled is False:
+            rows.append(ResultRow.line(("编译错误", 'test_fail', True)))
+            rows.append(ResultRow.pre(summary.compile_error or ""))
+        for index in sorted(summary.points):
+            event = summary.points[index]
+            passed = event['score'] == FULL_SCORE
+            usage = ProcessUsage.from_dict(event['usage']).format() if event.get('usage') else ""
+            cached_note = "（缓存结果）" if event.get('cached') else ""
+            rows.append(ResultRow.point(index, [
+                (f"测试点 {index}: {event['verdict']}{cached_note}", 'test_pass' if passed else 'test_fail'),
+                (f" {usage}", 'text_secondary')]))
+            if not passed and event.get('message'):
+                rows.append(ResultRow.pre(event['message']))
+        for index in sorted(summary.running):
+            rows.append(ResultRow.line((f"测试点 {index}: 运行中...", 'text_secondary')))
+        if self.last_result_rows:
+            rows.append(ResultRow.rule())
+            rows.extend(self.last_result_rows)
+        return rows
+    
+    def show_result(self, stdout, stderr, elapsed_time, task_result, header=None, summary=None):
+        """根据判题输出构建并显示结果，每个测试点一行，未通过的测试点可以展开详情
+
+        summary为判题过程中收到的事件汇总，没有完整事件时从输出文本中解析。返回可以展开详情的测试点
+        """
+        if summary is None or summary.finished is None:
+            summary = TaskEventSummary.from_legacy_output(self.current_task, stdout)
+        self.detail_source_key = task_result.source_key if task_result is not None else None
+        
+        # 检查所有测试点是否都是满分，未通过的测试点可以点击查看详情
+        all_correct = summary.passed
+        failed_points = summary.failed_points() if stdout and not all_correct else []
+        
+        rows = []
+        if header:
+            rows.append(header)
+        
+        # 添加运行时间信息
+        rows.append(ResultRow.line((f"运行时间: {elapsed_time:.2f}秒", 'text_secondary')))
+        
+        # 编译耗时与每个测试点的资源使用情况
+        if task_result is not None:
+            rows.extend(self.resource_rows(task_result, failed_points))
+        
+        if stderr:
+            rows.append(ResultRow.pre(stderr, 'error'))
+        
+        # 显示结果
+        if stdout:
+            if all_correct:
+                rows.append(ResultRow.line(("🎉 恭喜你，全部做对了！", 'test_pass', True)))
+            else:
+                rows.append(ResultRow.line(("😢 还需要改进", 'test_fail', True)))
+                
+                # 显示详细结果
+                rows.append(ResultRow.pre(stdout))
+                
+                # 没有资源使用记录的失败测试点单独列出
+                listed = {point.index for point in task_result.points} if task_result is not None else set()
+                for test_point in failed_points:
+                    if test_point not in listed:
+                        rows.append(ResultRow.point(test_point, linkable=True,
+                                                    detail=self.test_point_details.get(test_point)))
+        else:
+            rows.append(ResultRow.line(("❌ 未获取到判题结果", 'test_fail', True)))
+        
+        self.result_view.set_rows(rows)
+        return failed_points
+    
+    def resource_rows(self, task_result, failed_points=()):
+        """生成编译耗时和每个测试点的资源使用情况，failed_points中的测试点可以展开详情"""
+        cache_note = "（使用编译缓存）" if task_result.compile_cached else ""
+        rows = [ResultRow.line((f"编译时间: {task_result.compile_time:.2f}秒{cache_note}", 'text_secondary'))]
+        for point in task_result.points:
+            usage = point.usage.format() if point.usage is not None else "-"
+            cached_note = "（缓存结果）" if point.cached else ""
+            rows.append(ResultRow.point(point.index, [
+                (f"测试点 {point.index}: {point.verdict}{cached_note}", 'test_pass' if point.passed else 'test_fail'),
+                (f" {usage}", 'text_secondary')],
+                linkable=point.index in failed_points, detail=self.test_point_details.get(point.index)))
+        return rows
+    
+    def on_judge_cancelled(self, key, elapsed_time):
+        """判题被取消的回调函数"""
+        if self.finish_job(key) is None or not self.is_current_job(key):
+            return
+        
+        self.test_point_details.clear()
+        self.cancel_detail_requests()
+        self.result_view.set_rows([
+            ResultRow.line((f"运行时间: {elapsed_time:.2f}秒", 'text_secondary')),
+            ResultRow.line(("⏹ 判题已被终止，所有程序均已结束", 'test_fail', True)),
+        ])
+    
+    def on_judge_error(self, key, exception):
+        """判题出错的回调函数"""
+        if self.finish_job(key) is None or not self.is_current_job(key):
+            return
+        
+        # 显示错误信息
+        self.result_view.set_rows([ResultRow.line((f"运行测试时出错: {str(exception)}", 'error'))])
+    
+    def check_long_running(self, key):
+        """检查是否运行时间过长，并显示提示对话框"""
+        # 只有在仍然判题中、且用户正在查看该题目时才显示对话框
+        worker = self.judge_jobs.get(key)
+        if worker is None or not self.is_current_job(key) or self.long_running_dialog is not None:
+            return
+        task = key[1]
+            
+        # 创建并显示提示对话框
+        self.long_running_dialog = LongRunningDialog(self, task)
+        self.long_running_dialog.job_key = key
+        
+        # 如果用户选择"终止"
+        accepted = self.long_running_dialog.exec_() == QDialog.Accepted
+        self.long_running_dialog = None
+        if accepted and key in self.judge_jobs:
+            # 请求取消，判题线程结束所有子进程后任务状态变为已取消
+            self.scheduler.cancel(worker.job)
+            self.setWindowTitle(f"正在终止{task}...")
+
+    def on_package_button_clicked(self):
+        """处理一键打包按钮点击事件"""
+        if not self.current_assignment:
+            QMessageBox.warning(self, "警告", "请先选择一个作业文件夹")
+            return
+        
+        try:
+            # 获取学生学号
+            student_id = None
+            try:
+                # 静默获取，不使用交互对话框
+                config_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "student_config.txt")
+                if os.path.exists(config_file):
+                    with open(config_file, "r") as f:
+                        student_id = f.read().strip()
+                    if not is_valid_student_id(student_id):
+                        student_id = None
+            except Exception as e:
+                print(f"无法自动获取学号: {str(e)}")
+                student_id = None
+            
+            # 如果没有获取到有效学号，则弹出输入对话框
+            if not student_id:
+                print("打开学号输入对话框")
+                dialog = StudentIDDialog(self)
+                if dialog.exec_() == QDialog.Accepted:
+                    student_id = dialog.get_student_id()
+                    
+                    # 保存学号到配置文件
+                    try:
+                        config_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "student_config.txt")
+                        with open(config_file, "w") as f:
+                            f.write(student_id)
+                    except Exception as e:
+                        print(f"保存学号时出错: {str(e)}")
+                else:
+                    return
+            
+            # 确保使用绝对路径
+            assignment_path = os.path.abspath(self.current_assignment)
+            
+            # 显示打包中提示，但不强制更新UI
+            self.result_model.append_rows([ResultRow.line(("正在打包作业文件...", 'accent'))])
+            
+            # 创建打包文件
+            zip_path = create_zip_package(assignment_path, student_id)
+            
+            if zip_path:
+                self.result_model.append_rows([ResultRow.line((f"打包成功! 文件已保存为: {zip_path}", 'test_pass', True))])
+                QMessageBox.information(self, "打包成功", f"作业已成功打包为:\n{zip_path}")
+            else:
+                self.result_model.append_rows([ResultRow.line(("打包失败!", 'test_fail', True))])
+                QMessageBox.critical(self, "打包失败", "未能成功打包作业文件。请查看详情。")
+        
+        except Exception as e:
+            error_msg = f"打包过程中出错: {str(e)}"
+            self.result_model.append_rows([ResultRow.line((error_msg, 'error'))])
+            QMessageBox.critical(self, "错误", error_msg)
+
+    def update_assignments_tree_style(self):
+        """更新作业列表树控件的样式，根据当前主题"""
+        if hasattr(self, 'assignments_tree'):
+            colors = Colors.current()
+            self.assignments_tree.setStyleSheet(f"""
+                QTreeWidget {{
+                    background-color: {colors['bg_secondary']};
+                    alternate-background-color: {colors['bg_tertiary']};
+                    color: {colors['text_primary']};
+                    border: 1px solid {colors['border']};
+                    border-radius: 6px;
+                    outline: none;
+                }}
+                
+                QTreeWidget::item {{
+                    padding: 3px 6px;
+                    border-radius: 4px;
+                    min-height: 22px;
+                }}
+                
+                QTreeWidget::item:selected {{
+                    background-color: {colors['accent']};
+                    color: white;
+                }}
+                
+                QTreeWidget::item:hover {{
+                    background-color: {colors['highlight']};
+                }}
+            """)
+
+mark_startup("导入界面代码")
+
+def main():
+    try:
+        app = QApplication(sys.argv)
+        mark_startup("创建QApplication")
+        
+        # 设置应用字体
+        fonts = None
+        try:
+            fonts = set_app_fonts(app)
+        except Exception as e:
+            print(f"设置应用字体时出错: {str(e)}")
+            print(traceback.format_exc())
+        mark_startup("设置字体")
+        
+        # 设置应用主题
+        apply_theme(app, dark_mode=True)
+        mark_startup("设置主题")
+
+        window = MainWindow(fonts)  # 将字体信息传递给主窗口
+        mark_startup("创建主窗口")
+        window.show()
+        mark_startup("显示窗口")
+        
+        sys.exit(app.exec_())
+    except Exception as e:
+        error_msg = f"程序启动出错: {str(e)}"
+        
+        # 尝试显示错误对话框
+        try:
+            app = QApplication.instance()
+            if not app:
+                app = QApplication(sys.argv)
+            QMessageBox.critical(None, "程序错误", error_msg)
+        except:
+            # 如果连错误对话框都无法显示，则写入错误日志
+            with open("error.log", "w", encoding="utf-8") as f:
+                f.write(f"{error_msg}\n")
+                f.write(traceback.format_exc())
@@ -7,59 +7,152 @@ import tempfile
 import shutil
 import zipfile
 import time  # 添加time模块用于计时
-from PyQt5 import sip
-from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                            QLabel, QPushButton, QTextBrowser, QTreeWidget, QTreeWidgetItem, 
-                            QDialog, QTabWidget, QMessageBox, QTextEdit, QScrollArea, 
-                            QLineEdit, QDialogButtonBox, QSpacerItem, QSizePolicy,
-                            QStyleFactory, QFrame, QCheckBox, QToolButton)
-from PyQt5.QtCore import Qt, QUrl, QTimer, QThread, pyqtSignal
-from PyQt5.QtGui import QFont, QPalette, QColor, QIcon
-from PyQt5.QtGui import QIcon
-from PyQt5.QtWidgets import QApplication, QMainWindow
-
-
-class MyWindow(QMainWindow):
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("My App")
-        self.setWindowIcon(QIcon("icon.ico"))  # 使用.ico文件
-
-# 添加调试信息
-print(f"程序启动时的当前目录: {os.getcwd()}")
-print(f"可执行文件路径: {sys.executable if getattr(sys, 'frozen', False) else __file__}")
-
-# 强制切换到当前脚本（或 EXE）的目录
-if getattr(sys, 'frozen', False):  # 如果是 EXE 运行
-    os.chdir(os.path.dirname(sys.executable))  # EXE 所在目录
-else:  # Python 运行时
-    os.chdir(os.path.dirname(os.path.abspath(__file__)))  # .py 所在目录
-print(f"切换后的当前工作目录：{os.getcwd()}")
-print(f"当前目录内容：{os.listdir()}")
+import hashlib
+import threading
+import json
+import heapq
+from contextlib import redirect_stdout
+import mmap
+import signal
+import sqlite3
+import zlib
+try:
+    import resource
+except ImportError:  # Windows上没有resource模块
+    resource = None
+import importlib.util
+import math
+import argparse
+import bisect
+import csv
+from array import array
+from collections import deque, OrderedDict
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
 
-# 定义无窗口子进程运行函数
-def run_subprocess_no_window(cmd, **kwargs):
-    """运行子进程但不显示命令行窗口"""
+# 启动耗时统计（--startup-timing）：记录每个启动阶段结束的时间
+STARTUP_TIMING = "--startup-timing" in sys.argv[1:]
+_startup_marks = [("", time.perf_counter())]
+
+def mark_startup(stage):
+    """记录一个启动阶段结束"""
+    _startup_marks.append((stage, time.perf_counter()))
+
+def format_startup_timing():
+    """各启动阶段的耗时表（从导入标准库之后开始计时）"""
+    lines = ["启动耗时:"]
+    for (_, previous), (stage, now) in zip(_startup_marks, _startup_marks[1:]):
+        lines.append(f"  {(now - previous) * 1000:8.1f} ms  {stage}")
+    lines.append(f"  {(_startup_marks[-1][1] - _startup_marks[0][1]) * 1000:8.1f} ms  合计")
+    return "\n".join(lines)
+
+def _no_window_kwargs(kwargs):
+    """在子进程参数中加入不显示命令行窗口的设置
+
+    子进程同时会放在独立的进程组中，以便取消判题时结束它及其派生的所有进程
+    """
     # 仅在Windows上设置创建标志
     creation_flags = 0
     startupinfo = None
     
     if sys.platform.startswith('win'):
         # 设置CREATE_NO_WINDOW标志，防止显示控制台窗口
-        creation_flags = subprocess.CREATE_NO_WINDOW
+        creation_flags = subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP
         
         # 也设置startupinfo，以防创建标志不起作用
         startupinfo = subprocess.STARTUPINFO()
         startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
         startupinfo.wShowWindow = 0  # SW_HIDE
     
+    else:
+        kwargs.setdefault('start_new_session', True)
+    
     # 合并其他参数
     kwargs.update({
         'creationflags': creation_flags,
         'startupinfo': startupinfo
     })
+    return kwargs
+
+# 定义无窗口子进程运行函数
+def run_subprocess_no_window(cmd, **kwargs):
+    """运行子进程但不显示命令行窗口"""
+    return subprocess.run(cmd, **_no_window_kwargs(kwargs))
+
+def popen_no_window(cmd, **kwargs):
+    """启动子进程但不显示命令行窗口，返回Popen对象"""
+    return subprocess.Popen(cmd, **_no_window_kwargs(kwargs))
+
+def terminate_process_trees(procs, grace=0.5):
+    """结束子进程所在的整个进程组：先发送SIGTERM，grace秒后仍未退出的发送SIGKILL
+
+    不回收子进程，回收和资源统计仍由启动它的代码负责。Windows上直接用taskkill结束进程树。
+    """
+    procs = [proc for proc in procs if proc.returncode is None]
+    if sys.platform.startswith('win'):
+        for proc in procs:
+            run_subprocess_no_window(['taskkill', '/F', '/T', '/PID', str(proc.pid)],
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
     
-    return subprocess.run(cmd, **kwargs)
+    def signal_group(proc, sig):
+        try:
+            os.killpg(proc.pid, sig)
+            return True
+        except OSError:
+            return False  # 进程组中已经没有进程
+    
+    alive = [proc for proc in procs if signal_group(proc, signal.SIGTERM)]
+    deadline = time.monotonic() + grace
+    while alive and time.monotonic() < deadline:
+        time.sleep(0.01)
+        alive = [proc for proc in alive if signal_group(proc, 0)]
+    for proc in alive:
+        signal_group(proc, signal.SIGKILL)
+
+class JudgeCancelled(Exception):
+    """判题被用户取消"""
+
+class CancelToken:
+    """判题的取消标志
+
+    判题期间启动的子进程通过register登记，cancel时会在后台结束它们所在的整个进程组，
+    之后再登记的子进程会被立即结束。
+    """
+    def __init__(self, grace=0.5):
+        self.grace = grace  # 发送SIGTERM后等待进程退出的时间（秒）
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._processes = set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def check(self):
+        """已取消时抛出JudgeCancelled"""
+        if self._cancelled:
+            raise JudgeCancelled()
+
+    def register(self, proc):
+        with self._lock:
+            if not self._cancelled:
+                self._processes.add(proc)
+                return
+        terminate_process_trees([proc], self.grace)
+
+    def unregister(self, proc):
+        with self._lock:
+            self._processes.discard(proc)
+
+    def cancel(self):
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            procs = list(self._processes)
+        if procs:
+            threading.Thread(target=terminate_process_trees, args=(procs, self.grace), daemon=True).start()
 
 def get_latest_assignment_folder():
     # 获取当前目录下所有文件夹，筛选出以 "assignment" 开头的文件夹
@@ -86,1955 +179,3534 @@ def get_latest_assignment_folder():
     
     return latest_folder
 
-def get_folders_by_pattern():
-    # 获取所有以 "x_yyy" 格式命名的文件夹
+def get_folders_by_pattern(base_path='.'):
+    # 获取base_path下所有以 "x_yyy" 格式命名的文件夹
     pattern = r'^\d+_\w+$'
-    folders = [f for f in os.listdir() if os.path.isdir(f) and re.match(pattern, f)]
+    folders = [f for f in os.listdir(base_path) if os.path.isdir(os.path.join(base_path, f)) and re.match(pattern, f)]
     
     return folders
 
-def run_test_case(task_folder, test_case_num, assignment_path):
-    """运行单个测试案例并返回详细结果"""
-    # 确保使用绝对路径
-    assignment_path = os.path.abspath(assignment_path)
-    
-    # 导入judger_batch模块
+# 编译器与编译参数（与judger_batch保持一致）
+COMPILER = 'g++'
+COMPILE_FLAGS = ['-g', '-Wall', '--std=c++11']
+
+def get_app_dir():
+    """获取脚本（或EXE）所在目录"""
+    if getattr(sys, 'frozen', False):  # 如果是EXE运行
+        return os.path.dirname(os.path.abspath(sys.executable))
+    return os.path.dirname(os.path.abspath(__file__))
+
+# 编译产物等缓存文件的存放目录
+CACHE_DIR = os.path.join(get_app_dir(), ".codesentry_cache")
+
+# 编译器版本信息缓存，避免每次都调用 g++ --version
+_compiler_versions = {}
+_compiler_versions_lock = threading.Lock()
+
+def get_compiler_version(compiler=COMPILER):
+    """获取编译器版本字符串（按编译器路径和修改时间缓存）"""
+    compiler_path = shutil.which(compiler) or compiler
     try:
-        # 将作业目录添加到Python路径
-        if assignment_path not in sys.path:
-            sys.path.insert(0, assignment_path)
-        
-        # 尝试导入judger_batch模块
-        try:
-            from judger_batch import input_name, output_name, exec_name, get_random_filename
-        except ImportError as e:
-            # 如果导入失败，尝试在上级目录查找
-            parent_dir = os.path.dirname(assignment_path)
-            if parent_dir not in sys.path:
-                sys.path.insert(0, parent_dir)
-            from judger_batch import input_name, output_name, exec_name, get_random_filename
-    except ImportError as e:
-        return False, "导入错误", f"无法导入judger_batch模块: {str(e)}", None, None, None
-    
-    # 创建临时工作目录
-    workdir = tempfile.mkdtemp()
-    
+        mtime = os.stat(compiler_path).st_mtime_ns
+    except OSError:
+        mtime = 0
+    cache_key = (compiler_path, mtime)
+    with _compiler_versions_lock:
+        if cache_key in _compiler_versions:
+            return _compiler_versions[cache_key]
     try:
-        # 准备文件路径
-        input_dir = os.path.join(assignment_path, 'data', task_folder)
-        standard_dir = os.path.join(assignment_path, 'data', task_folder)
-        source_dir = os.path.join(assignment_path, task_folder)
-        
-        # 检查必要的目录和文件是否存在
-        if not os.path.exists(input_dir):
-            return False, "输入目录不存在", f"找不到输入目录: {input_dir}", None, None, None
-        if not os.path.exists(standard_dir):
-            return False, "标准输出目录不存在", f"找不到标准输出目录: {standard_dir}", None, None, None
-        if not os.path.exists(source_dir):
-            return False, "源代码目录不存在", f"找不到源代码目录: {source_dir}", None, None, None
-        
-        main_dir = os.path.join(source_dir, exec_name[task_folder][0])
-        exec_dir = os.path.join(workdir, exec_name[task_folder][1])
-        
-        # 检查源文件是否存在
-        if not os.path.exists(main_dir):
-            return False, "源文件不存在", f"找不到源文件: {main_dir}", None, None, None
-        
-        # 编译代码
-        compile_cmd = ['g++', main_dir, '-o', exec_dir, '-g', '-Wall', '--std=c++11']
-        cp_pro = run_subprocess_no_window(compile_cmd, capture_output=True)
-        
-        if cp_pro.returncode != 0:
-            return False, "编译错误", cp_pro.stderr.decode('utf-8', errors='ignore'), None, None, None
-        
-        # 运行测试案例
-        input_file = os.path.join(input_dir, input_name[test_case_num-1])
-        standard_file = os.path.join(standard_dir, output_name[test_case_num-1])
-        
-        if not os.path.exists(input_file):
-            return False, "输入文件不存在", f"找不到文件: {input_file}", None, None, None
-        if not os.path.exists(standard_file):
-            return False, "标准输出文件不存在", f"找不到文件: {standard_file}", None, None, None
-        
-        # 读取标准输入
-        with open(input_file, 'r', encoding='utf-8', errors='ignore') as f:
-            input_content = f.read().strip()
-        
-        # 创建用户输出文件
-        user_output_file = os.path.join(workdir, get_random_filename() + '.out')
-        with open(input_file, 'r', encoding='utf-8', errors='ignore') as fin, \
-             open(user_output_file, 'w', encoding='utf-8', errors='ignore') as fout:
+        result = run_subprocess_no_window([compiler, '--version'], capture_output=True)
+        version = result.stdout.decode('utf-8', errors='ignore').strip()
+    except OSError:
+        version = "unknown"
+    with _compiler_versions_lock:
+        _compiler_versions[cache_key] = version
+    return version
+
+# 匹配 #include "xxx.h" 形式的本地头文件
+_LOCAL_INCLUDE_PATTERN = re.compile(rb'^\s*#\s*include\s*"([^"]+)"', re.MULTILINE)
+
+def collect_source_files(main_path):
+    """从主文件出发，递归收集所有通过 #include "..." 引用的本地文件"""
+    main_path = os.path.abspath(main_path)
+    collected = []
+    visited = set()
+    pending = [main_path]
+    while pending:
+        path = pending.pop()
+        if path in visited:
+            continue
+        visited.add(path)
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+        except OSError:
+            # 找不到的头文件也计入，以便文件出现后缓存自动失效
+            collected.append((path, None))
+            continue
+        collected.append((path, content))
+        base_dir = os.path.dirname(path)
+        for name in _LOCAL_INCLUDE_PATTERN.findall(content):
+            include_path = os.path.normpath(os.path.join(base_dir, name.decode('utf-8', errors='ignore')))
+            if include_path not in visited:
+                pending.append(include_path)
+    return collected
+
+# 匹配 #include <bits/stdc++.h>，用于判断是否值得使用预编译头
+_BITS_INCLUDE_PATTERN = re.compile(rb'^\s*#\s*include\s*<bits/stdc\+\+\.h>', re.MULTILINE)
+
+def parse_depfile(text):
+    """解析 g++ -MD 生成的依赖文件，返回依赖文件路径列表"""
+    text = text.replace('\\\r\n', ' ').replace('\\\n', ' ')
+    # Windows下目标路径中含有盘符冒号，因此以 ": " 作为分隔
+    _, sep, deps = text.partition(': ')
+    if not sep:
+        return []
+    paths = []
+    for token in re.findall(r'(?:\\.|[^\s\\])+', deps):
+        paths.append(token.replace('\\ ', ' ').replace('\\#', '#').replace('$$', '$'))
+    return paths
+
+def hash_file(path):
+    """计算文件内容的sha256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class PchCache:
+    """预编译头缓存，按编译器版本和编译参数各保存一份 bits/stdc++.h 的预编译结果
+
+    预编译头在后台线程中生成，生成完成前的编译照常进行，不会额外等待。
+    """
+    HEADER = 'bits/stdc++.h'
+
+    def __init__(self, root, compiler=COMPILER):
+        self.root = root
+        self.compiler = compiler
+        self._lock = threading.Lock()
+        self._building = set()
+
+    def _pch_dir(self, flags):
+        digest = hashlib.sha256()
+        digest.update(get_compiler_version(self.compiler).encode('utf-8'))
+        digest.update(b'\0' + '\0'.join(flags).encode('utf-8'))
+        return os.path.join(self.root, digest.hexdigest())
+
+    def include_dir(self, flags):
+        """返回可用于 -I 的预编译头目录；尚未生成时启动后台生成并返回None"""
+        pch_dir = self._pch_dir(flags)
+        if os.path.exists(os.path.join(pch_dir, self.HEADER + '.gch')):
+            return pch_dir
+        if os.path.exists(os.path.join(pch_dir, 'failed')):
+            return None
+        with self._lock:
+            if pch_dir in self._building:
+                return None
+            self._building.add(pch_dir)
+        threading.Thread(target=self._build, args=(pch_dir, list(flags)), daemon=True).start()
+        return None
+
+    def _find_header(self, flags):
+        """借助 g++ -M 找到系统中 bits/stdc++.h 的实际位置"""
+        result = run_subprocess_no_window([self.compiler] + flags + ['-x', 'c++', '-M', '-'],
+                                          input=b'#include <bits/stdc++.h>\n', capture_output=True)
+        if result.returncode != 0:
+            return None
+        for path in parse_depfile(result.stdout.decode('utf-8', errors='ignore')):
+            if path.replace('\\', '/').endswith(self.HEADER):
+                return path
+        return None
+
+    def _build(self, pch_dir, flags):
+        build_dir = None
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            build_dir = tempfile.mkdtemp(prefix='build_', dir=self.root)
+            header = self._find_header(flags)
+            if header:
+                os.makedirs(os.path.join(build_dir, 'bits'))
+                gch_path = os.path.join(build_dir, self.HEADER + '.gch')
+                result = run_subprocess_no_window([self.compiler] + flags + ['-x', 'c++-header', header, '-o', gch_path],
+                                                  capture_output=True)
+                succeeded = result.returncode == 0
+            else:
+                succeeded = False
+            if not succeeded:
+                # 记录失败（如使用clang或没有该头文件），之后不再尝试
+                shutil.rmtree(os.path.join(build_dir, 'bits'), ignore_errors=True)
+                open(os.path.join(build_dir, 'failed'), 'w').close()
             try:
-                run_subprocess_no_window(
-                    [exec_dir], check=True, timeout=2,
-                    stdin=fin, stdout=fout
-                )
-            except subprocess.TimeoutExpired:
-                return False, "超时", "程序运行超时", input_content, None, None
-            except subprocess.CalledProcessError as e:
-                return False, "运行时错误", f"返回值: {e.returncode}", input_content, None, None
-        
-        # 读取用户输出和标准输出
-        with open(user_output_file, 'r', encoding='utf-8', errors='ignore') as f:
-            user_output_content = f.read().strip()
-        with open(standard_file, 'r', encoding='utf-8', errors='ignore') as f:
-            standard_output_content = f.read().strip()
-        
-        # 比较输出
-        user_lines = user_output_content.split('\n')
-        std_lines = standard_output_content.split('\n')
-        
-        if user_output_content == standard_output_content:
-            return True, "正确", None, input_content, user_output_content, standard_output_content
+                os.rename(build_dir, pch_dir)
+            except OSError:
+                shutil.rmtree(build_dir, ignore_errors=True)
+        except Exception:
+            traceback.print_exc()
+            if build_dir:
+                shutil.rmtree(build_dir, ignore_errors=True)
+        finally:
+            with self._lock:
+                self._building.discard(pch_dir)
+
+class BinaryCache:
+    """按内容寻址的编译产物缓存
+
+    缓存键由源文件及其包含的本地头文件内容、编译器版本和编译参数共同决定，
+    编译失败的结果同样会被缓存。缓存总大小超过上限时，按最近使用时间淘汰。
+
+    每次编译都会用 -MD 记录真实的头文件依赖，并按主文件路径保存一份清单；
+    之后只要清单里的文件都没有变化，就可以直接复用结果而无需重新计算缓存键。
+    """
+    def __init__(self, root, max_bytes=200 * 1024 * 1024, compiler=COMPILER):
+        self.root = root
+        self.bin_root = os.path.join(root, 'bin')
+        self.manifest_root = os.path.join(root, 'manifests')
+        self.max_bytes = max_bytes
+        self.compiler = compiler
+        self.pch = PchCache(os.path.join(root, 'pch'), compiler)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}  # 同一个键同时只编译一次
+
+    @staticmethod
+    def exec_filename():
+        return 'prog.exe' if sys.platform.startswith('win') else 'prog'
+
+    def compute_key(self, main_path, flags=None):
+        """计算源文件对应的缓存键"""
+        flags = COMPILE_FLAGS if flags is None else flags
+        main_path = os.path.abspath(main_path)
+        main_dir = os.path.dirname(main_path)
+        digest = hashlib.sha256()
+        digest.update(get_compiler_version(self.compiler).encode('utf-8'))
+        digest.update(b'\0' + '\0'.join(flags).encode('utf-8'))
+        for path, content in sorted(collect_source_files(main_path), key=lambda item: item[0]):
+            # 使用相对路径，内容相同的作业放在不同目录下也能共用缓存
+            digest.update(b'\0' + os.path.relpath(path, main_dir).encode('utf-8') + b'\0')
+            digest.update(b'<missing>' if content is None else hashlib.sha256(content).digest())
+        return digest.hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.bin_root, key)
+
+    def _manifest_path(self, main_path, flags):
+        digest = hashlib.sha256()
+        digest.update(get_compiler_version(self.compiler).encode('utf-8'))
+        digest.update(b'\0' + '\0'.join(flags).encode('utf-8'))
+        digest.update(b'\0' + os.path.abspath(main_path).encode('utf-8'))
+        return os.path.join(self.manifest_root, digest.hexdigest() + '.json')
+
+    def _check_manifest(self, manifest_path):
+        """依赖清单中的文件均未改变时返回记录的缓存键，否则返回None"""
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        refreshed = False
+        for dep in manifest['deps']:
+            path, mtime, size, digest = dep
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+            if st.st_mtime_ns == mtime and st.st_size == size:
+                continue
+            # 时间戳变了但内容可能没变（例如重新保存），再比较一次内容
+            if st.st_size != size or hash_file(path) != digest:
+                return None
+            dep[1], dep[2] = st.st_mtime_ns, st.st_size
+            refreshed = True
+        if refreshed:
+            self._save_json(manifest_path, manifest)
+        return manifest['key']
+
+    def _write_manifest(self, manifest_path, key):
+        """根据条目中记录的依赖列表写入清单"""
+        try:
+            with open(os.path.join(self._entry_dir(key), 'deps.json'), 'r', encoding='utf-8') as f:
+                dep_paths = json.load(f)
+            deps = []
+            for path in dep_paths:
+                st = os.stat(path)
+                deps.append([path, st.st_mtime_ns, st.st_size, hash_file(path)])
+        except (OSError, ValueError):
+            return
+        self._save_json(manifest_path, {'key': key, 'deps': deps})
+
+    @staticmethod
+    def _save_json(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(temp_path, path)
+
+    def _lookup(self, key):
+        """查找缓存条目，返回 (是否编译成功, 可执行文件路径, 错误信息)，未命中返回None"""
+        entry = self._entry_dir(key)
+        exec_path = os.path.join(entry, self.exec_filename())
+        error_path = os.path.join(entry, 'error.txt')
+        if os.path.exists(exec_path):
+            result = (True, exec_path, None)
+        elif os.path.exists(error_path):
+            with open(error_path, 'r', encoding='utf-8', errors='ignore') as f:
+                result = (False, None, f.read())
         else:
-            if len(user_lines) != len(std_lines):
-                diff_msg = f"输出行数不同: 你的输出有 {len(user_lines)} 行，标准输出有 {len(std_lines)} 行"
-            else:
-                diff_lines = []
-                for i, (user_line, std_line) in enumerate(zip(user_lines, std_lines)):
-                    if user_line.rstrip() != std_line.rstrip():
-                        diff_lines.append(i+1)
-                diff_msg = "在第 " + ", ".join(str(i) for i in diff_lines) + " 行有差异"
-            
-            return False, "输出不匹配", diff_msg, input_content, user_output_content, standard_output_content
-    
-    finally:
-        # 清理临时目录
-        shutil.rmtree(workdir, ignore_errors=True)
-        # 移除添加的路径
-        if assignment_path in sys.path:
-            sys.path.remove(assignment_path)
-        if 'parent_dir' in locals() and parent_dir in sys.path:
-            sys.path.remove(parent_dir)
-
-def display_test_case_details(success, msg, details, input_content, user_output, std_output):
-    """显示测试案例的详细信息，返回格式化后的字符串而不是直接打印"""
-    output_lines = []
-    
-    if not success:
-        output_lines.append(f"错误类型: {msg}")
-        if details:
-            output_lines.append(f"详细信息: {details}")
-        
-        # 添加标准输入
-        if input_content:
-            output_lines.append("\nStandard Input")
-            output_lines.append("-" * 60)  # 使用更长的分隔线
-            output_lines.append(input_content)
-            output_lines.append("-" * 60)  # 使用更长的分隔线
-        
-        # 添加用户输出和标准输出
-        if user_output is not None and std_output is not None:
-            # 将输出分行以便对齐显示
-            user_lines = user_output.split('\n')
-            std_lines = std_output.split('\n')
-            
-            # 计算最大行数
-            max_lines = max(len(user_lines), len(std_lines))
-            
-            output_lines.append(f"{'Your Output':<29} | {'Standard Output':<30}")
-            output_lines.append("-" * 60)  # 使用更长的分隔线，确保覆盖两列
-            
-            # 对齐打印每一行
-            for i in range(max_lines):
-                user_line = user_lines[i] if i < len(user_lines) else ""
-                std_line = std_lines[i] if i < len(std_lines) else ""
-                output_lines.append(f"{user_line:<29} | {std_line:<30}")
-            
-            output_lines.append("-" * 60)  # 使用更长的分隔线
-    else:
-        output_lines.append("测试通过！")
-        
-        # 添加标准输入
-        if input_content:
-            output_lines.append("\n标准输入:")
-            output_lines.append("-" * 60)  # 使用更长的分隔线
-            output_lines.append(input_content)
-            output_lines.append("-" * 60)  # 使用更长的分隔线
-        
-        # 添加用户输出（正确情况下与标准输出相同）
-        if user_output is not None:
-            output_lines.append("\n输出:")
-            output_lines.append("-" * 60)  # 使用更长的分隔线
-            output_lines.append(user_output)
-            output_lines.append("-" * 60)  # 使用更长的分隔线
-    
-    # 返回格式化的字符串
-    return "\n".join(output_lines)
+            return None
+        try:
+            # 更新目录时间戳，作为最近使用时间
+            os.utime(entry, None)
+        except OSError:
+            pass
+        return result
 
-def check_all_assignments(folders, assignment_path):
-    all_passed = True
-    for folder in sorted(folders):  # 确保按序号顺序检查
-        x_value = folder.split('_')[0]
-        print(f"\n正在检查第 {x_value} 题...")
+    def _resolve_key(self, main_path, flags):
+        """优先通过依赖清单得到缓存键，返回 (缓存键, 清单是否有效, 清单路径)"""
+        manifest_path = self._manifest_path(main_path, flags)
+        key = self._check_manifest(manifest_path)
+        if key is not None:
+            return key, True, manifest_path
+        return self.compute_key(main_path, flags), False, manifest_path
 
-        judger_path = os.path.join(assignment_path, "judger_batch.py")
-        result = run_subprocess_no_window(["python", judger_path, "-T", folder],
-                              capture_output=True, text=True)
-        
-        # 检查该题的所有测试点
-        scores = re.findall(r'\[SCORE\] (\d+)', result.stdout)
-        if scores and all(int(score) == 10 for score in scores):
-            print(f"第 {x_value} 题通过啦"+int(x_value)*"✌️")
+    def source_key(self, main_path, flags=None):
+        """返回源文件当前对应的缓存键（不进行编译）"""
+        flags = COMPILE_FLAGS if flags is None else flags
+        return self._resolve_key(main_path, flags)[0]
+
+    def get_or_build(self, main_path, flags=None, cancel_token=None, use_manifest=True):
+        """获取编译好的可执行文件
+
+        返回 (是否编译成功, 可执行文件路径, 编译错误信息, 是否命中缓存)
+        编译过程中cancel_token被取消时结束编译器并抛出JudgeCancelled，不会留下缓存条目。
+        use_manifest为False时直接计算缓存键，也不保存依赖清单（用于只编译一次的临时目录）。
+        """
+        flags = COMPILE_FLAGS if flags is None else flags
+        if use_manifest:
+            key, manifest_valid, manifest_path = self._resolve_key(main_path, flags)
         else:
-            print(f"第 {x_value} 题还需要改进 😢")
-            print(result.stdout)
-            
-            # 找出失败的测试点
-            test_points = re.findall(r'\[TEST POINT (\d+)\].*?\[SCORE\] (\d+)', result.stdout, re.DOTALL)
-            for test_point, score in test_points:
-                if int(score) != 10:
-                    print(f"\n测试点 {test_point} 失败，正在获取详细信息...")
-                    result = run_test_case(folder, int(test_point), assignment_path)
-                    # 获取测试点详情并打印
-                    details = display_test_case_details(*result)
-                    print(details)
-            
-            all_passed = False
-        print("="*50)
-    if all_passed:
-        print("\n🎉 太好啦，可以交作业啦！🎉")
-    else:
-        print("\n继续加油，马上就能完成啦！💪")
-    
-    return all_passed
+            key, manifest_valid, manifest_path = self.compute_key(main_path, flags), True, None
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                with self._lock:
+                    self.hits += 1
+                if not manifest_valid:
+                    self._write_manifest(manifest_path, key)
+                return cached + (True,)
+            with self._lock:
+                self.misses += 1
+            result = self._build(key, main_path, flags, cancel_token)
+            if manifest_path is not None:
+                self._write_manifest(manifest_path, key)
+        self.evict(keep=key)
+        return result + (False,)
 
-def get_all_assignment_folders():
-    """获取所有作业文件夹（包括assignment和challenge）"""
-    # 添加调试信息
-    current_dir = os.getcwd()
-    print(f"get_all_assignment_folders函数中的当前目录: {current_dir}")
-    print(f"目录内容: {os.listdir(current_dir)}")
-    
+    def _build(self, key, main_path, flags, cancel_token=None):
+        os.makedirs(self.bin_root, exist_ok=True)
+        build_dir = tempfile.mkdtemp(prefix='build_', dir=self.bin_root)
+        try:
+            exec_path = os.path.join(build_dir, self.exec_filename())
+            dep_path = os.path.join(build_dir, 'deps.d')
+            compile_cmd = [self.compiler, os.path.abspath(main_path), '-o', exec_path] + list(flags)
+            compile_cmd += ['-MD', '-MF', dep_path]
+            # 使用了 bits/stdc++.h 时加入预编译头目录，g++ 会优先使用其中的 .gch 文件
+            if any(content and _BITS_INCLUDE_PATTERN.search(content)
+                   for _, content in collect_source_files(main_path)):
+                pch_dir = self.pch.include_dir(flags)
+                if pch_dir:
+                    compile_cmd += ['-I', pch_dir]
+            cp_pro = popen_no_window(compile_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            if cancel_token is not None:
+                cancel_token.register(cp_pro)
+            try:
+                _, compile_stderr = cp_pro.communicate()
+            finally:
+                if cancel_token is not None:
+                    cancel_token.unregister(cp_pro)
+                    # 被取消的编译不能当作编译错误缓存
+                    cancel_token.check()
+            if cp_pro.returncode != 0:
+                with open(os.path.join(build_dir, 'error.txt'), 'w', encoding='utf-8') as f:
+                    f.write(compile_stderr.decode('utf-8', errors='ignore'))
+            elif os.path.exists(dep_path):
+                with open(dep_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    deps = parse_depfile(f.read())
+                # 预编译头由编译器版本和参数决定，不作为依赖记录
+                pch_root = os.path.abspath(self.pch.root)
+                deps = [os.path.abspath(dep) for dep in deps
+                        if not os.path.abspath(dep).startswith(pch_root + os.sep)]
+                with open(os.path.join(build_dir, 'deps.json'), 'w', encoding='utf-8') as f:
+                    json.dump(deps, f)
+            try:
+                os.rename(build_dir, self._entry_dir(key))
+            except OSError:
+                # 其他进程已经生成了同样的条目
+                shutil.rmtree(build_dir, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(build_dir, ignore_errors=True)
+            raise
+        return self._lookup(key)
+
+    def evict(self, keep=None):
+        """缓存总大小超出上限时，按最近使用时间淘汰旧条目（keep指定的条目不会被淘汰）"""
+        try:
+            names = os.listdir(self.bin_root)
+        except OSError:
+            return
+        entries = []
+        total = 0
+        for name in names:
+            entry = os.path.join(self.bin_root, name)
+            if name.startswith('build_') or name == keep or not os.path.isdir(entry):
+                continue
+            size = 0
+            for file in os.listdir(entry):
+                try:
+                    size += os.path.getsize(os.path.join(entry, file))
+                except OSError:
+                    pass
+            total += size
+            entries.append((os.path.getmtime(entry), size, entry))
+        entries.sort()
+        for _, size, entry in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def format_stats(self):
+        """返回缓存命中情况的描述文本"""
+        return f"编译缓存: 命中 {self.hits} 次，未命中 {self.misses} 次"
+
+# 全局编译缓存
+binary_cache = BinaryCache(os.path.join(CACHE_DIR, "build"))
+
+# 每个测试点的时间限制（秒）和满分
+TIME_LIMIT = 2
+FULL_SCORE = 10
+
+# 限制同时运行的学生程序数量，多道题目并行判题时也不会超过CPU核数
+_process_slots = threading.BoundedSemaphore(os.cpu_count() or 1)
+
+# judger_batch元数据缓存: 文件路径 -> (修改时间, 数据表)
+_judger_metadata_cache = {}
+_judger_metadata_lock = threading.Lock()
+
+def find_judger_batch(assignment_path):
+    """查找作业目录（或其上级目录）中的judger_batch.py，找不到时返回None"""
+    assignment_path = os.path.abspath(assignment_path)
+    for directory in (assignment_path, os.path.dirname(assignment_path)):
+        judger_path = os.path.join(directory, "judger_batch.py")
+        if os.path.isfile(judger_path):
+            return judger_path
+    return None
+
+def load_judger_metadata(assignment_path):
+    """读取作业对应的judger_batch.py中的测试数据表
+
+    按文件路径单独加载为独立的模块对象（不修改sys.path，也不放入sys.modules），
+    结果按路径和修改时间缓存，可在多个线程中同时调用。
+    返回 (input_name, output_name, exec_name, get_random_filename)，读取失败时抛出ImportError
+    """
+    judger_path = find_judger_batch(assignment_path)
+    if judger_path is None:
+        raise ImportError(f"找不到judger_batch.py: {assignment_path}")
+    
+    with _judger_metadata_lock:
+        mtime = os.stat(judger_path).st_mtime_ns
+        cached = _judger_metadata_cache.get(judger_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        
+        # 每个文件使用不同的模块名，避免不同作业的judger_batch互相覆盖
+        module_name = "judger_batch_" + hashlib.sha1(judger_path.encode('utf-8')).hexdigest()[:12]
+        try:
+            spec = importlib.util.spec_from_file_location(module_name, judger_path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            metadata = (module.input_name, module.output_name, module.exec_name, module.get_random_filename)
+        except Exception as e:
+            raise ImportError(f"{judger_path}: {e}") from e
+        _judger_metadata_cache[judger_path] = (mtime, metadata)
+        return metadata
+
+def load_task_metadata(task_folder, assignment_path):
+    """读取题目的测试数据表，返回 (input_name, output_name, 主文件路径)
+
+    无法读取judger_batch.py或其中没有该题目时抛出ImportError
+    """
+    input_name, output_name, exec_name, _ = load_judger_metadata(assignment_path)
     try:
-        # 获取当前目录下所有文件夹，筛选出以 "assignment" 开头的文件夹
-        assignment_folders = [f for f in os.listdir() if os.path.isdir(f) and f.startswith('assignment')]
-        print(f"找到以assignment开头的文件夹: {assignment_folders}")
-        
-        # 筛选出以 "challenge" 开头的文件夹
-        challenge_folders = [f for f in os.listdir() if os.path.isdir(f) and f.startswith('challenge')]
-        print(f"找到以challenge开头的文件夹: {challenge_folders}")
-        
-        # 合并两种文件夹
-        all_folders = assignment_folders + challenge_folders
-        
-        # 排序以便于显示，先按类型，再按数字
-        def sort_key(folder):
-            # 提取数字部分
-            match = re.search(r'(\d+)', folder)
-            if match:
-                number = int(match.group(1))
+        main_name = exec_name[task_folder][0]
+    except (KeyError, IndexError, TypeError) as e:
+        raise ImportError(f"judger_batch.py中没有题目: {task_folder}") from e
+    return input_name, output_name, os.path.join(os.path.abspath(assignment_path), task_folder, main_name)
+
+# 比较输出时忽略的空白字符
+_WHITESPACE = frozenset(b' \t\r\n\x0b\x0c')
+
+# 比较输出时最多列出的差异行数
+MAX_REPORTED_DIFFS = 10
+
+# 测试数据缓存中读入内存的文件最多占用的大小
+TEST_DATA_CACHE_MB = 32
+
+class MappedFile:
+    """以只读方式内存映射一个文件，空文件映射为空字节串"""
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        try:
+            if os.fstat(self._file.fileno()).st_size:
+                self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
             else:
-                number = 0
-            
-            # assignment优先，然后按数字排序
-            if folder.startswith('assignment'):
-                return (0, number)
+                self.data = b''
+        except Exception:
+            self._file.close()
+            raise
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class TestDataStore:
+    """测试数据（data/<题目>下的输入和标准输出）的共享缓存
+
+    小文件读入内存后保留，同一份内容交给所有判题线程、比较器和对比窗口使用，文件的修改时间或大小变化后重新读取，
+    总大小超过max_bytes时淘汰最久没有用过的文件，仍在使用中的文件在用完后才关闭。
+    不小于mmap_threshold的文件内存映射，同时使用的线程共享一个映射，没有人使用时立即关闭
+    （内容留在系统的页缓存中，Windows上映射会锁住文件）。各题目的测试点列表也只在data目录发生变化时重新列出。
+    """
+    def __init__(self, max_bytes=TEST_DATA_CACHE_MB * 1024 * 1024, mmap_threshold=1024 * 1024):
+        self.max_bytes = max_bytes
+        self.mmap_threshold = mmap_threshold
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # 路径 -> _TestDataFile
+        self._points = {}  # (data目录, 输入文件名, 输出文件名) -> (data目录的修改时间, 测试点列表)
+        self._lock = threading.Lock()
+
+    def open(self, path):
+        """返回文件内容的TestDataLease（bytes或mmap），用完后需要close（或用with）"""
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.stamp == stamp:
+                self._entries.move_to_end(path)
+                entry.refs += 1
+                self.hits += 1
+                return TestDataLease(self, entry)
+        
+        # 在锁外读取文件，其他线程同时读取同一个文件时使用先放入缓存的那一份
+        entry = _TestDataFile(path, stamp, self.mmap_threshold)
+        with self._lock:
+            self.misses += 1
+            current = self._entries.get(path)
+            if current is not None and current.stamp == stamp:
+                self._entries.move_to_end(path)
+                current.refs += 1
+                entry.close()
+                return TestDataLease(self, current)
+            if current is not None:
+                self._discard(path)
+            entry.refs = 1
+            if entry.mapped:
+                self._entries[path] = entry
+            elif entry.nbytes <= self.max_bytes:
+                self._entries[path] = entry
+                self.size += entry.nbytes
+                while self.size > self.max_bytes:
+                    self._discard(next(iter(self._entries)))
             else:
-                return (1, number)
-        
-        all_folders.sort(key=sort_key)
-        print(f"最终排序后的文件夹列表: {all_folders}")
-        
-        return all_folders
-    except Exception as e:
-        print(f"获取作业文件夹时出错: {str(e)}")
-        traceback.print_exc()
-        return []
+                entry.evicted = True
+        return TestDataLease(self, entry)
 
-def get_student_id():
-    """获取学生学号，从配置文件读取，否则询问用户并设置"""
-    # 尝试从配置文件读取
-    config_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "student_config.txt")
-    
-    if os.path.exists(config_file):
+    def _discard(self, path):
+        entry = self._entries.pop(path)
+        if not entry.mapped:
+            self.size -= entry.nbytes
+        entry.evicted = True
+        if entry.refs == 0:
+            entry.close()
+
+    def release(self, entry):
+        with self._lock:
+            entry.refs -= 1
+            if entry.refs:
+                return
+            if entry.mapped and not entry.evicted:
+                del self._entries[entry.path]
+                entry.evicted = True
+            close = entry.evicted
+        if close:
+            entry.close()
+
+    def readahead(self, paths):
+        """提示系统提前把还没有缓存的文件读入页缓存，在并行运行测试点之前调用"""
+        if not hasattr(os, 'posix_fadvise'):
+            return
+        for path in paths:
+            with self._lock:
+                if path in self._entries:
+                    continue
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            except OSError:
+                pass
+            finally:
+                os.close(fd)
+
+    def preload(self, paths):
+        """把小文件读入缓存，之后各个判题线程直接共享；内存映射的大文件只提示系统预读"""
+        self.readahead(paths)
+        for path in paths:
+            try:
+                self.open(path).close()
+            except OSError:
+                pass
+
+    def points(self, task_folder, assignment_path, input_name, output_name):
+        """列出题目的所有测试点，返回 [(测试点编号, 输入文件, 标准输出文件)]"""
+        data_dir = os.path.join(assignment_path, 'data', task_folder)
+        key = (data_dir, tuple(input_name), tuple(output_name))
         try:
-            with open(config_file, "r") as f:
-                student_id = f.read().strip()
-            if is_valid_student_id(student_id):
-                print(f"从配置文件读取到学号: {format_student_id(student_id)}")
-                # 在GUI模式下，直接返回学号，不要求确认
-                if 'PyQt5' in sys.modules:
-                    return student_id
-                    
-                # 命令行模式下要求确认
-                confirm = input(f"确认你的学号是 {format_student_id(student_id)} 吗？(y/n): ")
-                if confirm.lower() == 'y':
-                    return student_id
-        except Exception as e:
-            print(f"读取配置文件出错: {e}")
-    
-    # 如果配置文件不存在或无效，询问用户输入
-    # 在GUI模式下，返回None让调用者处理
-    if 'PyQt5' in sys.modules:
-        return None
-        
-    # 命令行模式调用输入函数
-    return request_and_set_student_id()
+            mtime = os.stat(data_dir).st_mtime_ns
+        except OSError:
+            mtime = None
+        with self._lock:
+            cached = self._points.get(key)
+        if cached is not None and cached[0] == mtime and mtime is not None:
+            return list(cached[1])
+        points = []
+        for i, (in_name, out_name) in enumerate(zip(input_name, output_name)):
+            input_file = os.path.join(data_dir, in_name)
+            if os.path.exists(input_file):
+                points.append((i + 1, input_file, os.path.join(data_dir, out_name)))
+        with self._lock:
+            self._points[key] = (mtime, tuple(points))
+        return points
 
-def is_valid_student_id(student_id):
-    """检查学号是否为12位数字"""
-    return bool(re.match(r'^\d{12}$', student_id))
+    def clear(self):
+        """清空缓存，正在使用的文件在用完后关闭"""
+        with self._lock:
+            for path in list(self._entries):
+                self._discard(path)
+            self._points.clear()
 
-def format_student_id(student_id):
-    """将学号格式化为4位4位4位的形式"""
-    if len(student_id) == 12:
-        return f"{student_id[0:4]} {student_id[4:8]} {student_id[8:12]}"
-    return student_id
+    def format_stats(self):
+        return f"测试数据: 命中 {self.hits} 次，读取 {self.misses} 次，缓存 {self.size / (1024 * 1024):.1f}MB"
 
-def request_and_set_student_id():
-    """请求用户输入学号并进行验证、设置"""
-    # 当作为GUI模块调用时直接返回空
-    # 这可以防止终端输入引起的阻塞和循环
-    if 'PyQt5' in sys.modules:
-        print("在GUI模式下运行，跳过终端输入")
-        return None
-        
-    # 下面的代码只在命令行模式下执行
-    max_attempts = 3
-    attempt = 0
+class _TestDataFile:
+    """TestDataStore中的一个文件"""
+    def __init__(self, path, stamp, mmap_threshold):
+        self.path = path
+        self.stamp = stamp
+        self.refs = 0
+        self.evicted = False
+        self.mapped = stamp[1] >= mmap_threshold
+        if self.mapped:
+            self._mapped = MappedFile(path)
+            self.data = self._mapped.data
+        else:
+            self._mapped = None
+            with open(path, 'rb') as f:
+                self.data = f.read()
+        self.nbytes = len(self.data)
+
+    def close(self):
+        if self._mapped is not None:
+            self._mapped.close()
+
+class TestDataLease:
+    """从TestDataStore中取得的文件内容，接口与MappedFile相同"""
+    def __init__(self, store, entry):
+        self._store = store
+        self._entry = entry
+        self.data = entry.data
+
+    def close(self):
+        if self._entry is not None:
+            self._store.release(self._entry)
+            self._entry = None
+            self.data = b''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# 全局测试数据缓存
+test_data = TestDataStore()
+
+def _strip_bounds(data, start, end):
+    """返回去掉首尾空白后的区间"""
+    while start < end and data[start] in _WHITESPACE:
+        start += 1
+    while end > start and data[end - 1] in _WHITESPACE:
+        end -= 1
+    return start, end
+
+def _ranges_equal(a, a_start, a_end, b, b_start, b_end, chunk_size=1024 * 1024):
+    """分块比较两段字节，避免一次性复制整个文件"""
+    if a_end - a_start != b_end - b_start:
+        return False
+    while a_start < a_end:
+        size = min(chunk_size, a_end - a_start)
+        if a[a_start:a_start + size] != b[b_start:b_start + size]:
+            return False
+        a_start += size
+        b_start += size
+    return True
+
+def _count_lines(data, start, end, chunk_size=1024 * 1024):
+    """统计区间内的行数（与 str.split('\\n') 的结果个数一致）"""
+    count = 1
+    while start < end:
+        stop = min(start + chunk_size, end)
+        count += data[start:stop].count(b'\n')
+        start = stop
+    return count
+
+def _take_lines(data, pos, end, count=None, size=256 * 1024):
+    """从pos开始取出完整的行：count为None时取出约size字节内的所有行（至少一行），否则最多取出count行
+
+    返回 (各行的原始内容, 下一行的起始位置)，区间的最后一行之后视为还有一个换行符
+    """
+    while True:
+        stop = min(pos + size, end)
+        lines = data[pos:stop].split(b'\n')
+        if stop < end:
+            if len(lines) <= (1 if count is None else count):
+                size *= 2
+                continue
+            lines.pop()  # 最后一行不完整
+        if count is not None:
+            del lines[count:]
+        return lines, pos + sum(map(len, lines)) + len(lines)
+
+def _strip_cr(lines):
+    """去掉每行行尾的\r，Windows上的换行符\r\n与\n视为相同"""
+    return [line[:-1] if line.endswith(b'\r') else line for line in lines]
+
+def _next_line(data, pos, end):
+    """返回从pos开始的一行去掉行尾\r后的结束位置，以及下一行的起始位置"""
+    stop = data.find(b'\n', pos, end)
+    if stop == -1:
+        stop, next_pos = end, end + 1
+    else:
+        next_pos = stop + 1
+    if stop > pos and data[stop - 1] == 13:
+        stop -= 1
+    return stop, next_pos
+
+def format_line_ranges(line_numbers):
+    """将行号列表压缩为区间形式，如 [1, 2, 3, 7] -> "1-3, 7" """
+    ranges = []
+    for number in line_numbers:
+        if ranges and ranges[-1][1] == number - 1:
+            ranges[-1][1] = number
+        else:
+            ranges.append([number, number])
+    return ", ".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges)
+
+def _preview_line(data, start, stop, limit=60):
+    """解码一行用于展示，过长时截断"""
+    text = data[start:min(stop, start + limit * 4)].decode('utf-8', errors='replace')
+    if len(text) > limit or stop - start > limit * 4:
+        text = text[:limit] + "..."
+    return text
+
+def compare_output_buffers(user_data, standard_data, max_diffs=MAX_REPORTED_DIFFS):
+    """比较用户输出与标准输出（bytes或mmap），相同返回None，否则返回差异描述
+
+    先整体去掉首尾空白后逐字节比较；不相同时再按行比较，行尾的\r（Windows换行符）不算差异，
+    其他行尾空白仍然算作差异。每次取出一块完整的行整体比较，只在不相同的块中逐行查找差异，
+    最多记录max_diffs处差异，只解码第一处差异所在的行用于展示。
+    """
+    user_start, user_end = _strip_bounds(user_data, 0, len(user_data))
+    std_start, std_end = _strip_bounds(standard_data, 0, len(standard_data))
+    if _ranges_equal(user_data, user_start, user_end, standard_data, std_start, std_end):
+        return None
     
-    while attempt < max_attempts:
-        attempt += 1
-        student_id = input("请输入你的学号(12位数字): ")
-        
-        if not is_valid_student_id(student_id):
-            print("错误: 学号必须是12位数字，请重新输入")
-            continue
-        
-        # 格式化显示并确认
-        formatted_id = format_student_id(student_id)
-        confirm = input(f"确认你的学号是 {formatted_id} 吗？(y/n): ")
-        if confirm.lower() == 'y':
-            break
-        
-        if attempt == max_attempts:
-            print("已达到最大尝试次数，退出")
-            return None
+    diff_lines = []
+    first_diff = None
+    truncated = False
+    user_pos, std_pos, line_no = user_start, std_start, 1
+    while user_pos <= user_end and std_pos <= std_end:
+        user_lines, next_user_pos = _take_lines(user_data, user_pos, user_end)
+        std_lines, next_std_pos = _take_lines(standard_data, std_pos, std_end, len(user_lines),
+                                              next_user_pos - user_pos)
+        # 标准输出已经结束时，多出的行只影响行数
+        del user_lines[len(std_lines):]
+        if user_lines != std_lines:
+            user_lines, std_lines = _strip_cr(user_lines), _strip_cr(std_lines)
+        if user_lines != std_lines:
+            for offset, (user_line, std_line) in enumerate(zip(user_lines, std_lines)):
+                if user_line == std_line:
+                    continue
+                if len(diff_lines) >= max_diffs:
+                    truncated = True
+                    break
+                diff_lines.append(line_no + offset)
+                if first_diff is None:
+                    first_diff = (line_no + offset, _preview_line(user_line, 0, len(user_line)),
+                                  _preview_line(std_line, 0, len(std_line)))
+            if truncated:
+                break
+        user_pos, std_pos = next_user_pos, next_std_pos
+        line_no += len(user_lines)
     
-    # 保存到配置文件
-    config_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "student_config.txt")
-    try:
-        with open(config_file, "w") as f:
-            f.write(student_id)
-        print(f"已将学号保存到配置文件")
-    except Exception as e:
-        print(f"警告: 无法保存学号到配置文件: {e}")
+    user_count = _count_lines(user_data, user_start, user_end)
+    std_count = _count_lines(standard_data, std_start, std_end)
+    if not diff_lines and user_count == std_count:
+        # 仅换行符（\r\n）不同
+        return None
     
-    print(f"已设置学号: {formatted_id}")
-    return student_id
+    messages = []
+    if user_count != std_count:
+        messages.append(f"输出行数不同: 你的输出有 {user_count} 行，标准输出有 {std_count} 行")
+    if diff_lines:
+        suffix = f" 等（仅列出前 {max_diffs} 处）" if truncated else ""
+        messages.append(f"在第 {format_line_ranges(diff_lines)} 行有差异{suffix}")
+        line_no, user_line, std_line = first_diff
+        messages.append(f"第 {line_no} 行 你的输出: {user_line}")
+        messages.append(f"第 {line_no} 行 标准输出: {std_line}")
+    return "\n".join(messages)
 
-def find_latest_assignment_folder(base_path):
-    """查找具有最大编号的assignmentx文件夹"""
-    assignment_pattern = re.compile(r'assignment(\d+)$')
-    max_num = -1
-    latest_folder = None
-    
-    for item in os.listdir(base_path):
-        item_path = os.path.join(base_path, item)
-        if os.path.isdir(item_path):
-            match = assignment_pattern.match(item)
-            if match:
-                num = int(match.group(1))
-                if num > max_num:
-                    max_num = num
-                    latest_folder = item_path
-    
-    if latest_folder:
-        print(f"找到最新的作业文件夹: {latest_folder}")
-        return latest_folder
+class StreamComparator:
+    """将程序输出分块送入，与标准输出逐步比较
+
+    比较规则与compare_output_buffers相同。每块完整的行先整体比较，只在不相同的块中逐行比较；
+    差异行（包括多出的行）超过max_diffs时视为已经偏离，调用方可以据此提前终止程序。
+    """
+    # 单行超过该长度仍未结束时，直接按差异处理，避免缓存无限增长
+    MAX_PENDING_LINE = 1024 * 1024
+
+    def __init__(self, standard_data, max_diffs=MAX_REPORTED_DIFFS):
+        self.std = standard_data
+        self.std_start, self.std_end = _strip_bounds(standard_data, 0, len(standard_data))
+        self.std_pos = self.std_start
+        self.max_diffs = max_diffs
+        self.diff_lines = []  # 记录的差异行号（最多max_diffs个）
+        self.diff_count = 0  # 差异行总数
+        self.first_diff = None
+        self.extra_lines = 0  # 标准输出结束后多出的非空行数
+        self.diverged = False
+        self._buffer = bytearray()
+        self._leading = True  # 仍在跳过输出开头的空白
+        self._skip_line = False  # 丢弃超长行的剩余部分
+        self._line_no = 0  # 已处理的行数
+        self._pending = []  # 尚未确定是否属于结尾空白的空白行: [[去掉\r后的内容, 连续出现的次数]]
+
+    def feed(self, chunk):
+        """送入一段输出，返回是否仍需要继续比较（False表示差异已超过阈值）"""
+        if self.diverged:
+            return False
+        if self._leading:
+            chunk = chunk.lstrip(bytes(_WHITESPACE))
+            if not chunk:
+                return True
+            self._leading = False
+        self._buffer += chunk
+        last_newline = self._buffer.rfind(b'\n')
+        if last_newline != -1:
+            block = bytes(self._buffer[:last_newline + 1])
+            del self._buffer[:last_newline + 1]
+            self._process_block(block)
+        if len(self._buffer) > self.MAX_PENDING_LINE:
+            self._buffer.clear()
+            if not self._skip_line:
+                self._skip_line = True
+                self._compare_line(b'\0')
+        return not self.diverged
+
+    def _process_block(self, block):
+        pos = 0
+        if self._skip_line:
+            pos = block.find(b'\n') + 1
+            self._skip_line = False
+        lines = block[pos:].split(b'\n')
+        lines.pop()  # block以换行符结尾
+        
+        # 最后一个非空白行之前的部分与标准输出对应的行整体比较，之后的空白行可能属于结尾空白
+        content = len(lines)
+        while content and not lines[content - 1].strip():
+            content -= 1
+        done = 0
+        if content and not self._pending and self.std_pos <= self.std_end:
+            user_lines = lines[:content]
+            std_lines, next_std_pos = _take_lines(self.std, self.std_pos, self.std_end, content, len(block))
+            if len(std_lines) == content and (
+                    std_lines == user_lines or _strip_cr(std_lines) == _strip_cr(user_lines)):
+                self._line_no += content
+                self.std_pos = next_std_pos
+                done = content
+        for line in lines[done:]:
+            if self.diverged:
+                break
+            self._compare_line(line)
+
+    def _compare_line(self, line):
+        """处理一行用户输出，空白行要等到后面出现非空白行时才能确定不属于结尾空白"""
+        if line.endswith(b'\r'):
+            line = line[:-1]
+        if not line.strip():
+            if self._pending and self._pending[-1][0] == line:
+                self._pending[-1][1] += 1
+            else:
+                self._pending.append([line, 1])
+            return
+        pending, self._pending = self._pending, []
+        for blank, count in pending:
+            for _ in range(count):
+                if self.diverged:
+                    return
+                self._match_line(blank)
+        self._match_line(line)
+
+    def _match_line(self, line):
+        """比较一行用户输出与标准输出中对应的行"""
+        self._line_no += 1
+        if self.std_pos > self.std_end:
+            # 标准输出已经结束
+            self.extra_lines += 1
+        else:
+            std_stop, next_std_pos = _next_line(self.std, self.std_pos, self.std_end)
+            std_line = self.std[self.std_pos:std_stop]
+            # 用户输出在标准输出的最后一行结束时，这一行的行尾空白会和整体的结尾空白一起去掉；
+            # 之后还有输出时行数不同，同样不会通过
+            if line != std_line and not (next_std_pos > self.std_end and line.rstrip() == std_line):
+                if len(self.diff_lines) < self.max_diffs:
+                    self.diff_lines.append(self._line_no)
+                if self.first_diff is None:
+                    self.first_diff = (self._line_no, _preview_line(line, 0, len(line)),
+                                       _preview_line(std_line, 0, len(std_line)))
+                self.diff_count += 1
+            self.std_pos = next_std_pos
+        if self.diff_count + self.extra_lines > self.max_diffs:
+            self.diverged = True
+
+    def finish(self):
+        """输出结束后调用，相同返回None，否则返回差异描述"""
+        if not self.diverged:
+            if self._buffer and not self._skip_line:
+                self._compare_line(bytes(self._buffer))
+            self._buffer.clear()
+            if self._line_no == 0:
+                # 空输出视为一个空行
+                self._match_line(b'')
+        
+        messages = []
+        if self.diverged:
+            messages.append("输出与标准输出差异过多，已提前终止运行")
+        else:
+            user_count = self._line_no
+            std_count = _count_lines(self.std, self.std_start, self.std_end)
+            if not self.diff_lines and user_count == std_count:
+                return None
+            if user_count != std_count:
+                messages.append(f"输出行数不同: 你的输出有 {user_count} 行，标准输出有 {std_count} 行")
+        if self.diff_lines:
+            truncated = self.diff_count > len(self.diff_lines)
+            suffix = f" 等（仅列出前 {self.max_diffs} 处）" if truncated else ""
+            messages.append(f"在第 {format_line_ranges(self.diff_lines)} 行有差异{suffix}")
+            line_no, user_line, std_line = self.first_diff
+            messages.append(f"第 {line_no} 行 你的输出: {user_line}")
+            messages.append(f"第 {line_no} 行 标准输出: {std_line}")
+        elif self.diverged and self.extra_lines:
+            messages.append("标准输出结束后仍有多余的输出")
+        return "\n".join(messages)
+
+def compare_output_files(user_file, standard_file, max_diffs=MAX_REPORTED_DIFFS):
+    """内存映射用户输出，与测试数据缓存中的标准输出比较，相同返回None，否则返回差异描述"""
+    with MappedFile(user_file) as user_mapped, test_data.open(standard_file) as std_mapped:
+        return compare_output_buffers(user_mapped.data, std_mapped.data, max_diffs)
+
+# 测试点详情中最多显示的输入/输出行数和对比行数，完整内容在对比窗口中查看
+DETAIL_PREVIEW_LINES = 50
+DETAIL_DIFF_ROWS = 200
+DETAIL_DIFF_CONTEXT = 3
+# 详情和对比窗口中一行最多显示的字符数
+LINE_PREVIEW_LIMIT = 1000
+# Myers差分的编辑距离上限，超过后中间部分改为逐行对齐比较
+MAX_DIFF_EDITS = 400
+# 内存中测试点详情缓存的默认大小（MB），可以在设置文件中用 detail_cache_mb 修改
+DETAIL_CACHE_MB = 32
+
+# 获取测试点详情时保留的用户输出，供对比窗口按需读取；总大小超过上限时按最近写入时间淘汰
+ARTIFACT_DIR = os.path.join(CACHE_DIR, "outputs")
+ARTIFACT_MAX_BYTES = 256 * 1024 * 1024
+# 超过这个时间（秒）没有修改的临时输出文件不会属于正在运行的程序
+ARTIFACT_TEMP_AGE = 60
+
+def test_artifact_path(assignment_path, task_folder, test_case_num):
+    """测试点的用户输出保存位置（每个测试点只保留最近一次）"""
+    digest = hashlib.sha1(os.path.abspath(assignment_path).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(ARTIFACT_DIR, digest, task_folder, f"{test_case_num}.out")
+
+def evict_test_artifacts(keep=None, max_bytes=ARTIFACT_MAX_BYTES):
+    """保留的用户输出总大小超出上限时，按修改时间删除最旧的文件（keep指定的文件不会被删除）
+
+    同时删除遗留的临时文件。仍被对比窗口打开的文件在Windows上无法删除，直接跳过
+    """
+    entries = []
+    total = 0
+    now = time.time()
+    for root, _, names in os.walk(ARTIFACT_DIR):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if name.endswith('.tmp') and path != keep and now - stat.st_mtime > ARTIFACT_TEMP_AGE:
+                _remove_artifact(path)
+                continue
+            total += stat.st_size
+            if path != keep:
+                entries.append((stat.st_mtime, stat.st_size, path))
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        if _remove_artifact(path):
+            total -= size
+
+def _remove_artifact(path):
+    try:
+        os.remove(path)
+    except OSError:
+        return False
+    return True
+
+def test_point_files(assignment_path, task_folder, test_case_num):
+    """返回测试点的 (输入文件, 保留的用户输出, 标准输出)，任何一个不存在时返回None"""
+    try:
+        input_name, output_name, _, _ = load_judger_metadata(assignment_path)
+        data_dir = os.path.join(os.path.abspath(assignment_path), 'data', task_folder)
+        files = (os.path.join(data_dir, input_name[test_case_num - 1]),
+                 test_artifact_path(assignment_path, task_folder, test_case_num),
+                 os.path.join(data_dir, output_name[test_case_num - 1]))
+    except (ImportError, IndexError, TypeError):
+        return None
+    return files if all(os.path.isfile(path) for path in files) else None
+
+_NEWLINE_PATTERN = re.compile(b'\n')
+
+class LineIndex:
+    """内存映射一个文本文件并记录每行的起始位置，按需解码任意一行
+
+    与 str.strip().split('\\n') 的分行方式一致，每行只占一个8字节的偏移量，
+    不会把整个文件读入内存。指定store（TestDataStore）时使用其中缓存的内容。用完后需要close（或用with）
+    """
+    KEY_CHUNK_LINES = 65536  # 计算行键时每次切分的行数
+    def __init__(self, path, store=None):
+        self._mapped = MappedFile(path) if store is None else store.open(path)
+        data = self.data = self._mapped.data
+        start, end = _strip_bounds(data, 0, len(data))
+        self.offsets = array('q', [start])
+        self.offsets.extend(match.end() for match in _NEWLINE_PATTERN.finditer(data, start, end))
+        self.offsets.append(end + 1)  # 最后一行之后的位置，相当于末尾还有一个换行符
+        self._keys = None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def raw(self, number):
+        """第number行（从0开始）的字节内容，去掉行尾的\\r"""
+        line = self.data[self.offsets[number]:self.offsets[number + 1] - 1]
+        return line[:-1] if line.endswith(b'\r') else line
+
+    def line(self, number, limit=LINE_PREVIEW_LIMIT):
+        """解码第number行用于展示，超过limit个字符时截断"""
+        start, stop = self.offsets[number], self.offsets[number + 1] - 1
+        text = self.data[start:min(stop, start + limit * 4)].decode('utf-8', errors='replace').rstrip('\r')
+        if len(text) > limit or stop - start > limit * 4:
+            text = text[:limit] + "..."
+        return text.replace('\t', '    ')
+
+    def keys(self):
+        """每行去掉行尾\r后的哈希值，用于差分比较（比较规则与compare_output_buffers一致）"""
+        if self._keys is None:
+            self._keys = array('q')
+            for first in range(0, len(self), self.KEY_CHUNK_LINES):
+                last = min(len(self), first + self.KEY_CHUNK_LINES)
+                chunk = self.data[self.offsets[first]:self.offsets[last] - 1]
+                self._keys.extend(map(hash, _strip_cr(chunk.split(b'\n'))))
+        return self._keys
+
+    def close(self):
+        self._mapped.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _myers_matching_blocks(a, a_lo, a_hi, b, b_lo, b_hi, max_edits):
+    """Myers O(ND) 差分算法，返回 a[a_lo:a_hi] 与 b[b_lo:b_hi] 的公共行区块 [(i, j, 长度)]
+
+    编辑距离超过max_edits时返回None。每一步只保存该步可达的最远位置，回溯时使用
+    """
+    n, m = a_hi - a_lo, b_hi - b_lo
+    if abs(n - m) > max_edits:
+        return None
+    offset = max_edits + 1
+    v = array('q', [0]) * (2 * offset + 1)
+    trace = []
+    for d in range(min(max_edits, n + m) + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[a_lo + x] == b[b_lo + y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+        trace.append(v[offset - d:offset + d + 1:2])
+        if abs(n - m) <= d and (n - m - d) % 2 == 0 and v[offset + n - m] >= n:
+            break
     else:
-        print("未找到任何assignment文件夹")
         return None
+    
+    # 从终点回溯，每一步之后的斜线就是一段公共行
+    blocks = []
+    x, y = n, m
+    for d in range(len(trace) - 1, 0, -1):
+        previous = trace[d - 1]
+        k = x - y
+        if k == -d or (k != d and previous[(k - 1 + d - 1) // 2] < previous[(k + 1 + d - 1) // 2]):
+            prev_k = k + 1
+            start_x = previous[(prev_k + d - 1) // 2]
+        else:
+            prev_k = k - 1
+            start_x = previous[(prev_k + d - 1) // 2] + 1
+        start_y = start_x - k
+        if x > start_x:
+            blocks.append((a_lo + start_x, b_lo + start_y, x - start_x))
+        x = previous[(prev_k + d - 1) // 2]
+        y = x - prev_k
+    if x > 0:
+        blocks.append((a_lo, b_lo, x))
+    blocks.reverse()
+    return blocks
 
-def is_valid_subfolder(folder_name):
-    """检查文件夹名称是否符合x_yyy格式"""
-    pattern = re.compile(r'^\d+_\w+$')
-    return bool(pattern.match(folder_name))
+def diff_line_keys(a, b, max_edits=MAX_DIFF_EDITS):
+    """比较两个行键序列，返回与difflib相同格式的操作列表 [(tag, i1, i2, j1, j2)]
 
-def create_zip_package(assignment_folder, student_id):
-    """创建打包文件，包含符合条件的子文件夹中的所有.cpp和.h文件"""
-    if not os.path.exists(assignment_folder):
-        print(f"找不到文件夹: {assignment_folder}")
-        return False
+    先跳过相同的首尾部分，中间部分用Myers算法；编辑距离超过max_edits时，
+    中间部分改为按行号逐行对齐比较（与判题时的比较方式相同）
+    """
+    n, m = len(a), len(b)
+    prefix = 0
+    while prefix < n and prefix < m and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < n - prefix and suffix < m - prefix and a[n - 1 - suffix] == b[m - 1 - suffix]:
+        suffix += 1
+    
+    blocks = [(0, 0, prefix)] if prefix else []
+    middle = _myers_matching_blocks(a, prefix, n - suffix, b, prefix, m - suffix, max_edits)
+    if middle is None:
+        middle = []
+        for i in range(prefix, min(n, m) - suffix):
+            if a[i] != b[i]:
+                continue
+            if middle and middle[-1][0] + middle[-1][2] == i:
+                middle[-1] = (middle[-1][0], middle[-1][1], middle[-1][2] + 1)
+            else:
+                middle.append((i, i, 1))
+    blocks.extend(middle)
+    if suffix:
+        blocks.append((n - suffix, m - suffix, suffix))
+    blocks.append((n, m, 0))
+    
+    opcodes = []
+    i = j = 0
+    for block_i, block_j, size in blocks:
+        if i < block_i and j < block_j:
+            opcodes.append(('replace', i, block_i, j, block_j))
+        elif i < block_i:
+            opcodes.append(('delete', i, block_i, j, j))
+        elif j < block_j:
+            opcodes.append(('insert', i, i, j, block_j))
+        if size:
+            if opcodes and opcodes[-1][0] == 'equal':
+                opcodes[-1] = ('equal', opcodes[-1][1], block_i + size, opcodes[-1][3], block_j + size)
+            else:
+                opcodes.append(('equal', block_i, block_i + size, block_j, block_j + size))
+        i, j = block_i + size, block_j + size
+    return opcodes
+
+class OutputDiff:
+    """用户输出与标准输出的逐行对比
+
+    把两边对齐成显示行：相同和被替换的部分两边逐行对应，多出或缺少的行另一边留空。
+    只按区块记录对齐关系，任意一行的内容通过LineIndex按需读取
+    """
+    def __init__(self, user_lines, std_lines, max_edits=MAX_DIFF_EDITS):
+        self.user_lines = user_lines
+        self.std_lines = std_lines
+        self.opcodes = diff_line_keys(user_lines.keys(), std_lines.keys(), max_edits)
+        self.block_rows = array('q')  # 每个区块第一行的显示行号
+        self.hunk_rows = []  # 每处差异第一行的显示行号
+        row = 0
+        for tag, i1, i2, j1, j2 in self.opcodes:
+            self.block_rows.append(row)
+            if tag != 'equal':
+                self.hunk_rows.append(row)
+            row += max(i2 - i1, j2 - j1)
+        self.row_count = row
+
+    def row(self, row):
+        """显示行对应的 (用户输出行号, 标准输出行号, 是否不同)，某一边没有对应行时为None"""
+        block = bisect.bisect_right(self.block_rows, row) - 1
+        tag, i1, i2, j1, j2 = self.opcodes[block]
+        offset = row - self.block_rows[block]
+        user = i1 + offset if i1 + offset < i2 else None
+        std = j1 + offset if j1 + offset < j2 else None
+        return user, std, tag != 'equal'
+
+    def hunk_at(self, row):
+        """row所在或之前的最后一处差异的序号，前面没有差异时为-1"""
+        return bisect.bisect_right(self.hunk_rows, row) - 1
+
+def format_line_preview(lines, limit=DETAIL_PREVIEW_LINES):
+    """LineIndex的前limit行，超出时附加说明"""
+    text = [lines.line(number) for number in range(min(limit, len(lines)))]
+    if len(lines) > limit:
+        text.append(f"...（共 {len(lines)} 行，仅显示前 {limit} 行）")
+    return "\n".join(text)
+
+def format_output_diff(diff, context=DETAIL_DIFF_CONTEXT, max_rows=DETAIL_DIFF_ROWS):
+    """把差异附近的显示行格式化为两栏对比文本，最多max_rows行"""
+    windows = []
+    for start in diff.hunk_rows:
+        block = bisect.bisect_right(diff.block_rows, start) - 1
+        tag, i1, i2, j1, j2 = diff.opcodes[block]
+        window = [max(0, start - context), min(diff.row_count, start + max(i2 - i1, j2 - j1) + context)]
+        if windows and window[0] <= windows[-1][1]:
+            windows[-1][1] = window[1]
+        else:
+            windows.append(window)
+    
+    lines = [f"{'Your Output':<29} | {'Standard Output':<30}", "-" * 60]
+    shown = 0
+    for number, (start, stop) in enumerate(windows):
+        user, std, _ = diff.row(start)
+        if start > 0 or len(windows) > 1:
+            lines.append(f"@@ 你的输出第 {'-' if user is None else user + 1} 行，"
+                         f"标准输出第 {'-' if std is None else std + 1} 行 @@")
+        end = min(stop, start + max_rows - shown)
+        for row in range(start, end):
+            user, std, changed = diff.row(row)
+            user_text = diff.user_lines.line(user) if user is not None else ""
+            std_text = diff.std_lines.line(std) if std is not None else ""
+            lines.append(f"{user_text:<29} {'≠' if changed else '|'} {std_text:<30}")
+        shown += end - start
+        if shown >= max_rows and (end < stop or number < len(windows) - 1):
+            lines.append(f"...（共 {len(diff.hunk_rows)} 处差异，仅显示前 {max_rows} 行对比）")
+            break
+    lines.append("-" * 60)
+    return "\n".join(lines)
+
+def run_test_case(task_folder, test_case_num, assignment_path, cancel_token=None):
+    """运行单个测试案例并返回详细结果
+
+    返回 (是否通过, 结果, 详细信息, 输入文件, 用户输出文件, 标准输出文件)，没有的文件为None。
+    用户输出保留在test_artifact_path中，供对比窗口读取。cancel_token被取消时抛出JudgeCancelled
+    """
+    # 确保使用绝对路径
+    assignment_path = os.path.abspath(assignment_path)
     
-    # 创建临时目录用于存放要打包的文件
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    temp_dir = os.path.join(current_dir, f"temp_package_{student_id}")
+    # 导入judger_batch模块
+    try:
+        input_name, output_name, exec_name, get_random_filename = load_judger_metadata(assignment_path)
+    except ImportError as e:
+        return False, "导入错误", f"无法导入judger_batch模块: {str(e)}", None, None, None
     
-    # 如果临时目录已存在，先删除
-    if os.path.exists(temp_dir):
-        shutil.rmtree(temp_dir)
+    # 准备文件路径
+    input_dir = os.path.join(assignment_path, 'data', task_folder)
+    standard_dir = os.path.join(assignment_path, 'data', task_folder)
+    source_dir = os.path.join(assignment_path, task_folder)
     
-    os.makedirs(temp_dir)
+    # 检查必要的目录和文件是否存在
+    if not os.path.exists(input_dir):
+        return False, "输入目录不存在", f"找不到输入目录: {input_dir}", None, None, None
+    if not os.path.exists(standard_dir):
+        return False, "标准输出目录不存在", f"找不到标准输出目录: {standard_dir}", None, None, None
+    if not os.path.exists(source_dir):
+        return False, "源代码目录不存在", f"找不到源代码目录: {source_dir}", None, None, None
     
-    valid_subfolders = []
-    total_files_copied = 0
-    all_copied_files = []  # 用于存储所有复制的文件信息
+    main_dir = os.path.join(source_dir, exec_name[task_folder][0])
     
-    # 遍历assignment文件夹中的所有子文件夹
-    for item in os.listdir(assignment_folder):
-        subfolder_path = os.path.join(assignment_folder, item)
-        if os.path.isdir(subfolder_path) and is_valid_subfolder(item):
-            # 检查文件夹中是否有.cpp或.h文件
-            cpp_h_files = []
-            for file in os.listdir(subfolder_path):
-                if file.endswith(".cpp") or file.endswith(".h"):
-                    cpp_h_files.append(file)
-            
-            if cpp_h_files:
-                # 在临时目录中创建对应的子文件夹
-                temp_subfolder = os.path.join(temp_dir, item)
-                os.makedirs(temp_subfolder)
-                
-                # 记录当前文件夹的复制情况
-                folder_files = []
-                
-                # 复制所有.cpp和.h文件到临时目录对应的子文件夹中
-                for file in cpp_h_files:
-                    src_file = os.path.join(subfolder_path, file)
-                    shutil.copy2(src_file, temp_subfolder)
-                    total_files_copied += 1
-                    folder_files.append(file)
-                
-                valid_subfolders.append(item)
-                all_copied_files.append((item, folder_files))
+    # 检查源文件是否存在
+    if not os.path.exists(main_dir):
+        return False, "源文件不存在", f"找不到源文件: {main_dir}", None, None, None
     
-    if not valid_subfolders:
-        print("没有找到符合条件的子文件夹或.cpp/.h文件")
-        shutil.rmtree(temp_dir)
-        return False
+    # 编译代码（源文件未改变时直接使用缓存的可执行文件）
+    compiled, exec_dir, compile_error, _ = binary_cache.get_or_build(main_dir, cancel_token=cancel_token)
     
-    # 打印复制的文件详情
-    print("\n文件复制详情:")
-    for folder, files in all_copied_files:
-        print(f"文件夹 {folder} 中复制了以下文件:")
-        for f in files:
-            print(f"  - {f}")
+    if not compiled:
+        return False, "编译错误", compile_error, None, None, None
     
-    # 创建zip文件（放在assignment文件夹内）
-    zip_filename = os.path.join(assignment_folder, f"{student_id}.zip")
+    # 运行测试案例
+    input_file = os.path.join(input_dir, input_name[test_case_num-1])
+    standard_file = os.path.join(standard_dir, output_name[test_case_num-1])
     
-    with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, _, files in os.walk(temp_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                # 计算相对路径，以便在zip中保持文件夹结构
-                arcname = os.path.relpath(file_path, temp_dir)
-                zipf.write(file_path, arcname)
+    if not os.path.exists(input_file):
+        return False, "输入文件不存在", f"找不到文件: {input_file}", None, None, None
+    if not os.path.exists(standard_file):
+        return False, "标准输出文件不存在", f"找不到文件: {standard_file}", None, None, None
     
-    # 清理临时目录
-    shutil.rmtree(temp_dir)
+    # 先写入临时文件再替换，已打开的对比窗口映射的旧文件不受影响
+    user_output_file = test_artifact_path(assignment_path, task_folder, test_case_num)
+    os.makedirs(os.path.dirname(user_output_file), exist_ok=True)
+    temp_output_file = f"{user_output_file}.{get_random_filename()}.tmp"
+    try:
+        returncode, timed_out, usage = run_program(exec_dir, input_file, output_file=temp_output_file,
+                                                   cancel_token=cancel_token)
+        if cancel_token is not None:
+            cancel_token.check()
+        try:
+            os.replace(temp_output_file, user_output_file)
+        except OSError:
+            # Windows上旧文件仍被对比窗口打开时无法替换，这次的输出留在临时文件中
+            user_output_file = temp_output_file
+    except BaseException:
+        if os.path.exists(temp_output_file):
+            os.remove(temp_output_file)
+        raise
+    evict_test_artifacts(keep=user_output_file)
+    if usage.limit_exceeded == 'output':
+        return False, "输出超限", f"程序输出超过 {resource_limits.output_mb}MB", input_file, None, None
+    if timed_out or usage.limit_exceeded == 'cpu':
+        return False, "超时", "程序运行超时", input_file, None, None
+    if returncode != 0:
+        return False, "运行时错误", format_exit_status(returncode), input_file, None, None
+    
+    # 比较输出
+    diff_msg = compare_output_files(user_output_file, standard_file)
+    
+    if diff_msg is None:
+        return True, "正确", None, input_file, user_output_file, standard_file
+    else:
+        return False, "输出不匹配", diff_msg, input_file, user_output_file, standard_file
+
+def display_test_case_details(success, msg, details, input_file, user_output_file, std_output_file):
+    """显示测试案例的详细信息，返回格式化后的字符串而不是直接打印
+
+    输入和输出只显示前面的部分，输出不同时只显示差异附近的行，完整内容在对比窗口中查看
+    """
+    output_lines = []
     
-    print(f"\n包含以下子文件夹: {', '.join(valid_subfolders)}")
-    print(f"总共打包了 {total_files_copied} 个文件")
-    return zip_filename
+    if not success:
+        output_lines.append(f"错误类型: {msg}")
+        if details:
+            output_lines.append(f"详细信息: {details}")
+        
+        # 添加标准输入
+        if input_file:
+            with LineIndex(input_file, test_data) as input_lines:
+                output_lines.append("\nStandard Input")
+                output_lines.append("-" * 60)  # 使用更长的分隔线
+                output_lines.append(format_line_preview(input_lines))
+                output_lines.append("-" * 60)  # 使用更长的分隔线
+        
+        # 添加用户输出和标准输出中不同的部分
+        if user_output_file and std_output_file:
+            with LineIndex(user_output_file) as user_lines, LineIndex(std_output_file, test_data) as std_lines:
+                output_lines.append(format_output_diff(OutputDiff(user_lines, std_lines)))
+    else:
+        output_lines.append("测试通过！")
+        
+        # 添加标准输入
+        if input_file:
+            with LineIndex(input_file, test_data) as input_lines:
+                output_lines.append("\n标准输入:")
+                output_lines.append("-" * 60)  # 使用更长的分隔线
+                output_lines.append(format_line_preview(input_lines))
+                output_lines.append("-" * 60)  # 使用更长的分隔线
+        
+        # 添加用户输出（正确情况下与标准输出相同）
+        if user_output_file:
+            with LineIndex(user_output_file) as user_lines:
+                output_lines.append("\n输出:")
+                output_lines.append("-" * 60)  # 使用更长的分隔线
+                output_lines.append(format_line_preview(user_lines))
+                output_lines.append("-" * 60)  # 使用更长的分隔线
+    
+    # 返回格式化的字符串
+    return "\n".join(output_lines)
+
+def load_test_point_detail(task_folder, test_case_num, assignment_path, cancel_token=None):
+    """运行测试点并生成详情，返回 (详情文本, 对比窗口使用的文件, run_test_case的结果)，没有用户输出时文件为None"""
+    result = run_test_case(task_folder, test_case_num, assignment_path, cancel_token)
+    return display_test_case_details(*result), test_case_files(result), result
+
+def test_case_files(result):
+    """run_test_case的结果中对比窗口使用的 (输入, 用户输出, 标准输出)，没有用户输出时返回None"""
+    return result[3:] if result[4] and result[5] else None
 
+def _file_stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
 
-# 定义全局样式
-DARK_MODE = True  # 默认使用暗色模式
+class DetailCache:
+    """测试点详情的内存缓存，总大小不超过max_bytes
 
-# 定义颜色方案
-class Colors:
-    # 暗色主题 - 更优雅的深色配色
-    DARK = {
-        'bg_primary': '#1a1d23',       # 主背景色 - 稍微更深一点
-        'bg_secondary': '#242932',     # 次级背景 - 明暗区分更强
-        'bg_tertiary': '#2e333d',      # 三层背景 - 用于卡片、面板底色
+    最近使用的hot_entries条详情保存为字符串，其余用zlib压缩保存，超出预算时淘汰最久没有使用的详情。
+    详情按 (作业路径, 题目, 测试点) 保存，version 为生成详情时的测试点指纹（见test_point_fingerprint），
+    源代码、测试数据或判题设置改变后版本不一致，视为过期。
+
+    被淘汰的详情只保留生成它的run_test_case结果，保留的用户输出没有变化时可以据此重新生成，
+    不需要再运行一次程序。只能在同一个线程中使用。
+    """
+    def __init__(self, max_bytes=DETAIL_CACHE_MB * 1024 * 1024, hot_entries=8, max_recipes=4096):
+        self.max_bytes = max_bytes
+        self.hot_entries = hot_entries
+        self.max_recipes = max_recipes
+        self.size = 0
+        self._entries = OrderedDict()  # key -> [version, 详情（字符串或压缩后的bytes）, 占用字节数, 文件]
+        self._recipes = OrderedDict()  # key -> (version, run_test_case的结果, 用户输出的修改时间和大小)
 
-        'text_primary': '#e6eaf1',     # 主文本 - 更明亮，更易读
-        'text_secondary': '#a1a8b5',   # 次文本 - 稍提亮，更通透
+    def get(self, key, version):
+        """返回 (详情, 对比窗口使用的文件)，没有缓存也无法重新生成时返回None"""
+        if version is None:
+            return None
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self._entries.move_to_end(key)
+            content = entry[1]
+            if isinstance(content, bytes):
+                content = zlib.decompress(content).decode('utf-8')
+                self._store(key, version, content, entry[3])
+            else:
+                self._cool()
+            return content, entry[3]
         
-        'accent': '#4fc3f7',           # 主强调色 - 更亮的蓝色（带点霓虹感）
-        'accent_alt': '#d57bee',       # 第二强调色 - 更偏紫粉，更醒目
+        recipe = self._recipes.get(key)
+        if recipe is None or recipe[0] != version:
+            return None
+        _, result, stamp = recipe
+        files = test_case_files(result)
+        # 用户输出已经被之后的运行覆盖或删除时，只能重新运行
+        if files is None or _file_stamp(files[1]) != stamp \
+                or not all(os.path.isfile(path) for path in (files[0], files[2])):
+            del self._recipes[key]
+            return None
+        content = display_test_case_details(*result)
+        self._store(key, version, content, files)
+        return content, files
 
-        'success': '#89d185',          # 成功提示 - 稍鲜亮
-        'warning': '#efc27b',          # 警告提示 - 提亮对比度
-        'error': '#ef6b73',            # 错误提示 - 更鲜明红
+    def contains(self, key, version):
+        """是否有可以直接使用或重新生成的详情，不检查保留的文件"""
+        return version is not None and any(
+            entry is not None and entry[0] == version for entry in (self._entries.get(key), self._recipes.get(key)))
 
-        'border': '#1c1f26',           # 边框色 - 提高与背景的区分度
-        'highlight': '#454b57',        # 高亮色 - 用于鼠标悬停等
+    def put(self, key, version, content, files=None, result=None):
+        """保存详情，result为生成详情的run_test_case结果，用于淘汰后重新生成"""
+        if version is None:
+            return
+        self._store(key, version, content, files)
+        if result is not None and test_case_files(result) is not None:
+            self._recipes[key] = (version, result, _file_stamp(result[4]))
+            self._recipes.move_to_end(key)
+            while len(self._recipes) > self.max_recipes:
+                self._recipes.popitem(last=False)
+        elif key in self._recipes and self._recipes[key][0] != version:
+            del self._recipes[key]
 
-        'link': '#5fdde5',             # 链接颜色 - 更加活泼灵动
-        'test_pass': '#89d185',        # 测试通过 - 同 success
-        'test_fail': '#ef6b73',        # 测试失败 - 同 error
+    def _store(self, key, version, content, files):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size -= old[2]
+        self._entries[key] = [version, content, sys.getsizeof(content), files]
+        self.size += self._entries[key][2]
+        self._cool()
+        while self.size > self.max_bytes and len(self._entries) > 1:
+            self.size -= self._entries.popitem(last=False)[1][2]
 
-        'scrollbar': '#444b58',        # 滚动条 - 略提亮，更清晰
-        'checkbox': '#2e333d',         # 复选框 - 
+    def _cool(self):
+        # 每次访问最多把一条详情挤出常用范围，只需要压缩这一条
+        if len(self._entries) <= self.hot_entries:
+            return
+        key = next(islice(reversed(self._entries), self.hot_entries, None))
+        entry = self._entries[key]
+        if isinstance(entry[1], str):
+            packed = zlib.compress(entry[1].encode('utf-8'), 1)
+            self.size += sys.getsizeof(packed) - entry[2]
+            entry[1], entry[2] = packed, sys.getsizeof(packed)
 
-        'title_1': '#7bc6ff',  # 稍冷、偏霓虹蓝
-        'title_2': '#c1e192',  # 带点苹果绿 + 青柠感
-        'title_3': '#c89cf0',  # 粉紫中加入一点蓝调，更清爽
+class ProcessUsage:
+    """学生程序的资源使用情况，无法获取的项为None"""
+    def __init__(self, wall_time, cpu_user=None, cpu_sys=None, peak_rss_kb=None, limit_exceeded=None):
+        self.wall_time = wall_time  # 墙钟时间（秒）
+        self.cpu_user = cpu_user  # 用户态CPU时间（秒）
+        self.cpu_sys = cpu_sys  # 系统态CPU时间（秒）
+        self.peak_rss_kb = peak_rss_kb  # 峰值常驻内存（KB）
+        self.limit_exceeded = limit_exceeded  # 程序因超出资源限制被结束时为 'cpu' 或 'output'
 
-        'package_button': '#ffffff'
+    def to_dict(self):
+        return dict(vars(self))
 
-    }
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
 
-    
-    # 浅色主题 - 更柔和的浅色配色
-    LIGHT = {
-        'bg_primary': '#fafafa',
-        'bg_secondary': '#f0f0f0',
-        'bg_tertiary': '#e5e5e5',
-        'text_primary': '#383a42',
-        'text_secondary': '#696c77',
-        'accent': '#4078f2',
-        'accent_alt': '#a626a4',  # 添加第二强调色
-        'success': '#50a14f',
-        'warning': '#c18401',
-        'error': '#e45649',
-        'border': '#d0d0d0',
-        'highlight': '#e6e6e6',
-        'link': '#0184bc',
-        'test_pass': '#50a14f',
-        'test_fail': '#e45649',
-        'scrollbar': '#c1c1c1',
-        'checkbox': '#26a69a',  # 复选框颜色
-        'title_1': '#4ba0ff',   # 清新的淡蓝色，亮度提高，适合主标题
-        'title_2': '#a2d77d',   # 明亮的草绿色，温暖且有层次感
-        'title_3': '#d3a8f9',   # 淡紫色调，柔和但富有活力
-        'package_button': '#333333'
-    }
-    
     @classmethod
-    def current(cls):
-        return cls.DARK if DARK_MODE else cls.LIGHT
-
-# 设置应用字体
-def set_app_fonts(app):
-    # 添加中文字体支持，优先级从高到低
-    chinese_fonts = ["微软雅黑", "Microsoft YaHei", "Source Han Sans CN", "思源黑体", "NotoSansCJK", "WenQuanYi Micro Hei", "文泉驿微米黑", "SimHei", "黑体"]
-    
-    # 现代等宽字体
-    modern_fonts = ["JetBrains Mono", "Cascadia Code", "Fira Code", "Consolas", "Courier New"]
-    
-    # 尝试设置中文字体
-    chosen_chinese_font = None
-    for font_name in chinese_fonts:
-        font = QFont(font_name, 10)
-        if font.exactMatch():
-            chosen_chinese_font = font_name
-            break
-    
-    # 尝试设置现代等宽字体
-    chosen_mono_font = None
-    for font_name in modern_fonts:
-        font = QFont(font_name, 10)
-        if font.exactMatch():
-            chosen_mono_font = font_name
-            break
-    
-    # 如果找不到中文字体，设置默认中文字体
-    if not chosen_chinese_font:
-        chosen_chinese_font = "Sans-serif"
-        
-    # 如果找不到等宽字体，设置默认等宽字体
-    if not chosen_mono_font:
-        chosen_mono_font = "Monospace"
-    
-    # 设置应用的默认字体为中文字体
-    font = QFont(chosen_chinese_font, 10)
-    app.setFont(font)
-    
-    return {"chinese": chosen_chinese_font, "mono": chosen_mono_font}
-
-# 设置应用主题
-def apply_theme(app, dark_mode=True):
-    global DARK_MODE
-    DARK_MODE = dark_mode
-    
-    colors = Colors.current()
-    
-    # 创建调色板
-    palette = QPalette()
-    
-    # 设置基本颜色
-    palette.setColor(QPalette.Window, QColor(colors['bg_primary']))
-    palette.setColor(QPalette.WindowText, QColor(colors['text_primary']))
-    palette.setColor(QPalette.Base, QColor(colors['bg_secondary']))
-    palette.setColor(QPalette.AlternateBase, QColor(colors['bg_tertiary']))
-    palette.setColor(QPalette.ToolTipBase, QColor(colors['bg_tertiary']))
-    palette.setColor(QPalette.ToolTipText, QColor(colors['text_primary']))
-    palette.setColor(QPalette.Text, QColor(colors['text_primary']))
-    palette.setColor(QPalette.Button, QColor(colors['bg_secondary']))
-    palette.setColor(QPalette.ButtonText, QColor(colors['text_primary']))
-    palette.setColor(QPalette.BrightText, QColor(colors['text_primary']))
-    palette.setColor(QPalette.Link, QColor(colors['link']))
-    palette.setColor(QPalette.Highlight, QColor(colors['accent']))
-    palette.setColor(QPalette.HighlightedText, QColor('#ffffff'))
-    
-    # 设置禁用状态的颜色
-    palette.setColor(QPalette.Disabled, QPalette.WindowText, QColor(colors['text_secondary']))
-    palette.setColor(QPalette.Disabled, QPalette.Text, QColor(colors['text_secondary']))
-    palette.setColor(QPalette.Disabled, QPalette.ButtonText, QColor(colors['text_secondary']))
-    
-    # 应用调色板
-    app.setPalette(palette)
-    
-    # 创建全局样式表
-    stylesheet = f"""
-    QMainWindow, QDialog {{
-        background-color: {colors['bg_primary']};
-        color: {colors['text_primary']};
-    }}
-    
-    QTabWidget::pane {{
-        border: 1px solid {colors['border']};
-        background-color: {colors['bg_secondary']};
-        border-radius: 6px;
-    }}
-    
-    QTabBar::tab {{
-        background-color: {colors['bg_tertiary']};
-        color: {colors['text_secondary']};
-        padding: 8px 12px;
-        margin-right: 2px;
-        border-top-left-radius: 6px;
-        border-top-right-radius: 6px;
-    }}
-    
-    QTabBar::tab:selected {{
-        background-color: {colors['bg_secondary']};
-        color: {colors['text_primary']};
-        border-bottom: 2px solid {colors['accent']};
-    }}
-    
-    QTabBar::tab:hover:!selected {{
-        background-color: {colors['highlight']};
-    }}
-    
-    QPushButton {{
-        background-color: {colors['bg_tertiary']};
-        color: {colors['text_primary']};
-        border: none;
-        border-radius: 6px;
-        padding: 8px 16px;
-        min-height: 32px;
-        font-weight: 500;
-    }}
-    
-    QPushButton:hover {{
-        background-color: {colors['highlight']};
-    }}
-    
-    QPushButton:pressed {{
-        background-color: {colors['accent']};
-        color: white;
-    }}
-    
-    QPushButton:disabled {{
-        background-color: {colors['bg_tertiary']};
-        color: {colors['text_secondary']};
-    }}
-    
-    QLineEdit {{
-        background-color: {colors['bg_tertiary']};
-        color: {colors['text_primary']};
-        border: 1px solid {colors['border']};
-        border-radius: 6px;
-        padding: 8px;
-        selection-background-color: {colors['accent']};
-    }}
-    
-    QTextEdit, QTextBrowser {{
-        background-color: {colors['bg_secondary']};
-        color: {colors['text_primary']};
-        border: 1px solid {colors['border']};
-        border-radius: 6px;
-        padding: 8px;
-        selection-background-color: {colors['accent']};
-        selection-color: white;
-    }}
-    
-    QLabel {{
-        color: {colors['text_primary']};
-    }}
-    
-    QTreeWidget {{
-        background-color: {colors['bg_secondary']};
-        alternate-background-color: {colors['bg_tertiary']};
-        color: {colors['text_primary']};
-        border: 1px solid {colors['border']};
-        border-radius: 6px;
-        outline: none;  /* 移除焦点轮廓 */
-    }}
-    
-    QTreeWidget::item {{
-        padding: 6px;
-        border-radius: 4px;
-    }}
-    
-    QTreeWidget::item:selected {{
-        background-color: {colors['accent']};
-        color: white;
-        outline: none;  /* 移除选中项的焦点轮廓 */
-    }}
-    
-    QTreeWidget::item:hover {{
-        background-color: {colors['highlight']};
-    }}
-    
-    /* 明确移除所有焦点轮廓 */
-    QTreeWidget::item:focus {{
-        outline: none;
-    }}
-    
-    QScrollBar:vertical {{
-        background-color: {colors['bg_secondary']};
-        width: 14px;
-        margin: 0px;
-    }}
-    
-    QScrollBar::handle:vertical {{
-        background-color: {colors['scrollbar']};
-        min-height: 20px;
-        border-radius: 7px;
-    }}
-    
-    QScrollBar::handle:vertical:hover {{
-        background-color: {colors['accent']};
-    }}
-    
-    QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical {{
-        height: 0px;
-    }}
-    
-    QScrollBar:horizontal {{
-        background-color: {colors['bg_secondary']};
-        height: 14px;
-        margin: 0px;
-    }}
-    
-    QScrollBar::handle:horizontal {{
-        background-color: {colors['scrollbar']};
-        min-width: 20px;
-        border-radius: 7px;
-    }}
-    
-    QScrollBar::handle:horizontal:hover {{
-        background-color: {colors['accent']};
-    }}
-    
-    QScrollBar::add-line:horizontal, QScrollBar::sub-line:horizontal {{
-        width: 0px;
-    }}
-    
-    QToolButton {{
-        background-color: transparent;
-        border: none;
-        border-radius: 4px;
-        padding: 4px;
-    }}
-    
-    QToolButton:hover {{
-        background-color: {colors['highlight']};
-    }}
-    
-    QCheckBox {{
-        color: {colors['text_primary']};
-        spacing: 8px;
-    }}
-    
-    QCheckBox::indicator {{
-        width: 18px;
-        height: 18px;
-        border-radius: 4px;
-        border: 1px solid {colors['border']};
-        background-color: {colors['bg_tertiary']};
-    }}
-    
-    QCheckBox::indicator:checked {{
-        background-color: {colors['checkbox']};
-        border: 1px solid {colors['checkbox']};
-    }}
-    
-    QCheckBox::indicator:unchecked:hover {{
-        border: 1px solid {colors['checkbox']};
-    }}
-    
-    /* 成功提示样式 */
-    .success {{
-        color: {colors['success']};
-    }}
-    
-    /* 错误提示样式 */
-    .error {{
-        color: {colors['error']};
-    }}
-    
-    /* 警告提示样式 */
-    .warning {{
-        color: {colors['warning']};
-    }}
+    def from_rusage(cls, wall_time, rusage):
+        peak_rss = rusage.ru_maxrss
+        if sys.platform == 'darwin':
+            # macOS上ru_maxrss的单位是字节
+            peak_rss //= 1024
+        return cls(wall_time, rusage.ru_utime, rusage.ru_stime, peak_rss)
+
+    def format(self):
+        """格式化为一行简短的描述"""
+        parts = []
+        if self.cpu_user is not None:
+            parts.append(f"CPU 用户态 {self.cpu_user:.3f}s 系统态 {self.cpu_sys:.3f}s")
+        parts.append(f"墙钟 {self.wall_time:.3f}s")
+        if self.peak_rss_kb is not None:
+            parts.append(f"峰值内存 {self.peak_rss_kb / 1024:.1f}MB")
+        return " | ".join(parts)
+
+class ResourceLimits:
+    """学生程序的资源限制，值为None的项不限制
+
+    在POSIX上通过sh的ulimit设置后再exec学生程序，而不是使用preexec_fn：preexec_fn会让subprocess
+    放弃vfork、完整复制本进程，而且在多线程的进程中并不安全。sh不支持的项会被跳过。
+    输出大小另外在读取管道时检查，Windows上只有这一项有效。
+    processes限制派生的进程数，但setrlimit只能按用户计数，因此实际设置为当前用户已有的进程（线程）数
+    加上processes，只在Linux上设置；以root运行时系统不检查这项限制。
     """
-    
-    app.setStyleSheet(stylesheet)
+    FIELDS = ('cpu_seconds', 'memory_mb', 'output_mb', 'open_files', 'processes')
 
-class StudentIDDialog(QDialog):
-    """学号输入对话框"""
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.setWindowTitle("输入学号")
-        self.resize(400, 150)
-        self.setModal(True)
-        
-        # 创建布局
-        layout = QVBoxLayout()
-        layout.setSpacing(12)
-        layout.setContentsMargins(20, 20, 20, 20)
-        
-        # 添加说明文本
-        info_label = QLabel("请输入您的学号 (12位数字):")
-        info_label.setStyleSheet("font-weight: bold; font-size: 13px;")
-        layout.addWidget(info_label)
-        
-        # 添加学号输入框
-        self.id_input = QLineEdit()
-        self.id_input.setPlaceholderText("例如: 5270********")
-        self.id_input.setMaxLength(12)
-        self.id_input.setFocus()
-        layout.addWidget(self.id_input)
-        
-        # 添加错误提示标签(初始隐藏)
-        self.error_label = QLabel()
-        self.error_label.setStyleSheet(f"color: {Colors.current()['error']};")
-        self.error_label.setVisible(False)
-        layout.addWidget(self.error_label)
-        
-        # 添加格式化显示标签
-        self.formatted_label = QLabel()
-        self.formatted_label.setStyleSheet(f"color: {Colors.current()['accent']}; font-size: 14px;")
-        layout.addWidget(self.formatted_label)
-        
-        # 添加按钮
-        button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
-        button_box.accepted.connect(self.validate_and_accept)
-        button_box.rejected.connect(self.reject)
-        layout.addWidget(button_box)
-        
-        self.setLayout(layout)
-        
-        # 连接信号
-        self.id_input.textChanged.connect(self.update_formatted_display)
-    
-    def update_formatted_display(self):
-        """更新格式化显示"""
-        student_id = self.id_input.text().strip()
-        if len(student_id) == 12 and student_id.isdigit():
-            formatted = format_student_id(student_id)
-            self.formatted_label.setText(f"格式化显示: {formatted}")
-            self.formatted_label.setStyleSheet(f"color: {Colors.current()['success']}; font-size: 14px;")
+    def __init__(self, cpu_seconds=TIME_LIMIT + 1, memory_mb=1024, output_mb=64, open_files=64, processes=32):
+        self.cpu_seconds = cpu_seconds  # CPU时间（秒），超出后程序被SIGXCPU结束
+        self.memory_mb = memory_mb  # 地址空间（MB），超出后内存分配失败
+        self.output_mb = output_mb  # 输出大小（MB），写文件时超出后程序被SIGXFSZ结束
+        self.open_files = open_files  # 同时打开的文件数
+        self.processes = processes  # 可以派生的进程数
+        self._user_tasks = (0.0, 0)  # (统计时间, 当前用户的进程数)
+        self._lock = threading.Lock()
+
+    def update(self, data):
+        """用字典（如设置文件中的"limits"）中的值覆盖当前设置，忽略未知的项"""
+        for name, value in (data or {}).items():
+            if name in self.FIELDS and (value is None or (isinstance(value, (int, float)) and value > 0)):
+                setattr(self, name, value)
+
+    @property
+    def output_bytes(self):
+        return None if self.output_mb is None else int(self.output_mb * 1024 * 1024)
+
+    def _count_user_tasks(self):
+        """当前用户的进程（含线程）数，结果缓存1秒"""
+        with self._lock:
+            checked_at, count = self._user_tasks
+            if time.monotonic() - checked_at < 1.0:
+                return count
+        uid = os.getuid()
+        count = 0
+        for name in os.listdir('/proc'):
+            if name.isdigit():
+                try:
+                    if os.stat(f'/proc/{name}').st_uid == uid:
+                        count += len(os.listdir(f'/proc/{name}/task'))
+                except OSError:
+                    pass
+        with self._lock:
+            self._user_tasks = (time.monotonic(), count)
+        return count
+
+    def rlimits(self):
+        """返回需要给学生程序设置的 [(资源, (软限制, 硬限制))]，不能设置时返回空列表"""
+        if resource is None:
+            return []
+        limits = []
+        if self.cpu_seconds is not None:
+            # 软限制到达时发送SIGXCPU，硬限制再多给1秒后直接SIGKILL
+            cpu = int(math.ceil(self.cpu_seconds))
+            limits.append((resource.RLIMIT_CPU, (cpu, cpu + 1)))
+        if self.memory_mb is not None:
+            limits.append((resource.RLIMIT_AS, (int(self.memory_mb * 1024 * 1024),) * 2))
+        if self.output_mb is not None:
+            limits.append((resource.RLIMIT_FSIZE, (self.output_bytes,) * 2))
+        if self.open_files is not None:
+            limits.append((resource.RLIMIT_NOFILE, (int(self.open_files),) * 2))
+        if self.processes is not None and sys.platform.startswith('linux') and os.getuid() != 0:
+            nproc = self._count_user_tasks() + int(self.processes)
+            limits.append((resource.RLIMIT_NPROC, (nproc, nproc)))
+        
+        # 不能超过本进程当前的硬限制，否则setrlimit会失败
+        result = []
+        for res, (soft, hard) in limits:
+            _, current_hard = resource.getrlimit(res)
+            if current_hard != resource.RLIM_INFINITY:
+                soft, hard = min(soft, current_hard), min(hard, current_hard)
+            result.append((res, (soft, hard)))
+        return result
+
+    def command(self, cmd):
+        """返回先用ulimit设置限制再exec原来程序的命令，不需要设置时原样返回"""
+        script = []
+        for res, (soft, hard) in self.rlimits():
+            options, unit = _ULIMIT_OPTIONS[res]
+            # 先同时设置软硬限制，再单独降低软限制；不同的sh中选项可能不同，依次尝试
+            script.append(" || ".join(f"ulimit {option} {hard // unit} 2>/dev/null" for option in options))
+            if soft != hard:
+                script.append(" || ".join(f"ulimit -S {option} {soft // unit} 2>/dev/null" for option in options))
+        if not script:
+            return cmd
+        script.append('exec "$0" "$@"')
+        return ['/bin/sh', '-c', '; '.join(script)] + list(cmd)
+
+    def describe(self):
+        """一行简短的限制说明"""
+        parts = []
+        if self.cpu_seconds is not None:
+            parts.append(f"CPU {self.cpu_seconds}s")
+        if self.memory_mb is not None:
+            parts.append(f"内存 {self.memory_mb}MB")
+        if self.output_mb is not None:
+            parts.append(f"输出 {self.output_mb}MB")
+        if self.open_files is not None:
+            parts.append(f"文件 {self.open_files}个")
+        if self.processes is not None:
+            parts.append(f"进程 {self.processes}个")
+        return "，".join(parts) or "无"
+
+# 设置各项限制的ulimit选项（bash与dash的进程数选项不同）及其单位（限制值除以单位）
+_ULIMIT_OPTIONS = {} if resource is None else {
+    resource.RLIMIT_CPU: (('-t',), 1),
+    resource.RLIMIT_AS: (('-v',), 1024),
+    resource.RLIMIT_FSIZE: (('-f',), 512),
+    resource.RLIMIT_NOFILE: (('-n',), 1),
+    resource.RLIMIT_NPROC: (('-u', '-p'), 1),
+}
+
+# 全局资源限制，可在设置文件中修改（见load_config之后的代码）
+resource_limits = ResourceLimits()
+
+def format_exit_status(returncode, limits=None):
+    """运行时错误的说明，程序被信号结束时附上信号名"""
+    limits = limits or resource_limits
+    text = f"返回值: {returncode}"
+    if returncode < 0:
+        try:
+            text += f"（{signal.Signals(-returncode).name}）"
+        except ValueError:
+            pass
+        if limits.memory_mb is not None and -returncode in (signal.SIGABRT, signal.SIGSEGV, signal.SIGKILL):
+            text += f"，可能超出内存限制 {limits.memory_mb}MB"
+    return text
+
+def _kill_process(proc):
+    """强制结束子进程及其进程组（不回收，以便之后仍能取得资源统计）"""
+    if proc.returncode is not None:
+        return
+    try:
+        if hasattr(os, 'wait4'):
+            os.killpg(proc.pid, signal.SIGKILL)
         else:
-            self.formatted_label.setText("")
-    
-    def validate_and_accept(self):
-        """验证学号是否有效，有效则接受"""
-        student_id = self.id_input.text().strip()
-        
-        if not is_valid_student_id(student_id):
-            self.error_label.setText("错误: 学号必须是12位数字")
-            self.error_label.setVisible(True)
-            self.id_input.setFocus()
-            return
-        
-        self.accept()
-    
-    def get_student_id(self):
-        """获取输入的学号"""
-        return self.id_input.text().strip()
+            proc.kill()
+    except OSError:
+        pass
 
-class ThemeToggleWidget(QWidget):
-    """主题切换组件"""
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.app = QApplication.instance()
-        
-        layout = QHBoxLayout()
-        layout.setContentsMargins(0, 0, 0, 0)
-        layout.setSpacing(2)
-        
-        # 暗色/浅色模式图标
-        self.theme_toggle = QCheckBox("暗色模式")
-        self.theme_toggle.setChecked(DARK_MODE)
-        self.theme_toggle.setStyleSheet(f"""
-            QCheckBox {{
-                font-size: 14px;
-                font-weight: bold;
-            }}
-            
-            QCheckBox::indicator {{
-                width: 18px;
-                height: 18px;
-                border-radius: 4px;
-                border: 1px solid {Colors.current()['border']};
-                background-color: {Colors.current()['bg_tertiary']};
-            }}
-            
-            QCheckBox::indicator:checked {{
-                background-color: {Colors.current()['checkbox']};
-                border: 1px solid {Colors.current()['checkbox']};
-            }}
-            
-            QCheckBox::indicator:unchecked:hover {{
-                border: 1px solid {Colors.current()['checkbox']};
-            }}
-        """)
-        self.theme_toggle.stateChanged.connect(self.toggle_theme)
-        
-        layout.addWidget(self.theme_toggle)
-        self.setLayout(layout)
-    
-    def toggle_theme(self, state):
-        apply_theme(self.app, state == Qt.Checked)
-        self.theme_toggle.setText("暗色模式" if DARK_MODE else "浅色模式")
-        # 更新复选框样式以匹配新主题
-        self.theme_toggle.setStyleSheet(f"""
-            QCheckBox {{
-                font-size: 14px;
-                font-weight: bold;
-            }}
-            
-            QCheckBox::indicator {{
-                width: 18px;
-                height: 18px;
-                border-radius: 4px;
-                border: 1px solid {Colors.current()['border']};
-                background-color: {Colors.current()['bg_tertiary']};
-            }}
-            
-            QCheckBox::indicator:checked {{
-                background-color: {Colors.current()['checkbox']};
-                border: 1px solid {Colors.current()['checkbox']};
-            }}
-            
-            QCheckBox::indicator:unchecked:hover {{
-                border: 1px solid {Colors.current()['checkbox']};
-            }}
-        """)
-        
-        # 通知主窗口更新树控件样式
-        main_window = self.parent()
-        while main_window and not isinstance(main_window, QMainWindow):
-            main_window = main_window.parent()
-        
-        if main_window and hasattr(main_window, 'update_assignments_tree_style'):
-            main_window.update_assignments_tree_style()
-        
-        # 同样更新任务树样式
-        if main_window and hasattr(main_window, 'task_tree'):
-            task_tree = main_window.task_tree
-            colors = Colors.current()
-            task_tree.setStyleSheet(f"""
-                QTreeWidget {{
-                    background-color: {colors['bg_secondary']};
-                    alternate-background-color: {colors['bg_tertiary']};
-                    color: {colors['text_primary']};
-                    border: 1px solid {colors['border']};
-                    border-radius: 6px;
-                    outline: none;
-                }}
-                
-                QTreeWidget::item {{
-                    padding: 6px;
-                    border-radius: 4px;
-                }}
-                
-                QTreeWidget::item:selected {{
-                    background-color: {colors['accent']};
-                    color: white;
-                }}
-                
-                QTreeWidget::item:hover {{
-                    background-color: {colors['highlight']};
-                }}
-            """)
-
-class LongRunningDialog(QDialog):
-    """长时间运行提示对话框"""
-    def __init__(self, parent=None, task_name=""):
-        super().__init__(parent)
-        self.setWindowTitle("判题时间过长")
-        self.resize(700, 200)
-        self.setModal(True)
-        
-        # 创建布局
-        layout = QVBoxLayout()
-        layout.setSpacing(12)
-        layout.setContentsMargins(20, 20, 20, 20)
-        
-        # 添加说明文本
-        message = "判题时间过长，可能是算法较慢或代码错误。最多等待 20 秒，之后窗口会自动关闭。你也可以提前终止运行。"
-        info_label = QLabel(message)
-        info_label.setStyleSheet("font-size: 22px;")
-        info_label.setWordWrap(True)
-        layout.addWidget(info_label)
-        
-        # 添加当前任务信息
-        task_label = QLabel(f"当前运行: {task_name}")
-        task_label.setStyleSheet(f"color: {Colors.current()['accent']}; font-weight: bold;")
-        layout.addWidget(task_label)
-        
-        # 添加按钮
-        button_box = QHBoxLayout()
-        
-        # 添加间距
-        spacer = QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum)
-        button_box.addItem(spacer)
-        
-        # 直接查看按钮
-        self.view_button = QPushButton("终止")
-        self.view_button.setStyleSheet(f"""
-            background-color: {Colors.current()['accent']};
-            color: white;
-            padding: 8px 16px;
-            font-weight: bold;
-        """)
-        self.view_button.clicked.connect(self.accept)
-        button_box.addWidget(self.view_button)
-        
-        layout.addLayout(button_box)
-        self.setLayout(layout)
-
-class JudgeWorker(QThread):
-    """后台判题工作线程"""
-    # 定义信号
-    finished = pyqtSignal(str, str, float)  # stdout, stderr, 运行时间
-    error = pyqtSignal(Exception)  # 异常
-    
-    def __init__(self, command, cwd, judger_path=None, use_check_all=False, task=None, assignment_path=None):
-        super().__init__()
-        self.command = command
-        self.cwd = cwd
-        self.judger_path = judger_path
-        self.use_check_all = use_check_all
-        self.task = task
-        self.assignment_path = assignment_path
-        
-    def run(self):
-        start_time = time.time()
-        stdout = ""
-        stderr = ""
-        
+def _read_peak_rss_kb(pid):
+    """读取Linux下进程当前的内存峰值（/proc/<pid>/status中的VmHWM，单位KB），无法读取时返回None"""
+    try:
+        with open(f"/proc/{pid}/status", 'rb') as f:
+            for line in f:
+                if line.startswith(b'VmHWM:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+def _wait_process(proc, deadline):
+    """等待子进程结束并回收，超过deadline时强制结束
+
+    返回 (返回值, 是否超时, rusage或None, 运行期间采样到的内存峰值KB或None)
+    """
+    timed_out = False
+    if not hasattr(os, 'wait4'):
+        # Windows上无法取得rusage
         try:
-            original_dir = os.getcwd()
-            # 切换到作业目录
-            os.chdir(self.cwd)
-            
-            if not self.use_check_all:
-                # 直接使用命令行运行
-                result = run_subprocess_no_window(self.command, 
-                                                 capture_output=True, 
-                                                 text=True, 
-                                                 encoding='utf-8')
-                stdout = result.stdout
-                stderr = result.stderr
+            proc.wait(timeout=max(0, deadline - time.monotonic()))
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            proc.kill()
+            proc.wait()
+        return proc.returncode, timed_out, None, None
+    
+    sampled_peak = None
+    delay = 0.0005
+    while True:
+        try:
+            pid, status, rusage = os.wait4(proc.pid, os.WNOHANG)
+        except ChildProcessError:
+            # 已被其他地方回收
+            proc.wait()
+            return proc.returncode, timed_out, None, sampled_peak
+        if pid:
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            return proc.returncode, timed_out, rusage, sampled_peak
+        peak = _read_peak_rss_kb(proc.pid)
+        if peak is not None:
+            sampled_peak = max(sampled_peak or 0, peak)
+        if not timed_out and time.monotonic() >= deadline:
+            timed_out = True
+            _kill_process(proc)
+        time.sleep(delay)
+        delay = min(delay * 2, 0.005)
+
+def run_program(exec_path, input_file, output_file=None, on_output=None, timeout=TIME_LIMIT, cancel_token=None,
+                limits=None):
+    """运行学生程序，返回 (返回值, 是否超时, ProcessUsage)
+
+    指定output_file时程序输出写入该文件；否则通过管道读取，每读到一块就调用on_output(chunk)，
+    on_output返回False时立即终止程序。cancel_token被取消时程序会被结束。
+    limits为资源限制（默认为全局的resource_limits），因超出限制被结束时记录在usage.limit_exceeded中。
+    """
+    limits = limits or resource_limits
+    output_limit = limits.output_bytes
+    cmd = limits.command([exec_path])
+    output_exceeded = False
+    with _process_slots:
+        start = time.monotonic()
+        deadline = start + timeout
+        with open(input_file, 'rb') as fin:
+            if output_file is not None:
+                with open(output_file, 'wb') as fout:
+                    proc = popen_no_window(cmd, stdin=fin, stdout=fout, stderr=subprocess.DEVNULL)
             else:
-                # 使用check_all_assignments函数运行测试
-                # 保存标准输出以便捕获
-                original_stdout = sys.stdout
-                from io import StringIO
-                captured_output = StringIO()
-                sys.stdout = captured_output
-                
-                # 调用check_all_assignments
-                check_all_assignments([self.task], self.assignment_path)
-                
-                # 恢复标准输出
-                sys.stdout = original_stdout
-                stdout = captured_output.getvalue()
-            
-            # 恢复原始目录
-            os.chdir(original_dir)
-            
-            # 计算运行时间
-            elapsed_time = time.time() - start_time
+                proc = popen_no_window(cmd, stdin=fin, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        # 子进程从本进程派生，ru_maxrss不会低于派生时本进程的内存占用；
+        # 在派生之后读取，避免其他判题线程在此期间推高本进程的内存峰值
+        baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+        if cancel_token is not None:
+            cancel_token.register(proc)
+        
+        reader = None
+        if output_file is None:
+            def pump_output():
+                # 在单独的线程中读取输出，主线程负责计时
+                nonlocal output_exceeded
+                total = 0
+                with proc.stdout:
+                    while True:
+                        chunk = proc.stdout.read1(64 * 1024)
+                        if not chunk:
+                            break
+                        total += len(chunk)
+                        if output_limit is not None and total > output_limit:
+                            output_exceeded = True
+                            _kill_process(proc)
+                            break
+                        if not on_output(chunk):
+                            _kill_process(proc)
+                            break
             
-            # 发送完成信号
-            self.finished.emit(stdout, stderr, elapsed_time)
-            
-        except Exception as e:
-            # 确保恢复工作目录
-            if 'original_dir' in locals():
-                os.chdir(original_dir)
-            # 发送错误信号
-            self.error.emit(e)
+            reader = threading.Thread(target=pump_output, daemon=True)
+            reader.start()
+        
+        returncode, timed_out, rusage, sampled_peak = _wait_process(proc, deadline)
+        wall_time = time.monotonic() - start
+        if cancel_token is not None:
+            cancel_token.unregister(proc)
+        if reader is not None:
+            reader.join()
+    
+    if rusage is None:
+        usage = ProcessUsage(wall_time)
+    else:
+        usage = ProcessUsage.from_rusage(wall_time, rusage)
+        if baseline_rss is not None and rusage.ru_maxrss <= baseline_rss:
+            # ru_maxrss只反映了派生时继承的内存峰值，改用运行期间的采样结果
+            usage.peak_rss_kb = sampled_peak
+        elif sampled_peak is not None:
+            usage.peak_rss_kb = max(usage.peak_rss_kb, sampled_peak)
+    
+    # 判断程序是否因超出资源限制而被结束
+    if output_exceeded or (hasattr(signal, 'SIGXFSZ') and returncode == -signal.SIGXFSZ):
+        usage.limit_exceeded = 'output'
+    elif hasattr(signal, 'SIGXCPU') and (returncode == -signal.SIGXCPU or (
+            returncode == -signal.SIGKILL and limits.cpu_seconds is not None and usage.cpu_user is not None
+            and usage.cpu_user + usage.cpu_sys >= limits.cpu_seconds)):
+        usage.limit_exceeded = 'cpu'
+    return returncode, timed_out, usage
+
+class PointResult:
+    """单个测试点的判题结果"""
+    def __init__(self, index, verdict, score, message=None, usage=None):
+        self.index = index  # 测试点编号（从1开始）
+        self.verdict = verdict  # 结果描述，如"正确"、"输出不匹配"
+        self.score = score
+        self.message = message  # 详细信息
+        self.usage = usage  # ProcessUsage，程序未运行时为None
+        self.cached = False  # 是否为增量判题时复用的上次结果
+
+    def to_dict(self):
+        return {
+            'index': self.index,
+            'verdict': self.verdict,
+            'score': self.score,
+            'message': self.message,
+            'usage': self.usage.to_dict() if self.usage is not None else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        usage = ProcessUsage.from_dict(data['usage']) if data.get('usage') else None
+        return cls(data['index'], data['verdict'], data['score'], data.get('message'), usage)
+
+    @property
+    def passed(self):
+        return self.score == FULL_SCORE
+
+class TaskResult:
+    """一道题目的判题结果"""
+    def __init__(self, task):
+        self.task = task
+        self.compiled = False
+        self.compile_error = None
+        self.compile_cached = False
+        self.compile_time = 0.0  # 编译（或读取编译缓存）耗时（秒）
+        self.points = []  # PointResult列表，按测试点编号排序
+        self.source_key = None  # 源文件（含依赖的头文件）对应的编译缓存键
+
+    @property
+    def all_passed(self):
+        return self.compiled and bool(self.points) and all(point.passed for point in self.points)
+
+# 判题事件
+# 判题过程以事件字典的形式通知调用方，每个事件都有 'event' 和 'task' 两个字段：
+#   task_started     开始判题，附带 total（测试点总数，未知时为None）
+#   compile_started  开始编译
+#   compile_finished 编译结束，附带 ok, cached, time, error
+#   point_started    测试点开始运行，附带 index
+#   point_finished   测试点结束，附带 index, verdict, score, message, usage, cached
+#   task_finished    题目判题结束，附带 compiled, score, full_score, passed
+# 事件可以用encode_event编码为一行json，用EventStreamParser增量解析。
+EVENT_TASK_STARTED = 'task_started'
+EVENT_COMPILE_STARTED = 'compile_started'
+EVENT_COMPILE_FINISHED = 'compile_finished'
+EVENT_POINT_STARTED = 'point_started'
+EVENT_POINT_FINISHED = 'point_finished'
+EVENT_TASK_FINISHED = 'task_finished'
 
-class MainWindow(QMainWindow):
+def make_event(kind, task, **fields):
+    return dict(event=kind, task=task, **fields)
+
+def point_finished_event(task, point):
+    return make_event(EVENT_POINT_FINISHED, task, index=point.index, verdict=point.verdict, score=point.score,
+                      message=point.message, usage=point.usage.to_dict() if point.usage is not None else None,
+                      cached=point.cached)
+
+def task_finished_event(task_result):
+    score = sum(point.score for point in task_result.points)
+    return make_event(EVENT_TASK_FINISHED, task_result.task, compiled=task_result.compiled, score=score,
+                      full_score=FULL_SCORE * len(task_result.points), passed=task_result.all_passed)
+
+def encode_event(event):
+    """将事件编码为一行json（带换行符）"""
+    return json.dumps(event, ensure_ascii=False) + "\n"
+
+class EventStreamParser:
+    """增量解析每行一个json的事件流，feed可以传入任意切分的文本片段"""
     def __init__(self):
-        super().__init__()
-        
-        # 设置窗口标题和大小
-        self.setWindowTitle("CodeSentry")
-        self.setWindowIcon(QIcon("arrow.ico"))  # 设置窗口图标
-        self.resize(1500, 800)  # 增加窗口宽度
-        
-        # 全局变量
-        self.current_assignment = None
-        self.current_task = None
-        self.test_point_details = {}  # 存储测试点详情的字典
-        self.full_result_text = ""  # 存储完整的测试结果文本
-        self.fonts = None  # 存储字体信息
-        self.timer = None  # 用于长时间运行检测
-        self.original_title = "CodeSentry"  # 保存原始窗口标题
-        self.judge_worker = None  # 判题工作线程
-        self.long_running_dialog = None  # 长时间运行对话框
-        self.is_judging = False  # 是否正在判题
-        
-        # 尝试切换到脚本或可执行文件所在目录
+        self._pending = ""
+
+    def feed(self, text):
+        """返回本次片段中完整行对应的事件列表，无法解析的行会被忽略"""
+        lines = (self._pending + text).split("\n")
+        self._pending = lines.pop()
+        return [event for event in map(self._parse_line, lines) if event is not None]
+
+    def finish(self):
+        line, self._pending = self._pending, ""
+        event = self._parse_line(line)
+        return [event] if event is not None else []
+
+    @staticmethod
+    def _parse_line(line):
+        line = line.strip()
+        if not line:
+            return None
         try:
-            if getattr(sys, 'frozen', False):  # 如果是EXE运行
-                script_dir = os.path.dirname(os.path.abspath(sys.executable))
-            else:  # Python运行时
-                script_dir = os.path.dirname(os.path.abspath(__file__))
-            
-            print(f"MainWindow中获取的脚本目录: {script_dir}")
-            
-            # 切换到脚本目录
-            current_dir = os.getcwd()
-            print(f"切换目录前的当前目录: {current_dir}")
-            
-            if current_dir != script_dir:
-                os.chdir(script_dir)
-                print(f"已切换到脚本目录: {os.getcwd()}")
+            event = json.loads(line)
+        except ValueError:
+            return None
+        return event if isinstance(event, dict) and 'event' in event else None
+
+class EventBatcher:
+    """将判题事件攒成批次后再交给emit_batch，两次调用之间至少间隔interval秒
+
+    第一个事件会立即发出，之后的事件在间隔时间到达时一并发出，用于限制界面的刷新频率。
+    add可以在任意线程中调用，emit_batch会在调用add的线程或定时器线程中被调用。
+    """
+    def __init__(self, emit_batch, interval=0.1):
+        self.emit_batch = emit_batch
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pending = []
+        self._timer = None
+        self._last_flush = 0.0
+
+    def add(self, event):
+        with self._lock:
+            self._pending.append(event)
+            if self._timer is not None:
+                return
+            wait = self._last_flush + self.interval - time.monotonic()
+            if wait > 0:
+                self._timer = threading.Timer(wait, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+                return
+        self.flush()
+
+    def flush(self):
+        """立即发出所有待发送的事件"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            batch, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+        if batch:
+            self.emit_batch(batch)
+
+# judger_batch.py输出中的标记，同一行中可能出现多个
+_LEGACY_MARKER_PATTERN = re.compile(r'\[TEST POINT (\d+)\]|\[SCORE\] (\d+)|\[COMPILE ERROR\]')
+
+class LegacyOutputParser:
+    """将judger_batch.py风格的文本输出增量转换为判题事件
+
+    "[TEST POINT n] ..."转换为point_started，之后的"[SCORE] s"转换为point_finished，
+    两者之间的文本作为message；"[COMPILE ERROR]"转换为失败的compile_finished。
+    """
+    def __init__(self, task):
+        self.task = task
+        self._pending = ""
+        self._index = None  # 当前测试点编号
+        self._verdict = ""
+        self._message = []
+        self._compile_error = None  # 编译错误信息行，None表示没有编译错误
+        self._scores = []
+        self._started = False
+
+    def _start(self, events):
+        if not self._started:
+            self._started = True
+            events.append(make_event(EVENT_TASK_STARTED, self.task, total=None))
+
+    def feed(self, text):
+        """返回本次片段中完整行对应的事件列表"""
+        lines = (self._pending + text).split("\n")
+        self._pending = lines.pop()
+        events = []
+        self._start(events)
+        for line in lines:
+            self._parse_line(line, events)
+        return events
+
+    def finish(self):
+        """输出结束，返回剩余的事件（包括task_finished）"""
+        events = []
+        self._start(events)
+        line, self._pending = self._pending, ""
+        if line:
+            self._parse_line(line, events)
+        if self._compile_error is not None:
+            events.append(make_event(EVENT_COMPILE_FINISHED, self.task, ok=False, cached=False, time=None,
+                                     error="\n".join(self._compile_error).strip() or None))
+        compiled = self._compile_error is None
+        events.append(make_event(EVENT_TASK_FINISHED, self.task, compiled=compiled, score=sum(self._scores),
+                                 full_score=FULL_SCORE * len(self._scores),
+                                 passed=compiled and bool(self._scores) and all(score == FULL_SCORE for score in self._scores)))
+        return events
+
+    def _parse_line(self, line, events):
+        position = 0
+        target = 'message'  # 标记之后的文本属于结果描述还是详细信息
+        for match in _LEGACY_MARKER_PATTERN.finditer(line):
+            self._add_text(line[position:match.start()], target)
+            position = match.end()
+            target = 'message'
+            if match.group(1) is not None:
+                self._index = int(match.group(1))
+                self._verdict = ""
+                self._message = []
+                target = 'verdict'
+                events.append(make_event(EVENT_POINT_STARTED, self.task, index=self._index))
+            elif match.group(2) is not None:
+                score = int(match.group(2))
+                self._scores.append(score)
+                if self._index is not None:
+                    events.append(make_event(EVENT_POINT_FINISHED, self.task, index=self._index,
+                                             verdict=self._verdict, score=score,
+                                             message="\n".join(self._message).strip() or None,
+                                             usage=None, cached=False))
+                self._index = None
             else:
-                print("当前目录已经是脚本目录，无需切换")
-            
-            print(f"当前目录内容: {os.listdir()}")
-        except Exception as e:
-            error_msg = f"切换目录时出错: {str(e)}"
-            print(error_msg)
-            traceback.print_exc()
-            QMessageBox.critical(None, "错误", error_msg)
-        
-        # 获取所有作业文件夹
-        self.assignment_folders = get_all_assignment_folders()
-        print(f"MainWindow中获取的作业文件夹列表: {self.assignment_folders}")
-        
-        # 如果没有找到作业文件夹，尝试通过绝对路径查找
-        if not self.assignment_folders:
-            print("未通过常规方法找到作业文件夹，尝试备选方法...")
-            try:
-                # 检查与可执行文件相同目录下的特定文件夹
-                if getattr(sys, 'frozen', False):  # 如果是EXE运行
-                    base_dir = os.path.dirname(os.path.abspath(sys.executable))
-                else:
-                    base_dir = os.path.dirname(os.path.abspath(__file__))
-                
-                print(f"检查基础目录: {base_dir}")
-                # 手动检查目录中的文件夹
-                for item in os.listdir(base_dir):
-                    item_path = os.path.join(base_dir, item)
-                    if os.path.isdir(item_path):
-                        if item.startswith('assignment') or item.startswith('challenge'):
-                            print(f"手动找到作业文件夹: {item}")
-                            # 将文件夹添加到列表
-                            self.assignment_folders.append(item)
-                
-                # 对文件夹列表排序
-                if self.assignment_folders:
-                    def sort_key(folder):
-                        match = re.search(r'(\d+)', folder)
-                        if match:
-                            number = int(match.group(1))
-                        else:
-                            number = 0
-                        
-                        # assignment优先，然后按数字排序
-                        if folder.startswith('assignment'):
-                            return (0, number)
-                        else:
-                            return (1, number)
-                    
-                    self.assignment_folders.sort(key=sort_key)
-                    print(f"通过备选方法找到作业文件夹: {self.assignment_folders}")
-            except Exception as e:
-                print(f"备选方法查找作业文件夹出错: {str(e)}")
-                traceback.print_exc()
-        
-        # 创建中央部件
-        central_widget = QWidget()
-        
-        # 创建主布局
-        main_layout = QHBoxLayout()
-        main_layout.setSpacing(15)
-        main_layout.setContentsMargins(15, 15, 15, 15)
-        
-        # 创建左侧面板
-        left_panel = QWidget()
-        left_layout = QVBoxLayout()
-        left_layout.setSpacing(15)
-        left_layout.setContentsMargins(0, 0, 0, 0)
-        
-        # 主题切换组件
-        self.theme_toggle = ThemeToggleWidget()
-        left_layout.addWidget(self.theme_toggle)
-        
-        # 添加分割线
-        separator = QFrame()
-        separator.setFrameShape(QFrame.HLine)
-        separator.setFrameShadow(QFrame.Sunken)
-        left_layout.addWidget(separator)
-        
-        # 作业列表
-        assignments_label = QLabel("Folders")
-        assignments_label.setStyleSheet("""
-            QLabel {
-                font-weight: bold;
-                color: #a5e6dc;
-                font-size: 24px;
-                margin-bottom: 2px;
-                font-family: 'JetBrains Mono', 'Fira Code', 'Source Code Pro', monospace;
-            }
-        """)
-        left_layout.addWidget(assignments_label)
-        
-        # 创建作业按钮区域
-        if self.assignment_folders:
-            # 使用树形控件代替按钮列表，以获得更紧凑的布局
-            self.assignments_tree = QTreeWidget()
-            self.assignments_tree.setHeaderHidden(True)
-            self.assignments_tree.setAlternatingRowColors(True)
-            self.assignments_tree.setAnimated(True)
-            
-            # 设置更紧凑的样式 - 这里只设置初始样式，后续会在主题切换时更新
-            self.update_assignments_tree_style()
-            
-            # 添加作业文件夹到树控件
-            for folder in self.assignment_folders:
-                item = QTreeWidgetItem([folder])
-                self.assignments_tree.addTopLevelItem(item)
-            
-            # 连接点击事件
-            self.assignments_tree.itemClicked.connect(lambda item: self.update_task_list(item.text(0)))
-            
-            # 添加到布局中，并设置适当的高度
-            left_layout.addWidget(self.assignments_tree)
-            self.assignments_tree.setFixedHeight(150)
+                self._compile_error = []
+        self._add_text(line[position:], target)
+
+    def _add_text(self, text, target):
+        if self._index is not None:
+            if target == 'verdict':
+                self._verdict += text.strip()
+            else:
+                self._message.append(text.rstrip())
+        elif self._compile_error is not None:
+            self._compile_error.append(text.rstrip())
+
+class TaskEventSummary:
+    """汇总一道题目的判题事件，供界面和批量检查使用"""
+    def __init__(self, task=None):
+        self.task = task
+        self.compiled = None  # 是否编译成功，未收到编译事件时为None
+        self.compile_error = None
+        self.total = None  # 测试点总数，未知时为None
+        self.compiling = False
+        self.points = {}  # 测试点编号 -> point_finished事件
+        self.running = set()  # 正在运行的测试点编号
+        self.finished = None  # task_finished事件
+
+    def apply(self, event):
+        kind = event.get('event')
+        if kind == EVENT_TASK_STARTED:
+            self.total = event.get('total')
+        elif kind == EVENT_COMPILE_STARTED:
+            self.compiling = True
+        elif kind == EVENT_COMPILE_FINISHED:
+            self.compiling = False
+            self.compiled = event['ok']
+            self.compile_error = event.get('error')
+        elif kind == EVENT_POINT_STARTED:
+            self.running.add(event['index'])
+        elif kind == EVENT_POINT_FINISHED:
+            self.running.discard(event['index'])
+            self.points[event['index']] = event
+        elif kind == EVENT_TASK_FINISHED:
+            self.finished = event
+            self.compiled = event['compiled']
+
+    @classmethod
+    def from_legacy_output(cls, task, text):
+        """从judger_batch.py风格的文本输出构建汇总"""
+        summary = cls(task)
+        parser = LegacyOutputParser(task)
+        for event in parser.feed(text) + parser.finish():
+            summary.apply(event)
+        return summary
+
+    @property
+    def passed(self):
+        if self.finished is not None:
+            return self.finished['passed']
+        return self.compiled is not False and bool(self.points) and not self.failed_points()
+
+    def failed_points(self):
+        """未得满分的测试点编号列表（按编号排序）"""
+        return sorted(index for index, event in self.points.items() if event['score'] != FULL_SCORE)
+
+def list_test_points(task_folder, assignment_path, input_name, output_name):
+    """列出题目的所有测试点，返回 [(测试点编号, 输入文件, 标准输出文件)]"""
+    return test_data.points(task_folder, assignment_path, input_name, output_name)
+
+# 监视文件变化时关心的源文件扩展名
+WATCHED_SOURCE_EXTENSIONS = ('.cpp', '.h', '.hpp')
+
+def task_input_signature(task_folder, assignment_path):
+    """题目源文件和测试数据的快照 ((路径, 修改时间, 大小), ...)，用于判断文件是否真的发生了变化
+
+    测试数据只包含judger_batch.py中列出的输入输出文件，读取不到测试数据表时包含data目录下的所有文件
+    """
+    source_dir = os.path.join(assignment_path, task_folder)
+    data_dir = os.path.join(assignment_path, 'data', task_folder)
+    try:
+        input_name, output_name, _, _ = load_judger_metadata(assignment_path)
+        data_names = set(input_name) | set(output_name)
+    except ImportError:
+        data_names = None
+    
+    paths = []
+    if os.path.isdir(source_dir):
+        paths += [os.path.join(source_dir, name) for name in os.listdir(source_dir)
+                  if name.endswith(WATCHED_SOURCE_EXTENSIONS)]
+    if os.path.isdir(data_dir):
+        paths += [os.path.join(data_dir, name) for name in os.listdir(data_dir)
+                  if data_names is None or name in data_names]
+    
+    signature = []
+    for path in sorted(paths):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if os.path.isfile(path):
+            signature.append((path, st.st_mtime_ns, st.st_size))
+    return tuple(signature)
+
+def run_test_point(exec_path, index, input_file, standard_file, workdir, streaming=True, cancel_token=None):
+    """运行单个测试点并给出评分
+
+    streaming为True时，程序输出通过管道直接与标准输出比较，不写临时文件，
+    输出偏离标准输出过多时立即终止程序；否则先写入workdir中的文件再比较。
+    """
+    if not os.path.exists(standard_file):
+        return PointResult(index, "标准输出文件不存在", 0, f"找不到文件: {standard_file}")
+    
+    with test_data.open(standard_file) as standard_mapped:
+        if streaming:
+            comparator = StreamComparator(standard_mapped.data)
+            returncode, timed_out, usage = run_program(exec_path, input_file, on_output=comparator.feed,
+                                                       cancel_token=cancel_token)
+            if comparator.diverged:
+                return PointResult(index, "输出不匹配", 0, comparator.finish(), usage)
         else:
-            no_assignment_label = QLabel("未找到作业文件夹")
-            no_assignment_label.setStyleSheet(f"color: {Colors.current()['error']};")
-            left_layout.addWidget(no_assignment_label)
-            # 显示错误消息框
-            QMessageBox.warning(None, "警告", "未找到作业文件夹，请确保程序位于正确目录！")
-        
-        # 添加分割线
-        separator2 = QFrame()
-        separator2.setFrameShape(QFrame.HLine)
-        separator2.setFrameShadow(QFrame.Sunken)
-        left_layout.addWidget(separator2)
-        
-        # 题目列表
-        tasks_label = QLabel("Questions")
-        tasks_label.setStyleSheet(f"font-weight: bold; color: {Colors.current()['title_2']}; font-size: 24px; margin-bottom: 2px; font-family: 'JetBrains Mono', 'Fira Code', 'Source Code Pro', monospace;")
-        left_layout.addWidget(tasks_label)
-        
-        # 创建题目列表部件
-        self.task_tree = QTreeWidget()
-        self.task_tree.setHeaderHidden(True)
-        self.task_tree.setAlternatingRowColors(True)
-        self.task_tree.itemClicked.connect(self.on_task_clicked)
-        self.task_tree.setAnimated(True)
-        left_layout.addWidget(self.task_tree)
-        
-        # 添加垂直空白区域，使"一键打包"按钮位于底部
-        vertical_spacer = QSpacerItem(20, 40, QSizePolicy.Minimum, QSizePolicy.Expanding)
-        left_layout.addItem(vertical_spacer)
-        
-        # 添加分割线
-        separator3 = QFrame()
-        separator3.setFrameShape(QFrame.HLine)
-        separator3.setFrameShadow(QFrame.Sunken)
-        left_layout.addWidget(separator3)
-        
-        # 添加一键打包按钮
-        self.package_button = QPushButton("Package")
-        self.package_button.setStyleSheet(f"""
-            QPushButton {{
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #7bc6ff, stop:1 #c1e192);
-                color: white;
-                font-weight: normal;
-                padding: 12px;
-                border-radius: 6px;
-                min-height: 45px;
-                font-size: 30px;
-                border: none;
-                font-family: 'JetBrains Mono', 'Fira Code', 'Source Code Pro', 'Cascadia Code', monospace;
-            }}
-            
-            QPushButton:hover {{
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #4fc79b, stop:1 #52f6c9);
-            }}
-            
-            QPushButton:pressed {{
-                background: qlineargradient(x1:0, y1:0, x2:1, y2:0, stop:0 #2fa67b, stop:1 #32d6a9);
-            }}
-        """)
-        self.package_button.clicked.connect(self.on_package_button_clicked)
-        left_layout.addWidget(self.package_button)
-        
-        # 设置左侧面板
-        left_panel.setLayout(left_layout)
-        left_panel.setFixedWidth(250)  # 稍微减小左侧面板宽度，为右侧腾出空间
-        
-        # 创建右侧面板
-        right_panel = QWidget()
-        right_layout = QVBoxLayout()
-        right_layout.setSpacing(10)
-        right_layout.setContentsMargins(0, 0, 0, 0)
-        
-        # 结果标题
-        results_header = QWidget()
-        results_header_layout = QHBoxLayout()
-        results_header_layout.setContentsMargins(0, 0, 0, 10)
-        
-        results_label = QLabel("Result")
-        results_label.setStyleSheet(f"font-weight: bold; color: {Colors.current()['title_3']}; font-size: 30px; margin-bottom: 0px; font-family: 'JetBrains Mono', 'Fira Code', 'Source Code Pro', monospace;")
-        results_header_layout.addWidget(results_label)
-        
-        results_header_layout.addStretch()
-        
-        results_header.setLayout(results_header_layout)
-        right_layout.addWidget(results_header)
-        
-        # 结果显示区域
-        self.result_text = QTextBrowser()
-        self.result_text.setOpenExternalLinks(False)  # 不打开外部链接
-        self.result_text.setReadOnly(True)
-        
-        # 设置等宽字体，确保分隔线能正确对齐显示
-        chosen_font = None
-        modern_fonts = ["JetBrains Mono", "Cascadia Code", "Fira Code", "Consolas", "Courier New"]
-        for font_name in modern_fonts:
-            font = QFont(font_name, 10)
-            if font.exactMatch():
-                chosen_font = font_name
-                break
-        
-        if not chosen_font:
-            chosen_font = "Monospace"
-            font = QFont(chosen_font, 10)
-            font.setStyleHint(QFont.Monospace)
-        
-        self.result_text.setFont(font)
-	
-        # 确保链接可点击
-        self.result_text.setTextInteractionFlags(
-            Qt.TextSelectableByMouse | Qt.TextSelectableByKeyboard | Qt.LinksAccessibleByMouse
-        )
-        self.result_text.anchorClicked.connect(self.on_test_point_link_clicked)
-        right_layout.addWidget(self.result_text)
-        
-        # 设置右侧面板
-        right_panel.setLayout(right_layout)
-        right_panel.setMinimumWidth(1200)  # 设置右侧面板最小宽度，确保能显示长分隔线
-        
-        # 添加面板到主布局
-        main_layout.addWidget(left_panel)
-        main_layout.addWidget(right_panel)
-        
-        # 设置中央部件的布局
-        central_widget.setLayout(main_layout)
-        self.setCentralWidget(central_widget)
-        
-        # 添加初始提示
-        colors = Colors.current()
-        welcome_html = f"""
-        <div style="text-align: center; margin-top: 100px;">
-            <h2 style="color: {colors['accent']};">欢迎使用代码检查系统</h2>
-            <p style="font-size: 14px; margin-bottom: 30px;">请从左侧选择一个作业文件夹开始</p>
-            <div style="color: {colors['text_secondary']}; font-size: 12px;">
-                <p>• 选择作业文件夹后，可以在左侧题目列表中选择题目进行测试</p>
-                <p>• 测试结果会显示在此区域</p>
-                <p>• 点击"查看测试点详情"可以展开或收起详细信息</p>
-                <p>• 使用底部的"一键打包"按钮可以快速打包作业文件</p>
-            </div>
-        </div>
-        """
-        self.result_text.setHtml(welcome_html)
-        
-        # 如果找到了作业文件夹，自动更新题目列表
-        if self.assignment_folders:
-            # 使用最新的作业文件夹
-            latest_folder = get_latest_assignment_folder()
-            if latest_folder:
-                self.update_task_list(latest_folder)
-    
-    def update_task_list(self, assignment_path):
-        """更新题目列表"""
-        # 确保使用绝对路径
-        self.current_assignment = os.path.abspath(assignment_path)
-        self.task_tree.clear()
-        
-        # 更新窗口标题
-        self.setWindowTitle(f"CodeSentry - {assignment_path}")
-        
-        # 切换到作业目录
-        original_dir = os.getcwd()
-        os.chdir(self.current_assignment)
-        
-        # 获取该作业下的所有题目文件夹
-        folders = get_folders_by_pattern()
-        
-        # 添加题目到树形部件
-        for folder in sorted(folders):
-            item = QTreeWidgetItem([folder])
-            self.task_tree.addTopLevelItem(item)
-        
-        # 恢复原始目录
-        os.chdir(original_dir)
-        
-        # 清空结果文本
-        self.result_text.clear()
-        self.result_text.append(f"<span style='color:#666;'>已选择作业文件夹: {assignment_path}</span>")
-        self.result_text.append("<span style='color:#666;'>请在左侧选择一个题目进行测试</span>")
-    
-    def on_task_clicked(self, item, column):
-        """当题目被点击时"""
-        self.current_task = item.text(0)
-        self.run_task(self.current_task)
-    
-    def on_test_point_link_clicked(self, url):
-        """当测试点链接被点击时"""
+            user_output_file = os.path.join(workdir, f"{index}.out")
+            returncode, timed_out, usage = run_program(exec_path, input_file, output_file=user_output_file,
+                                                       cancel_token=cancel_token)
+        
+        if usage.limit_exceeded == 'output':
+            return PointResult(index, "输出超限", 0, f"程序输出超过 {resource_limits.output_mb}MB", usage)
+        if timed_out or usage.limit_exceeded == 'cpu':
+            return PointResult(index, "超时", 0, "程序运行超时", usage)
+        if returncode != 0:
+            return PointResult(index, "运行时错误", 0, format_exit_status(returncode), usage)
+        
+        if streaming:
+            diff_msg = comparator.finish()
+        else:
+            with MappedFile(user_output_file) as user_mapped:
+                diff_msg = compare_output_buffers(user_mapped.data, standard_mapped.data)
+    if diff_msg is None:
+        return PointResult(index, "正确", FULL_SCORE, usage=usage)
+    return PointResult(index, "输出不匹配", 0, diff_msg, usage)
+
+# 文件内容哈希缓存: 路径 -> (修改时间, 大小, sha256)
+_file_hashes = {}
+_file_hashes_lock = threading.Lock()
+
+def hash_file_cached(path):
+    """计算文件的sha256，文件的修改时间和大小不变时直接返回上次的结果"""
+    st = os.stat(path)
+    with _file_hashes_lock:
+        cached = _file_hashes.get(path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    digest = hash_file(path)
+    with _file_hashes_lock:
+        _file_hashes[path] = (st.st_mtime_ns, st.st_size, digest)
+    return digest
+
+class PointResultCache:
+    """测试点结果缓存，用于增量判题
+
+    每道题目保存为一个json文件，以测试点指纹（程序、输入、标准输出和判题设置的哈希）为键。
+    只缓存由程序和数据决定的结果（CACHEABLE_VERDICTS），超时、运行时错误和超出资源限制
+    可能是机器负载造成的，每次都重新运行。
+    """
+    CACHEABLE_VERDICTS = ("正确", "输出不匹配")
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _task_file(self, assignment_path, task_folder):
+        name = hashlib.sha1(f"{os.path.abspath(assignment_path)}\0{task_folder}".encode('utf-8')).hexdigest()
+        return os.path.join(self.root, name + '.json')
+
+    def load(self, assignment_path, task_folder):
+        """读取题目的所有缓存结果，返回 {指纹: PointResult}"""
         try:
-            url_str = url.toString()
-            path = url.path()
-            
-            # 尝试从path中提取测试点号
-            test_point_match = re.search(r'test_point:/?/?(\d+)', path)
-            if test_point_match:
-                test_point = int(test_point_match.group(1))
-                self.process_test_point(test_point)
-                return
-            
-            # 如果从path提取失败，尝试从URL字符串提取
-            if url_str:
-                test_point_match = re.search(r'test_point:/?/?(\d+)', url_str)
-                if test_point_match:
-                    test_point = int(test_point_match.group(1))
-                    self.process_test_point(test_point)
-                    return
-            
-            
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"处理链接点击时出错: {str(e)}")
+            with open(self._task_file(assignment_path, task_folder), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            results = {fingerprint: PointResult.from_dict(item) for fingerprint, item in data.items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            return {}
+        # 旧版本的缓存中可能还有超时等结果
+        return {fingerprint: result for fingerprint, result in results.items()
+                if result.verdict in self.CACHEABLE_VERDICTS}
+
+    def save(self, assignment_path, task_folder, results):
+        """保存本次判题的结果 {指纹: PointResult}，替换该题目原有的缓存"""
+        path = self._task_file(assignment_path, task_folder)
+        data = {fingerprint: result.to_dict() for fingerprint, result in results.items()
+                if result.verdict in self.CACHEABLE_VERDICTS}
+        with self._lock:
+            os.makedirs(self.root, exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+
+# 全局测试点结果缓存
+point_result_cache = PointResultCache(os.path.join(CACHE_DIR, "results"))
+
+def point_fingerprint(source_key, input_file, standard_file, streaming):
+    """计算测试点指纹，程序、测试数据或判题设置任一改变时指纹都会改变"""
+    digest = hashlib.sha256()
+    digest.update(source_key.encode('utf-8'))
+    for path in (input_file, standard_file):
+        digest.update(b'\0' + (hash_file_cached(path) if os.path.exists(path) else '<missing>').encode('utf-8'))
+    digest.update(f"\0{TIME_LIMIT}\0{FULL_SCORE}\0{MAX_REPORTED_DIFFS}\0{bool(streaming)}".encode('utf-8'))
+    digest.update(('\0' + '\0'.join(str(getattr(resource_limits, name)) for name in ResourceLimits.FIELDS)).encode('utf-8'))
+    return digest.hexdigest()
+
+def test_point_fingerprint(task_folder, test_case_num, assignment_path, source_key):
+    """source_key对应的程序在测试点上的指纹（见point_fingerprint），作为测试点详情的缓存版本
+
+    测试数据和判题设置使用当前的文件和配置，无法读取测试数据表时返回None（不缓存）
+    """
+    if not source_key:
+        return None
+    try:
+        input_name, output_name, _, _ = load_judger_metadata(assignment_path)
+        data_dir = os.path.join(os.path.abspath(assignment_path), 'data', task_folder)
+        return point_fingerprint(source_key, os.path.join(data_dir, input_name[test_case_num - 1]),
+                                 os.path.join(data_dir, output_name[test_case_num - 1]), False)
+    except (ImportError, IndexError, TypeError, OSError):
+        return None
+
+def judge_task(task_folder, assignment_path, max_workers=None, streaming=True, incremental=False, on_event=None,
+               cancel_token=None):
+    """编译一次后并行运行题目的所有测试点，返回TaskResult
+
+    同时运行的学生程序数量不超过max_workers（默认为CPU核数）。
+    streaming为True时使用管道比较输出（见run_test_point）。
+    incremental为True时，只重新运行指纹发生变化的测试点，其余直接使用上次的结果（标记为cached）。
+    on_event用于接收判题事件（见make_event），会在判题线程中被调用。
+    cancel_token被取消时结束编译器和所有学生程序，并抛出JudgeCancelled。
+    无法导入judger_batch或其中没有该题目时抛出ImportError（见load_task_metadata）。
+    """
+    emit = on_event or (lambda event: None)
+    task_result = _judge_task(task_folder, assignment_path, max_workers, streaming, incremental, emit,
+                              cancel_token or CancelToken())
+    emit(task_finished_event(task_result))
+    return task_result
+
+def _judge_task(task_folder, assignment_path, max_workers, streaming, incremental, emit, cancel_token):
+    assignment_path = os.path.abspath(assignment_path)
+    input_name, output_name, main_path = load_task_metadata(task_folder, assignment_path)
+    
+    points = list_test_points(task_folder, assignment_path, input_name, output_name)
+    emit(make_event(EVENT_TASK_STARTED, task_folder, total=len(points)))
+    
+    task_result = TaskResult(task_folder)
+    if not os.path.exists(main_path):
+        task_result.compile_error = f"找不到源文件: {main_path}"
+        emit(make_event(EVENT_COMPILE_FINISHED, task_folder, ok=False, cached=False, time=0.0,
+                        error=task_result.compile_error))
+        return task_result
+    
+    task_result.source_key = binary_cache.source_key(main_path)
+    
+    # 增量判题：找出指纹未变化的测试点，源文件和测试数据都没变时连编译都可以跳过
+    reused = {}
+    fingerprints = {}
+    if incremental:
+        previous = point_result_cache.load(assignment_path, task_folder)
+        for index, input_file, standard_file in points:
+            fingerprint = point_fingerprint(task_result.source_key, input_file, standard_file, streaming)
+            fingerprints[index] = fingerprint
+            if fingerprint in previous:
+                reused[index] = previous[fingerprint]
+                reused[index].cached = True
+        if points and len(reused) == len(points):
+            task_result.compiled = True
+            task_result.compile_cached = True
+            task_result.points = [reused[index] for index, _, _ in points]
+            emit(make_event(EVENT_COMPILE_FINISHED, task_folder, ok=True, cached=True, time=0.0, error=None))
+            for point in task_result.points:
+                emit(point_finished_event(task_folder, point))
+            return task_result
+    
+    # 编译期间让系统提前读入要运行的测试点的数据
+    test_data.readahead([path for index, input_file, standard_file in points if index not in reused
+                         for path in (input_file, standard_file)])
+    
+    cancel_token.check()
+    emit(make_event(EVENT_COMPILE_STARTED, task_folder))
+    compile_start = time.monotonic()
+    compiled, exec_path, compile_error, cached = binary_cache.get_or_build(main_path, cancel_token=cancel_token)
+    task_result.compile_time = time.monotonic() - compile_start
+    task_result.compiled = compiled
+    task_result.compile_error = compile_error
+    task_result.compile_cached = cached
+    emit(make_event(EVENT_COMPILE_FINISHED, task_folder, ok=compiled, cached=cached,
+                    time=task_result.compile_time, error=compile_error))
+    if not compiled or not points:
+        return task_result
+    
+    for index in sorted(reused):
+        emit(point_finished_event(task_folder, reused[index]))
+    
+    def run_point(index, input_file, standard_file):
+        cancel_token.check()
+        emit(make_event(EVENT_POINT_STARTED, task_folder, index=index))
+        point = run_test_point(exec_path, index, input_file, standard_file, workdir, streaming, cancel_token)
+        # 程序因取消而被结束时，结果没有意义
+        cancel_token.check()
+        emit(point_finished_event(task_folder, point))
+        return point
+    
+    # 管道模式下不需要临时文件
+    workdir = None if streaming else tempfile.mkdtemp()
+    try:
+        max_workers = max_workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=min(max_workers, max(1, len(points) - len(reused)))) as executor:
+            futures = {index: executor.submit(run_point, index, input_file, standard_file)
+                       for index, input_file, standard_file in points if index not in reused}
+            task_result.points = [reused[index] if index in reused else futures[index].result()
+                                  for index, _, _ in points]
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
     
-    def process_test_point(self, test_point):
-        """处理测试点详情"""
-        
-        if not self.current_task or not self.current_assignment:
-            return
-        
-        # 确保使用绝对路径
-        assignment_path = os.path.abspath(self.current_assignment)
-        
-        # 切换详情展示状态
-        if test_point in self.test_point_details:
-            self.test_point_details[test_point]['expanded'] = not self.test_point_details[test_point]['expanded']
+    if incremental:
+        point_result_cache.save(assignment_path, task_folder,
+                                {fingerprints[point.index]: point for point in task_result.points})
+    return task_result
+
+def format_task_report(task_result):
+    """将判题结果格式化为与judger_batch.py相同风格的文本"""
+    lines = []
+    if not task_result.compiled:
+        lines.append("[COMPILE ERROR]")
+        if task_result.compile_error:
+            lines.append(task_result.compile_error.rstrip())
+        return "\n".join(lines) + "\n"
+    
+    for point in task_result.points:
+        cached_note = " [缓存结果]" if point.cached else ""
+        if point.usage is not None:
+            lines.append(f"[TEST POINT {point.index}] {point.verdict} ({point.usage.format()}){cached_note}")
         else:
-            # 运行测试用例，获取详情
+            lines.append(f"[TEST POINT {point.index}] {point.verdict}{cached_note}")
+        if point.message:
+            lines.append(point.message)
+        lines.append(f"[SCORE] {point.score}")
+    return "\n".join(lines) + "\n"
+
+class JudgeHistory:
+    """判题历史记录，保存在本地SQLite数据库中
+
+    每次判题保存为一条runs记录（输出文本用zlib压缩），各测试点的结果保存在points表，
+    在界面中展开过的测试点详情保存在details表。
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            assignment TEXT NOT NULL,
+            task TEXT NOT NULL,
+            source_hash TEXT,
+            finished_at REAL NOT NULL,
+            elapsed REAL NOT NULL,
+            compiled INTEGER,
+            compile_time REAL,
+            stdout BLOB,
+            stderr BLOB
+        );
+        CREATE INDEX IF NOT EXISTS runs_by_task ON runs (assignment, task, id);
+        CREATE TABLE IF NOT EXISTS points (
+            run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+            idx INTEGER NOT NULL,
+            verdict TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            message BLOB,
+            wall_time REAL,
+            cpu_user REAL,
+            cpu_sys REAL,
+            peak_rss_kb INTEGER,
+            PRIMARY KEY (run_id, idx)
+        );
+        CREATE TABLE IF NOT EXISTS details (
+            run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+            idx INTEGER NOT NULL,
+            content BLOB NOT NULL,
+            PRIMARY KEY (run_id, idx)
+        );
+    """
+
+    def __init__(self, path, keep_runs=20):
+        self.path = path
+        self.keep_runs = keep_runs  # 每道题目保留的历史记录条数
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA foreign_keys = ON")
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.executescript(self.SCHEMA)
+        return self._conn
+
+    @staticmethod
+    def _pack(text):
+        return None if text is None else zlib.compress(text.encode('utf-8'))
+
+    @staticmethod
+    def _unpack(blob):
+        return None if blob is None else zlib.decompress(blob).decode('utf-8')
+
+    def record_run(self, assignment_path, task, stdout, stderr, elapsed, task_result=None):
+        """保存一次判题结果，返回记录id"""
+        assignment_path = os.path.abspath(assignment_path)
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                cursor = conn.execute(
+                    "INSERT INTO runs (assignment, task, source_hash, finished_at, elapsed, compiled, compile_time, stdout, stderr)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (assignment_path, task,
+                     task_result.source_key if task_result else None,
+                     time.time(), elapsed,
+                     int(task_result.compiled) if task_result else None,
+                     task_result.compile_time if task_result else None,
+                     self._pack(stdout), self._pack(stderr)))
+                run_id = cursor.lastrowid
+                if task_result is not None:
+                    conn.executemany(
+                        "INSERT INTO points VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [(run_id, point.index, point.verdict, point.score, self._pack(point.message),
+                          *((point.usage.wall_time, point.usage.cpu_user, point.usage.cpu_sys, point.usage.peak_rss_kb)
+                            if point.usage is not None else (None, None, None, None)))
+                         for point in task_result.points])
+                # 只保留最近的若干条记录
+                conn.execute(
+                    "DELETE FROM runs WHERE assignment = ? AND task = ? AND id NOT IN"
+                    " (SELECT id FROM runs WHERE assignment = ? AND task = ? ORDER BY id DESC LIMIT ?)",
+                    (assignment_path, task, assignment_path, task, self.keep_runs))
+        return run_id
+
+    def save_detail(self, run_id, index, content):
+        """保存某次判题中一个测试点的详情文本"""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO details VALUES (?, ?, ?)", (run_id, index, self._pack(content)))
+
+    def judged_tasks(self, assignment_path):
+        """返回作业中有判题记录的题目集合"""
+        assignment_path = os.path.abspath(assignment_path)
+        with self._lock:
+            rows = self._connect().execute("SELECT DISTINCT task FROM runs WHERE assignment = ?",
+                                           (assignment_path,)).fetchall()
+        return {task for task, in rows}
+
+    def latest_run(self, assignment_path, task):
+        """读取题目最近一次的判题记录，没有记录时返回None
+
+        返回字典，包含id、finished_at、elapsed、stdout、stderr、task_result（未使用内置引擎时为None）和details {测试点编号: 详情文本}
+        """
+        assignment_path = os.path.abspath(assignment_path)
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT id, source_hash, finished_at, elapsed, compiled, compile_time, stdout, stderr FROM runs"
+                " WHERE assignment = ? AND task = ? ORDER BY id DESC LIMIT 1",
+                (assignment_path, task)).fetchone()
+            if row is None:
+                return None
+            run_id, source_hash, finished_at, elapsed, compiled, compile_time, stdout, stderr = row
+            point_rows = conn.execute(
+                "SELECT idx, verdict, score, message, wall_time, cpu_user, cpu_sys, peak_rss_kb FROM points"
+                " WHERE run_id = ? ORDER BY idx", (run_id,)).fetchall()
+            detail_rows = conn.execute("SELECT idx, content FROM details WHERE run_id = ?", (run_id,)).fetchall()
+        
+        task_result = None
+        if compiled is not None:
+            task_result = TaskResult(task)
+            task_result.compiled = bool(compiled)
+            task_result.compile_time = compile_time
+            task_result.source_key = source_hash
+            for index, verdict, score, message, wall_time, cpu_user, cpu_sys, peak_rss_kb in point_rows:
+                usage = ProcessUsage(wall_time, cpu_user, cpu_sys, peak_rss_kb) if wall_time is not None else None
+                task_result.points.append(PointResult(index, verdict, score, self._unpack(message), usage))
+        return {
+            'id': run_id,
+            'finished_at': finished_at,
+            'elapsed': elapsed,
+            'stdout': self._unpack(stdout) or "",
+            'stderr': self._unpack(stderr) or "",
+            'task_result': task_result,
+            'details': {index: self._unpack(content) for index, content in detail_rows},
+        }
+
+# 全局判题历史
+judge_history = JudgeHistory(os.path.join(CACHE_DIR, "history.sqlite3"))
+
+# 运行judger_batch.py时保留的输出长度（字符）
+MAX_CAPTURED_STDOUT = 1024 * 1024
+MAX_CAPTURED_STDERR = 64 * 1024
+
+class BoundedBuffer:
+    """只保留前limit个字符的文本缓冲区，超出的部分丢弃，取值时在末尾注明"""
+    def __init__(self, limit):
+        self.limit = limit
+        self.size = 0  # 写入的总字符数（包括丢弃的部分）
+        self._chunks = []
+        self._kept = 0
+
+    def write(self, text):
+        self.size += len(text)
+        if self._kept < self.limit:
+            text = text[:self.limit - self._kept]
+            self._chunks.append(text)
+            self._kept += len(text)
+
+    @property
+    def truncated(self):
+        return self.size > self._kept
+
+    def getvalue(self):
+        text = "".join(self._chunks)
+        if self.truncated:
+            text += f"\n[输出超限] 输出共 {self.size} 个字符，只保留了前 {self._kept} 个\n"
+        return text
+
+def run_judge(task_folder, assignment_path, on_event=None, incremental=True, cancel_token=None):
+    """判题并返回 (judger_batch风格的输出文本, 错误输出, TaskResult)
+
+    优先使用内置的并行判题引擎，无法读取judger_batch中的测试数据表时退回到直接运行judger_batch.py，
+    此时TaskResult为None，输出文本会被边读取边转换为判题事件。两种方式都会通过on_event发送判题事件。
+    cancel_token被取消时结束所有子进程并抛出JudgeCancelled。
+    """
+    emit = on_event or (lambda event: None)
+    cancel_token = cancel_token or CancelToken()
+    # 只有读取不到测试数据表时才退回到judger_batch.py；开始判题之后的异常直接抛出，不会再发送一遍判题事件
+    try:
+        load_task_metadata(task_folder, assignment_path)
+    except ImportError:
+        pass
+    else:
+        task_result = judge_task(task_folder, assignment_path, incremental=incremental, on_event=on_event,
+                                 cancel_token=cancel_token)
+        return format_task_report(task_result), "", task_result
+    
+    judger_path = find_judger_batch(assignment_path) or os.path.join(assignment_path, "judger_batch.py")
+    proc = popen_no_window(["python", judger_path, "-T", task_folder], cwd=assignment_path,
+                           stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                           text=True, encoding='utf-8', errors='replace')
+    cancel_token.register(proc)
+    # 在单独的线程中读取错误输出，避免管道写满后互相等待；输出只保留开头的一部分，其余读出后丢弃
+    stderr_buffer = BoundedBuffer(MAX_CAPTURED_STDERR)
+    
+    def read_stderr():
+        for chunk in iter(lambda: proc.stderr.read(64 * 1024), ""):
+            stderr_buffer.write(chunk)
+    stderr_reader = threading.Thread(target=read_stderr, daemon=True)
+    stderr_reader.start()
+    parser = LegacyOutputParser(task_folder)
+    stdout_buffer = BoundedBuffer(MAX_CAPTURED_STDOUT)
+    for line in proc.stdout:
+        stdout_buffer.write(line)
+        for event in parser.feed(line):
+            emit(event)
+    proc.wait()
+    stderr_reader.join()
+    cancel_token.unregister(proc)
+    cancel_token.check()
+    for event in parser.finish():
+        emit(event)
+    return stdout_buffer.getvalue(), stderr_buffer.getvalue(), None
+
+def judge_task_output(task_folder, assignment_path, incremental=True):
+    """判题并返回judger_batch风格的输出文本"""
+    return run_judge(task_folder, assignment_path, incremental=incremental)[0]
+
+def check_one_assignment(folder, assignment_path, cancel_token=None):
+    """检查一道题目，返回 (是否通过, 需要输出的文本)"""
+    lines = []
+    x_value = folder.split('_')[0]
+    lines.append(f"\n正在检查第 {x_value} 题...")
+
+    summary = TaskEventSummary(folder)
+    stdout = run_judge(folder, assignment_path, on_event=summary.apply, cancel_token=cancel_token)[0]
+    
+    # 检查该题的所有测试点
+    passed = summary.passed
+    if passed:
+        lines.append(f"第 {x_value} 题通过啦"+int(x_value)*"✌️")
+    else:
+        lines.append(f"第 {x_value} 题还需要改进 😢")
+        lines.append(stdout)
+        
+        # 找出失败的测试点，并行获取详细信息
+        failed_points = summary.failed_points()
+        if cancel_token is not None:
+            cancel_token.check()
+        if failed_points:
+            with ThreadPoolExecutor(max_workers=min(len(failed_points), os.cpu_count() or 1)) as executor:
+                results = executor.map(
+                    lambda test_point: run_test_case(folder, test_point, assignment_path, cancel_token), failed_points)
+                for test_point, result in zip(failed_points, results):
+                    lines.append(f"\n测试点 {test_point} 失败，正在获取详细信息...")
+                    # 获取测试点详情
+                    lines.append(display_test_case_details(*result))
+    lines.append("="*50)
+    return passed, "\n".join(lines)
+
+def check_all_assignments(folders, assignment_path, jobs=None, cancel_token=None, out=None):
+    """检查多道题目，jobs为同时判题的题目数（默认为CPU核数），输出始终按题号顺序打印到out（默认为sys.stdout）
+
+    cancel_token被取消时抛出JudgeCancelled
+    """
+    out = out or sys.stdout
+    folders = sorted(folders)  # 确保按序号顺序检查
+    jobs = jobs or os.cpu_count() or 1
+    all_passed = True
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(folders)))) as executor:
+        futures = [executor.submit(check_one_assignment, folder, assignment_path, cancel_token) for folder in folders]
+        # 按题号顺序等待并打印结果，保证输出顺序与并行程度无关
+        for future in futures:
+            passed, text = future.result()
+            print(text, file=out)
+            all_passed = all_passed and passed
+    if all_passed:
+        print("\n🎉 太好啦，可以交作业啦！🎉", file=out)
+    else:
+        print("\n继续加油，马上就能完成啦！💪", file=out)
+    print(binary_cache.format_stats(), file=out)
+    
+    return all_passed
+
+# 判题任务的优先级，数值越小越优先
+PRIORITY_INTERACTIVE = 0  # 用户点击的题目
+PRIORITY_DETAIL = 1  # 获取测试点详情
+PRIORITY_BACKGROUND = 2  # 后台重新验证
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "交互", PRIORITY_DETAIL: "详情", PRIORITY_BACKGROUND: "后台"}
+
+class JudgeJob:
+    """调度器中的一个任务
+
+    func(job)在调度器的工作线程中运行，其返回值保存在result中；
+    需要支持取消的任务应把job.cancel_token传给判题函数。
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FINISHED = 'finished'
+    CANCELLED = 'cancelled'
+    FAILED = 'failed'
+    STATE_NAMES = {QUEUED: "排队中", RUNNING: "运行中", FINISHED: "已完成", CANCELLED: "已取消", FAILED: "出错"}
+
+    def __init__(self, key, func, priority, description=None):
+        self.key = key  # 相同key的排队任务会被合并
+        self.func = func
+        self.priority = priority
+        self.description = description or str(key)
+        self.state = JudgeJob.QUEUED
+        self.result = None
+        self.error = None
+        self.cancel_token = CancelToken()
+        self.preempted = False  # 为更高优先级的任务让出位置，结束后会重新排队
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def wait_time(self):
+        """排队等待的时间（秒）"""
+        return (self.started_at or time.monotonic()) - self.submitted_at
+
+    @property
+    def run_time(self):
+        """运行时间（秒），尚未开始时为None"""
+        if self.started_at is None:
+            return None
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+class JudgeScheduler:
+    """按优先级调度判题任务的任务队列
+
+    同时运行的任务数不超过max_workers；相同key的排队任务只保留一个（优先级取较高者）。
+    所有工作线程都被占用时，新提交的任务会抢占一个优先级更低的运行中任务：
+    被抢占的任务通过cancel_token取消，之后自动重新排队，因此后台任务不会拖慢用户点击的题目。
+    任务状态每次变化都会调用on_change(job)，调用可能发生在任意线程中。
+    """
+    def __init__(self, max_workers=None, on_change=None, history_size=50):
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self.on_change = on_change
+        self._cond = threading.Condition()
+        self._heap = []  # (优先级, 序号, 任务)，任务优先级变化后旧条目作废
+        self._counter = 0
+        self._pending = {}  # key -> 排队中的任务
+        self._running = set()
+        self._finished = deque(maxlen=history_size)  # 最近结束的任务
+        self._worker_count = 0
+
+    def _notify(self, job):
+        if self.on_change is not None:
+            self.on_change(job)
+
+    def _push(self, job):
+        self._counter += 1
+        heapq.heappush(self._heap, (job.priority, self._counter, job))
+
+    def submit(self, key, func, priority=PRIORITY_BACKGROUND, description=None):
+        """提交任务并返回JudgeJob；已有相同key的任务在排队时直接返回该任务"""
+        with self._cond:
+            job = self._pending.get(key)
+            if job is not None:
+                if priority < job.priority:
+                    job.priority = priority
+                    self._push(job)
+            else:
+                job = JudgeJob(key, func, priority, description)
+                self._pending[key] = job
+                self._push(job)
+            self._preempt_for(job.priority)
+            self._start_workers()
+            self._cond.notify()
+        self._notify(job)
+        return job
+
+    def find(self, key):
+        """返回排队中或运行中的相同key任务，没有时返回None"""
+        with self._cond:
+            if key in self._pending:
+                return self._pending[key]
+            for job in self._running:
+                if job.key == key:
+                    return job
+        return None
+
+    def raise_priority(self, job, priority):
+        """提高任务的优先级（排队中的任务会提前，运行中的任务不再被更低优先级的任务抢占）
+
+        已经结束的任务不做处理，它的结束通知可能还在发往界面线程的途中
+        """
+        with self._cond:
+            if priority >= job.priority or job.state not in (JudgeJob.QUEUED, JudgeJob.RUNNING):
+                return
+            job.priority = priority
+            if job.state == JudgeJob.QUEUED:
+                self._push(job)
+                self._preempt_for(priority)
+                self._cond.notify()
+        self._notify(job)
+
+    def cancel(self, job):
+        """取消任务：排队中的任务直接移除，运行中的任务通过cancel_token结束"""
+        with self._cond:
+            if job.state == JudgeJob.QUEUED:
+                self._pending.pop(job.key, None)
+                job.state = JudgeJob.CANCELLED
+                job.finished_at = time.monotonic()
+                self._finished.append(job)
+            elif job.state == JudgeJob.RUNNING:
+                job.preempted = False
+                job.cancel_token.cancel()
+                return
+            else:
+                return
+        self._notify(job)
+
+    def set_max_workers(self, max_workers):
+        with self._cond:
+            self.max_workers = max(1, max_workers)
+            self._start_workers()
+            self._cond.notify_all()
+
+    def snapshot(self):
+        """返回 (排队中, 运行中, 最近结束) 三个任务列表，用于界面显示"""
+        with self._cond:
+            queued = sorted(self._pending.values(), key=lambda job: (job.priority, job.submitted_at))
+            running = sorted(self._running, key=lambda job: job.started_at)
+            finished = list(reversed(self._finished))
+        return queued, running, finished
+
+    def _preempt_for(self, priority):
+        # 还有空闲的工作线程，或者排在前面的同级任务已经足够占满线程时不需要抢占
+        waiting = sum(1 for job in self._pending.values() if job.priority <= priority)
+        if len(self._running) + waiting <= self.max_workers:
+            return
+        victims = [job for job in self._running if job.priority > priority and not job.preempted]
+        if victims:
+            victim = max(victims, key=lambda job: (job.priority, job.started_at))
+            victim.preempted = True
+            victim.cancel_token.cancel()
+
+    def _start_workers(self):
+        while self._worker_count < self.max_workers:
+            self._worker_count += 1
+            threading.Thread(target=self._worker_loop, daemon=True).start()
+
+    def _next_job(self):
+        """在持有锁时调用，取出优先级最高的有效任务"""
+        while self._heap:
+            priority, _, job = heapq.heappop(self._heap)
+            if job.state == JudgeJob.QUEUED and priority == job.priority and self._pending.get(job.key) is job:
+                return job
+        return None
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                job = None
+                while True:
+                    if self._worker_count > self.max_workers:
+                        self._worker_count -= 1  # 线程数被调小了
+                        return
+                    job = self._next_job()
+                    if job is not None:
+                        break
+                    self._cond.wait()
+                del self._pending[job.key]
+                job.state = JudgeJob.RUNNING
+                job.started_at = time.monotonic()
+                self._running.add(job)
+            self._notify(job)
+            
             try:
-                # 运行测试用例
-                result = run_test_case(self.current_task, test_point, assignment_path)
-	
-                # 使用修改后的display_test_case_details函数获取格式化的详情信息
-                detailed_info = display_test_case_details(*result)
-                
-                # 保存测试点详情
-                self.test_point_details[test_point] = {
-                    'content': detailed_info,
-                    'expanded': True
-                }
+                job.result = job.func(job)
+                state = JudgeJob.FINISHED
+            except JudgeCancelled:
+                state = JudgeJob.QUEUED if job.preempted else JudgeJob.CANCELLED
             except Exception as e:
-                self.test_point_details[test_point] = {
-                    'content': f"获取详情失败: {str(e)}",
-                    'expanded': True
-                }
-        
-        # 更新显示
-        self.update_display()
+                traceback.print_exc()
+                job.error = e
+                state = JudgeJob.FAILED
+            
+            with self._cond:
+                self._running.discard(job)
+                if state == JudgeJob.QUEUED and job.key not in self._pending:
+                    # 被抢占的任务重新排队，之前的结果作废
+                    job.state = JudgeJob.QUEUED
+                    job.preempted = False
+                    job.cancel_token = CancelToken()
+                    job.started_at = None
+                    self._pending[job.key] = job
+                    self._push(job)
+                    self._cond.notify()
+                else:
+                    job.state = JudgeJob.CANCELLED if state == JudgeJob.QUEUED else state
+                    job.finished_at = time.monotonic()
+                    self._finished.append(job)
+            self._notify(job)
+
+def get_all_assignment_folders(base_path='.'):
+    """获取base_path下所有作业文件夹（包括assignment和challenge）"""
+    # 添加调试信息
+    print(f"get_all_assignment_folders函数中的当前目录: {os.path.abspath(base_path)}")
     
-    def update_display(self):
-        """更新结果显示，重新构建整个HTML内容"""
-        
-        # 保存当前滚动位置
-        scrollbar = self.result_text.verticalScrollBar()
-        current_scroll_position = scrollbar.value()
-        
-        # 构建完整的HTML内容，而不是逐行append
-        html_content = []
+    try:
+        entries = [f for f in os.listdir(base_path) if os.path.isdir(os.path.join(base_path, f))]
         
-        # 添加CSS样式，确保代码区域有足够的宽度并正确显示
-        # 根据当前主题选择适当的颜色
-        colors = Colors.current()
+        # 获取当前目录下所有文件夹，筛选出以 "assignment" 开头的文件夹
+        assignment_folders = [f for f in entries if f.startswith('assignment')]
+        print(f"找到以assignment开头的文件夹: {assignment_folders}")
         
-        # 获取等宽字体
-        mono_font = "Consolas, monospace"
-        if hasattr(self, 'fonts') and self.fonts and 'mono' in self.fonts:
-            mono_font = f"{self.fonts['mono']}, Consolas, monospace"
+        # 筛选出以 "challenge" 开头的文件夹
+        challenge_folders = [f for f in entries if f.startswith('challenge')]
+        print(f"找到以challenge开头的文件夹: {challenge_folders}")
         
-        html_content.append(f"""
-        <style>
-            body {{
-                font-family: {self.fonts['chinese'] if hasattr(self, 'fonts') and self.fonts and 'chinese' in self.fonts else 'sans-serif'}, system-ui;
-            }}
-            .code-container {{
-                font-family: {mono_font};
-                white-space: pre;
-                overflow-x: auto;
-                min-width: 1000px;
-                width: 100%;
-                color: {colors['text_primary']};
-                background-color: {colors['bg_secondary']};
-                padding: 12px;
-                border-radius: 6px;
-                border: 1px solid {colors['border']};
-            }}
-            .separator-line {{
-                white-space: nowrap;
-                font-family: {mono_font};
-                width: 100%;
-                color: {colors['text_secondary']};
-            }}
-            .detail-container {{
-                margin-left: 20px; 
-                padding: 15px; 
-                border-left: 3px solid {colors['accent']}; 
-                background-color: {colors['bg_tertiary']};
-                border-radius: 6px;
-                margin-top: 10px;
-                margin-bottom: 10px;
-                box-shadow: 0 2px 5px rgba(0,0,0,0.2);
-            }}
-            a {{
-                color: {colors['accent']};
-                text-decoration: none;
-                font-weight: bold;
-                transition: color 0.2s;
-            }}
-            a:hover {{
-                color: {colors['accent_alt']};
-                text-decoration: underline;
-            }}
-            pre {{
-                margin: 0;
-                font-family: {mono_font};
-            }}
-        </style>
-        """)
+        # 合并两种文件夹
+        all_folders = assignment_folders + challenge_folders
         
-        # 解析并重构HTML内容
-        html_lines = self.full_result_text.split('\n')
-        for line in html_lines:
-            # 处理测试点链接 - 匹配链接，不论是否有箭头
-            test_point_match = re.search(r'<a href="test_point:(\d+)">查看测试点 (\d+) 详情( ▶)?</a>', line)
-            
-            if test_point_match:
-                test_point = int(test_point_match.group(1))
-                
-                # 创建链接，并添加状态指示
-                if test_point in self.test_point_details:
-                    # 替换链接文本，添加状态指示
-                    old_link = test_point_match.group(0)
-                    indicator = "▼" if self.test_point_details[test_point]['expanded'] else "▶"
-                    # 确保每个链接后面有<br/>标签
-                    if '<br/>' in line:
-                        new_link = f'<a href="test_point:{test_point}">查看测试点 {test_point} 详情 {indicator}</a><br/>'
-                        line = line.replace(old_link + '<br/>', new_link)
-                    else:
-                        new_link = f'<a href="test_point:{test_point}">查看测试点 {test_point} 详情 {indicator}</a><br/>'
-                        line = line.replace(old_link, new_link)
-                else:
-                    # 如果测试点不在详情字典中，确保它有箭头和换行
-                    old_link = test_point_match.group(0)
-                    if " ▶" not in old_link:
-                        new_link = f'<a href="test_point:{test_point}">查看测试点 {test_point} 详情 ▶</a>'
-                        line = line.replace(old_link, new_link)
-                    if '<br/>' not in line:
-                        line = line + '<br/>'
-            
-            # 特殊处理分隔线
-            elif re.match(r'^-{10,}$', line):
-                # 将长的分隔线放在一个特殊类中，确保不被折行
-                line = f'<div class="separator-line">{line}</div>'
-            
-            # 处理代码段（标准输出、预期输出等）
-            elif line.startswith('<pre>') and '</pre>' in line:
-                # 将pre内容包装在代码容器中
-                line = line.replace('<pre>', '<pre class="code-container">')
-            
-            # 添加到HTML内容
-            html_content.append(line)
+        # 排序以便于显示，先按类型，再按数字
+        def sort_key(folder):
+            # 提取数字部分
+            match = re.search(r'(\d+)', folder)
+            if match:
+                number = int(match.group(1))
+            else:
+                number = 0
             
-            # 如果是测试点链接行且测试点详情已展开，则添加详情内容
-            if test_point_match:
-                test_point = int(test_point_match.group(1))
-                if test_point in self.test_point_details and self.test_point_details[test_point]['expanded']:
-                    # 添加详情内容，不需要额外的换行，因为链接后已有<br/>
-                    
-                    # 使用CSS类控制详情容器样式
-                    html_content.append('<div class="detail-container">')
-                    
-                    # 处理详情内容，确保HTML特殊字符被转义
-                    content_text = self.test_point_details[test_point]['content']
-                    # 转义<, >, &等特殊字符，防止被误解为HTML标签
-                    content_text = content_text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-                    
-                    # 特殊处理详情内容中的分隔线
-                    content_lines = content_text.split('\n')
-                    processed_content = []
-                    for content_line in content_lines:
-                        if re.match(r'^-{10,}$', content_line):
-                            # 将分隔线标记为不换行
-                            processed_content.append(f'<span style="white-space: nowrap;">{content_line}</span>')
-                        else:
-                            processed_content.append(content_line)
-                    
-                    content_text = '\n'.join(processed_content)
-                    
-                    # 将内容包装在pre标签中，保持格式
-                    html_content.append(f'<pre class="code-container">{content_text}</pre>')
-                    
-                    html_content.append('</div>')
-        
-        # 将所有内容连接成一个HTML字符串
-        full_html = "\n".join(html_content)
-        
-        # 使用setHtml()方法一次性设置所有内容，确保HTML被正确解析
-        self.result_text.clear()
-        self.result_text.setHtml(full_html)
+            # assignment优先，然后按数字排序
+            if folder.startswith('assignment'):
+                return (0, number)
+            else:
+                return (1, number)
         
-        # 尝试恢复滚动位置，调整策略让焦点尽量保持在当前测试点上
-        QTimer.singleShot(1, lambda: self.restore_scroll_position(current_scroll_position))
+        all_folders.sort(key=sort_key)
+        print(f"最终排序后的文件夹列表: {all_folders}")
         
+        return all_folders
+    except Exception as e:
+        print(f"获取作业文件夹时出错: {str(e)}")
+        traceback.print_exc()
+        return []
+
+# 程序设置（目前保存界面字体的选择结果），与程序放在同一目录
+CONFIG_FILE = os.path.join(get_app_dir(), "codesentry_config.json")
+
+def load_config():
+    """读取程序设置，文件不存在或损坏时返回空字典"""
+    try:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        return config if isinstance(config, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+def save_config(config):
+    """保存程序设置（先写临时文件再替换，避免写到一半时文件损坏）"""
+    tmp_path = CONFIG_FILE + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(config, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, CONFIG_FILE)
+    except OSError as e:
+        print(f"警告: 无法保存设置: {e}")
+
+# 学生程序的资源限制可以在设置文件中修改，例如 {"limits": {"memory_mb": 2048, "processes": null}}
+resource_limits.update(load_config().get('limits'))
+
+def _config_bytes(name, default_mb):
+    """读取设置文件中以MB为单位的缓存大小，返回字节数，无效时使用默认值"""
+    try:
+        megabytes = float(load_config().get(name, default_mb))
+    except (TypeError, ValueError):
+        megabytes = default_mb
+    return max(int(megabytes * 1024 * 1024), 0)
+
+def detail_cache_budget():
+    """测试点详情缓存的大小（字节），可以在设置文件中修改，例如 {"detail_cache_mb": 64}"""
+    return _config_bytes('detail_cache_mb', DETAIL_CACHE_MB)
+
+# 测试数据缓存的大小可以在设置文件中修改，例如 {"test_data_cache_mb": 128}
+test_data.max_bytes = _config_bytes('test_data_cache_mb', TEST_DATA_CACHE_MB)
+
+def get_student_id():
+    """获取学生学号，从配置文件读取，否则询问用户并设置"""
+    # 尝试从配置文件读取
+    config_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "student_config.txt")
+    
+    if os.path.exists(config_file):
+        try:
+            with open(config_file, "r") as f:
+                student_id = f.read().strip()
+            if is_valid_student_id(student_id):
+                print(f"从配置文件读取到学号: {format_student_id(student_id)}")
+                # 在GUI模式下，直接返回学号，不要求确认
+                if 'PyQt5' in sys.modules:
+                    return student_id
+                    
+                # 命令行模式下要求确认
+                confirm = input(f"确认你的学号是 {format_student_id(student_id)} 吗？(y/n): ")
+                if confirm.lower() == 'y':
+                    return student_id
+        except Exception as e:
+            print(f"读取配置文件出错: {e}")
     
-    def restore_scroll_position(self, position):
-        """恢复滚动条位置，并根据情况进行调整"""
-        scrollbar = self.result_text.verticalScrollBar()
-        # 获取当前内容高度
-        max_value = scrollbar.maximum()
-        
-        # 如果内容变长，尝试调整位置，避免一直回到顶部
-        if position > 0:
-            # 设置滚动位置，略有偏移以确保用户能看到变化
-            scrollbar.setValue(min(position, max_value))
-    
-    def run_task(self, task):
-        """运行测试任务"""
-        # 如果已经在判题中，直接返回
-        if self.is_judging:
-            QMessageBox.information(self, "提示", "已有判题任务在运行中，请等待完成")
-            return
-            
-        # 清空之前的结果和测试点详情
-        self.result_text.clear()
-        self.test_point_details.clear()
-        self.full_result_text = ""
-        
-        if not self.current_assignment or not task:
-            return
+    # 如果配置文件不存在或无效，询问用户输入
+    # 在GUI模式下，返回None让调用者处理
+    if 'PyQt5' in sys.modules:
+        return None
         
-        # 标记正在判题
-        self.is_judging = True
+    # 命令行模式调用输入函数
+    return request_and_set_student_id()
+
+def is_valid_student_id(student_id):
+    """检查学号是否为12位数字"""
+    return bool(re.match(r'^\d{12}$', student_id))
+
+def format_student_id(student_id):
+    """将学号格式化为4位4位4位的形式"""
+    if len(student_id) == 12:
+        return f"{student_id[0:4]} {student_id[4:8]} {student_id[8:12]}"
+    return student_id
+
+def request_and_set_student_id():
+    """请求用户输入学号并进行验证、设置"""
+    # 当作为GUI模块调用时直接返回空
+    # 这可以防止终端输入引起的阻塞和循环
+    if 'PyQt5' in sys.modules:
+        print("在GUI模式下运行，跳过终端输入")
+        return None
         
-        # 保存原始窗口标题
-        self.original_title = self.windowTitle()
-        # 更改窗口标题，显示正在运行的任务
-        self.setWindowTitle(f"运行{task}中...")
+    # 下面的代码只在命令行模式下执行
+    max_attempts = 3
+    attempt = 0
+    
+    while attempt < max_attempts:
+        attempt += 1
+        student_id = input("请输入你的学号(12位数字): ")
         
-        # 显示正在运行的提示
-        self.result_text.setHtml("<span style='color:#888;'>正在运行判题，请稍候...</span>")
+        if not is_valid_student_id(student_id):
+            print("错误: 学号必须是12位数字，请重新输入")
+            continue
         
-        # 设置定时器检查是否运行时间过长
-        self.timer = QTimer()
-        self.timer.setSingleShot(True)
-        self.timer.timeout.connect(lambda: self.check_long_running(task))
-        self.timer.start(3000)  # 3秒后检查
+        # 格式化显示并确认
+        formatted_id = format_student_id(student_id)
+        confirm = input(f"确认你的学号是 {formatted_id} 吗？(y/n): ")
+        if confirm.lower() == 'y':
+            break
         
-        try:
-            # 准备判题环境
-            original_dir = os.getcwd()
-            # 确保使用绝对路径
-            assignment_path = os.path.abspath(self.current_assignment)
-            
-            # 寻找judger_path
-            judger_path = os.path.join(assignment_path, "judger_batch.py")
-            use_check_all = False
-            
-            # 如果当前目录没找到，尝试在上级目录查找
-            if not os.path.exists(judger_path):
-                judger_path = os.path.join(os.path.dirname(assignment_path), "judger_batch.py")
-            
-            # 再找不到的话，直接在当前工作目录找
-            if not os.path.exists(judger_path):
-                judger_path = "judger_batch.py"
-	
-            if not os.path.exists(judger_path):
-                # 使用auto_judger中的check_all_assignments函数可能的上下文
-                script_dir = os.path.dirname(os.path.abspath(__file__))
-                judger_path = os.path.join(script_dir, assignment_path, "judger_batch.py")
-            
-            # 准备命令
-            if not os.path.exists(judger_path):
-                # 尝试直接运行命令
-                command = ["python", "-T", task]
-                use_check_all = True  # 需要使用check_all_assignments
-            else:
-                # 使用judger_batch.py
-                command = ["python", judger_path, "-T", task]
-
-            # 创建判题工作线程
-            self.judge_worker = JudgeWorker(
-                command=command,
-                cwd=assignment_path,
-                judger_path=judger_path,
-                use_check_all=use_check_all,
-                task=task,
-                assignment_path=assignment_path
-            )
-            
-            # 连接信号
-            self.judge_worker.finished.connect(self.on_judge_finished)
-            self.judge_worker.error.connect(self.on_judge_error)
-            
-            # 启动工作线程
-            self.judge_worker.start()
-            
-        except Exception as e:
-            # 出现异常，停止计时器，恢复状态
-            if self.timer and self.timer.isActive():
-                self.timer.stop()
-                
-            # 恢复原始窗口标题
-            self.setWindowTitle(self.original_title)
-            self.is_judging = False
-                
-            self.result_text.clear()
-            self.result_text.append(f"<span style='color:red;'>准备测试时出错: {str(e)}</span>")
-            traceback.print_exc()
+        if attempt == max_attempts:
+            print("已达到最大尝试次数，退出")
+            return None
+    
+    # 保存到配置文件
+    config_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "student_config.txt")
+    try:
+        with open(config_file, "w") as f:
+            f.write(student_id)
+        print(f"已将学号保存到配置文件")
+    except Exception as e:
+        print(f"警告: 无法保存学号到配置文件: {e}")
+    
+    print(f"已设置学号: {formatted_id}")
+    return student_id
+
+def find_latest_assignment_folder(base_path):
+    """查找具有最大编号的assignmentx文件夹"""
+    assignment_pattern = re.compile(r'assignment(\d+)$')
+    max_num = -1
+    latest_folder = None
+    
+    for item in os.listdir(base_path):
+        item_path = os.path.join(base_path, item)
+        if os.path.isdir(item_path):
+            match = assignment_pattern.match(item)
+            if match:
+                num = int(match.group(1))
+                if num > max_num:
+                    max_num = num
+                    latest_folder = item_path
+    
+    if latest_folder:
+        print(f"找到最新的作业文件夹: {latest_folder}")
+        return latest_folder
+    else:
+        print("未找到任何assignment文件夹")
+        return None
+
+def is_valid_subfolder(folder_name):
+    """检查文件夹名称是否符合x_yyy格式"""
+    pattern = re.compile(r'^\d+_\w+$')
+    return bool(pattern.match(folder_name))
+
+def create_zip_package(assignment_folder, student_id):
+    """创建打包文件，包含符合条件的子文件夹中的所有.cpp和.h文件"""
+    if not os.path.exists(assignment_folder):
+        print(f"找不到文件夹: {assignment_folder}")
+        return False
+    
+    # 创建临时目录用于存放要打包的文件
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    temp_dir = os.path.join(current_dir, f"temp_package_{student_id}")
+    
+    # 如果临时目录已存在，先删除
+    if os.path.exists(temp_dir):
+        shutil.rmtree(temp_dir)
+    
+    os.makedirs(temp_dir)
+    
+    valid_subfolders = []
+    total_files_copied = 0
+    all_copied_files = []  # 用于存储所有复制的文件信息
     
-    def on_judge_finished(self, stdout, stderr, elapsed_time):
-        """判题完成的回调函数"""
-        # 停止计时器
-        if self.timer and self.timer.isActive():
-            self.timer.stop()
+    # 遍历assignment文件夹中的所有子文件夹
+    for item in os.listdir(assignment_folder):
+        subfolder_path = os.path.join(assignment_folder, item)
+        if os.path.isdir(subfolder_path) and is_valid_subfolder(item):
+            # 检查文件夹中是否有.cpp或.h文件
+            cpp_h_files = []
+            for file in os.listdir(subfolder_path):
+                if file.endswith(".cpp") or file.endswith(".h"):
+                    cpp_h_files.append(file)
             
-        # 关闭长时间运行对话框（如果存在）
-        if self.long_running_dialog and self.long_running_dialog.isVisible():
-            self.long_running_dialog.close()
-            self.long_running_dialog = None
-        
-        # 恢复原始窗口标题
-        self.setWindowTitle(self.original_title)
-        self.is_judging = False
-        
-        # 收集需要显示的文本行
-        text_lines = []
-        
-        # 添加运行时间信息
-        text_lines.append(f"<span style='color:#888;'>运行时间: {elapsed_time:.2f}秒</span><br/>")
-        
-        if stderr:
-            text_lines.append(f"<pre style='color:red;'>{stderr}</pre>")
-        
-        # 检查所有得分是否都是10分
-        scores = re.findall(r'\[SCORE\] (\d+)', stdout)
-        
-        all_correct = scores and all(int(score) == 10 for score in scores)
-        
-        # 显示结果
-        if stdout:
-            if all_correct:
-                text_lines.append("<span style='color:green; font-weight:bold;'>🎉 恭喜你，全部做对了！</span>")
-            else:
-                text_lines.append("<span style='color:red; font-weight:bold;'>😢 还需要改进</span>")
+            if cpp_h_files:
+                # 在临时目录中创建对应的子文件夹
+                temp_subfolder = os.path.join(temp_dir, item)
+                os.makedirs(temp_subfolder)
+                
+                # 记录当前文件夹的复制情况
+                folder_files = []
                 
-                # 显示详细结果
-                text_lines.append("<pre>" + stdout + "</pre>")
+                # 复制所有.cpp和.h文件到临时目录对应的子文件夹中
+                for file in cpp_h_files:
+                    src_file = os.path.join(subfolder_path, file)
+                    shutil.copy2(src_file, temp_subfolder)
+                    total_files_copied += 1
+                    folder_files.append(file)
                 
-                # 找出失败的测试点
-                test_points = re.findall(r'\[TEST POINT (\d+)\].*?\[SCORE\] (\d+)', stdout, re.DOTALL)
-	
-                for test_point, score in test_points:
-                    if int(score) != 10:
-                        # 使用简单的路径格式，避免URL解析问题，并添加初始的箭头指示符
-                        test_point_link = f'<a href="test_point:{test_point}">查看测试点 {test_point} 详情 ▶</a><br/>'
-                        text_lines.append(test_point_link)
+                valid_subfolders.append(item)
+                all_copied_files.append((item, folder_files))
+    
+    if not valid_subfolders:
+        print("没有找到符合条件的子文件夹或.cpp/.h文件")
+        shutil.rmtree(temp_dir)
+        return False
+    
+    # 打印复制的文件详情
+    print("\n文件复制详情:")
+    for folder, files in all_copied_files:
+        print(f"文件夹 {folder} 中复制了以下文件:")
+        for f in files:
+            print(f"  - {f}")
+    
+    # 创建zip文件（放在assignment文件夹内）
+    zip_filename = os.path.join(assignment_folder, f"{student_id}.zip")
+    
+    with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for root, _, files in os.walk(temp_dir):
+            for file in files:
+                file_path = os.path.join(root, file)
+                # 计算相对路径，以便在zip中保持文件夹结构
+                arcname = os.path.relpath(file_path, temp_dir)
+                zipf.write(file_path, arcname)
+    
+    # 清理临时目录
+    shutil.rmtree(temp_dir)
+    
+    print(f"\n包含以下子文件夹: {', '.join(valid_subfolders)}")
+    print(f"总共打包了 {total_files_copied} 个文件")
+    return zip_filename
+
+def add_limit_arguments(parser):
+    """命令行中修改学生程序资源限制的参数，0表示不限制"""
+    group = parser.add_argument_group("资源限制（默认值来自设置文件，0表示不限制）")
+    group.add_argument('--cpu-limit', type=float, metavar='SEC', help="CPU时间（秒）")
+    group.add_argument('--memory-limit', type=int, metavar='MB', help="地址空间（MB）")
+    group.add_argument('--output-limit', type=int, metavar='MB', help="输出大小（MB）")
+    group.add_argument('--max-open-files', type=int, metavar='N', help="同时打开的文件数")
+    group.add_argument('--max-processes', type=int, metavar='N', help="可以派生的进程数")
+
+def apply_limit_arguments(args):
+    arguments = {'cpu_seconds': args.cpu_limit, 'memory_mb': args.memory_limit, 'output_mb': args.output_limit,
+                 'open_files': args.max_open_files, 'processes': args.max_processes}
+    for name, value in arguments.items():
+        if value is not None:
+            setattr(resource_limits, name, value if value > 0 else None)
+
+def judge_one_headless(assignment_path, task, cancel_token):
+    """命令行模式下判一道题目，返回可以直接写入json的结果字典"""
+    summary = TaskEventSummary(task)
+    start_time = time.time()
+    result = {'assignment': assignment_path, 'task': task}
+    try:
+        stdout, stderr, task_result = run_judge(task, assignment_path, on_event=summary.apply,
+                                                cancel_token=cancel_token)
+    except JudgeCancelled:
+        raise
+    except Exception as e:
+        result.update(passed=False, compiled=None, score=0, full_score=0, failed_points=[], points=[],
+                      error=f"{type(e).__name__}: {e}", elapsed=time.time() - start_time)
+        return result
+    elapsed = time.time() - start_time
+    
+    # 与界面共用判题记录，之后在界面中选择该题目时会直接显示这次的结果
+    try:
+        judge_history.record_run(assignment_path, task, stdout, stderr, elapsed, task_result)
+    except sqlite3.Error:
+        traceback.print_exc()
+    
+    finished = summary.finished or {}
+    result.update(
+        passed=summary.passed,
+        compiled=summary.compiled,
+        compile_error=summary.compile_error,
+        score=finished.get('score', 0),
+        full_score=finished.get('full_score', 0),
+        failed_points=summary.failed_points(),
+        points=[{key: value for key, value in event.items() if key not in ('event', 'task')}
+                for _, event in sorted(summary.points.items())],
+        error=None,
+        elapsed=elapsed,
+    )
+    return result
+
+def format_headless_line(result):
+    """命令行模式下一道题目的一行摘要"""
+    name = f"{os.path.basename(result['assignment'])}/{result['task']}"
+    if result['error']:
+        status = f"出错: {result['error']}"
+    elif result['compiled'] is False:
+        status = "编译错误"
+    elif result['passed']:
+        status = "通过"
+    else:
+        status = f"未通过 测试点 {format_line_ranges(result['failed_points'])}" if result['failed_points'] else "未通过"
+    return f"{name:<32} {result['score']:>4}/{result['full_score']:<4} {result['elapsed']:6.2f}s  {status}"
+
+def headless_main(argv):
+    """命令行批量判题，与界面使用同一个判题引擎，不导入PyQt5
+
+    返回进程退出码：全部通过为0，有题目未通过为1，被中断为130
+    """
+    parser = argparse.ArgumentParser(
+        prog=os.path.basename(sys.argv[0]) + " --headless",
+        description="不启动图形界面，批量检查作业中的所有题目")
+    parser.add_argument('--headless', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('assignments', nargs='*',
+                        help="要检查的作业文件夹（assignmentX / challengeX），默认检查程序所在目录下的所有作业")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="同时判题的题目数（默认为CPU核数）")
+    parser.add_argument('-t', '--task', action='append', dest='tasks', metavar='TASK',
+                        help="只检查指定的题目（如1_add），可以重复使用")
+    parser.add_argument('--json', metavar='FILE',
+                        help="把结果以json格式写入FILE，FILE为-时写到标准输出（此时摘要写到标准错误）")
+    add_limit_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs必须是正整数")
+    apply_limit_arguments(args)
+    
+    # json写到标准输出时，摘要和调试信息都改为写到标准错误，保证标准输出只有json
+    json_to_stdout = args.json == '-'
+    report = sys.stderr if json_to_stdout else sys.stdout
+    
+    assignments = args.assignments
+    if not assignments:
+        base_path = get_app_dir()
+        with redirect_stdout(sys.stderr):
+            assignments = [os.path.join(base_path, folder) for folder in get_all_assignment_folders(base_path)]
+    assignments = [os.path.abspath(path) for path in assignments]
+    for path in assignments:
+        if not os.path.isdir(path):
+            parser.error(f"找不到作业文件夹: {path}")
+    
+    jobs = []
+    for assignment_path in assignments:
+        tasks = sorted(get_folders_by_pattern(assignment_path))
+        if args.tasks:
+            tasks = [task for task in tasks if task in args.tasks]
+        jobs += [(assignment_path, task) for task in tasks]
+    if not jobs:
+        print("没有找到需要检查的题目", file=report)
+        return 1
+    
+    start_time = time.time()
+    cancel_token = CancelToken()
+    results = []
+    try:
+        with redirect_stdout(report), \
+                ThreadPoolExecutor(max_workers=max(1, min(args.jobs, len(jobs)))) as executor:
+            futures = [executor.submit(judge_one_headless, assignment_path, task, cancel_token)
+                       for assignment_path, task in jobs]
+            try:
+                # 按作业和题号顺序输出，输出顺序与并行程度无关
+                for future in futures:
+                    result = future.result()
+                    results.append(result)
+                    print(format_headless_line(result), file=report, flush=True)
+            except KeyboardInterrupt:
+                cancel_token.cancel()
+                raise
+    except KeyboardInterrupt:
+        print("\n判题已中断", file=report)
+        return 130
+    elapsed = time.time() - start_time
+    
+    passed = sum(1 for result in results if result['passed'])
+    print(f"\n共 {len(results)} 题，通过 {passed} 题，未通过 {len(results) - passed} 题，用时 {elapsed:.2f} 秒",
+          file=report)
+    print(binary_cache.format_stats(), file=report)
+    print(f"资源限制: {resource_limits.describe()}", file=report)
+    
+    if args.json:
+        data = {'total': len(results), 'passed': passed, 'elapsed': elapsed, 'results': results}
+        if json_to_stdout:
+            json.dump(data, sys.stdout, ensure_ascii=False, indent=2)
+            sys.stdout.write("\n")
         else:
-            text_lines.append("<span style='color:red; font-weight:bold;'>❌ 未获取到判题结果</span>")
-        
-        # 保存完整的原始结果文本
-        self.full_result_text = "\n".join(text_lines)
-        
-        # 使用setHtml一次性设置HTML内容，而不是逐行append
-        self.result_text.clear()
-        self.result_text.setHtml(self.full_result_text)
-    
-    def on_judge_error(self, exception):
-        """判题出错的回调函数"""
-        # 停止计时器
-        if self.timer and self.timer.isActive():
-            self.timer.stop()
-            
-        # 关闭长时间运行对话框（如果存在）
-        if self.long_running_dialog and self.long_running_dialog.isVisible():
-            self.long_running_dialog.close()
-            self.long_running_dialog = None
-        
-        # 恢复原始窗口标题
-        self.setWindowTitle(self.original_title)
-        self.is_judging = False
-        
-        # 显示错误信息
-        self.result_text.clear()
-        self.result_text.append(f"<span style='color:red;'>运行测试时出错: {str(exception)}</span>")
-    
-    def check_long_running(self, task):
-        """检查是否运行时间过长，并显示提示对话框"""
-        # 只有在仍然判题中才显示对话框
-        if not self.is_judging:
-            return
-            
-        # 创建并显示提示对话框
-        self.long_running_dialog = LongRunningDialog(self, task)
-        
-        # 如果用户选择"直接查看"
-        if self.long_running_dialog.exec_() == QDialog.Accepted:
-            # 如果工作线程还在运行，尝试停止
-            if self.judge_worker and self.judge_worker.isRunning():
-                # 创建一个"取消"的结果
-                self.on_judge_finished("", "判题被用户取消", 3.0)
-                # 尝试终止线程（不太推荐，但这是紧急情况）
-                self.judge_worker.terminate()
-                self.judge_worker.wait()  # 等待线程真正停止
-
-    def on_package_button_clicked(self):
-        """处理一键打包按钮点击事件"""
-        if not self.current_assignment:
-            QMessageBox.warning(self, "警告", "请先选择一个作业文件夹")
-            return
-        
-        try:
-            # 获取学生学号
-            student_id = None
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+    return 0 if passed == len(results) else 1
+
+# 提交的zip中需要解压的文件：题目目录（x_yyy）下的源文件，外面可以多包一层目录
+SUBMISSION_SOURCE_PATTERN = re.compile(r'(?:^|/)(\d+_\w+)/([^/]+\.(?:cpp|h|hpp))$')
+
+# 提交中单个源文件的大小上限，超过的文件不解压
+MAX_SUBMISSION_FILE_BYTES = 1024 * 1024
+
+def extract_submission(zip_path, dest_dir):
+    """把一份提交（create_zip_package生成的 学号.zip）中的题目源文件解压到dest_dir
+
+    只解压 x_yyy/*.cpp|*.h|*.hpp，跳过其他文件、过大的文件和包含..的路径。
+    返回 {题目: [文件名]}，zip损坏时抛出zipfile.BadZipFile
+    """
+    tasks = {}
+    with zipfile.ZipFile(zip_path) as zf:
+        for info in zf.infolist():
+            name = info.filename.replace('\\', '/')
+            match = SUBMISSION_SOURCE_PATTERN.search(name)
+            if info.is_dir() or not match or '..' in name.split('/'):
+                continue
+            task, filename = match.groups()
+            if filename in tasks.get(task, []) or info.file_size > MAX_SUBMISSION_FILE_BYTES:
+                continue
+            task_dir = os.path.join(dest_dir, task)
+            os.makedirs(task_dir, exist_ok=True)
+            with zf.open(info) as source, open(os.path.join(task_dir, filename), 'wb') as target:
+                shutil.copyfileobj(source, target)
+            tasks.setdefault(task, []).append(filename)
+    return tasks
+
+# 解压后的提交在临时目录中的路径前缀（见grade_submissions）
+_GRADING_TEMP_PATH_PATTERN = re.compile(r'[^\s\'"]*codesentry_grade_[^/\\]+[/\\]\d+[/\\]')
+
+def grading_temp_dir():
+    """创建解压提交用的临时目录，有内存文件系统（/dev/shm）时放在其中"""
+    shm = '/dev/shm'
+    base = shm if os.path.isdir(shm) and os.access(shm, os.W_OK) else None
+    return tempfile.mkdtemp(prefix='codesentry_grade_', dir=base)
+
+def grade_submissions(submissions_dir, assignment_path, jobs=None, log=None):
+    """评测目录中所有学生提交的zip，返回成绩单字典（结构见grade_main写出的json）
+
+    1. 所有zip解压到临时目录（优先使用内存文件系统），不修改作业目录；
+    2. 按内容计算编译缓存键，内容相同的源文件只编译一次；
+    3. 每个不同的可执行文件运行一次所有测试点，结果由使用它的所有提交共享。
+    """
+    log = log or (lambda message: None)
+    jobs = jobs or os.cpu_count() or 1
+    assignment_path = os.path.abspath(assignment_path)
+    input_name, output_name, exec_name, _ = load_judger_metadata(assignment_path)
+    tasks = [task for task in sorted(exec_name) if os.path.isdir(os.path.join(assignment_path, 'data', task))]
+    points = {task: list_test_points(task, assignment_path, input_name, output_name) for task in tasks}
+    zip_paths = sorted(os.path.join(submissions_dir, name) for name in os.listdir(submissions_dir)
+                       if name.lower().endswith('.zip'))
+    
+    # 评分期间不淘汰编译缓存，否则先编译好的程序可能在运行前被删除；结束后再统一淘汰
+    cache = BinaryCache(binary_cache.root, max_bytes=sys.maxsize)
+    temp_dir = grading_temp_dir()
+    start_time = time.time()
+    try:
+        # 解压所有提交
+        submissions = []
+        for zip_path in zip_paths:
+            student = os.path.splitext(os.path.basename(zip_path))[0]
+            submission = {'student': student, 'zip': zip_path, 'error': None, 'tasks': []}
+            dest_dir = os.path.join(temp_dir, str(len(submissions)))
             try:
-                # 静默获取，不使用交互对话框
-                config_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "student_config.txt")
-                if os.path.exists(config_file):
-                    with open(config_file, "r") as f:
-                        student_id = f.read().strip()
-                    if not is_valid_student_id(student_id):
-                        student_id = None
-            except Exception as e:
-                print(f"无法自动获取学号: {str(e)}")
-                student_id = None
-            
-            # 如果没有获取到有效学号，则弹出输入对话框
-            if not student_id:
-                print("打开学号输入对话框")
-                dialog = StudentIDDialog(self)
-                if dialog.exec_() == QDialog.Accepted:
-                    student_id = dialog.get_student_id()
-                    
-                    # 保存学号到配置文件
-                    try:
-                        config_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "student_config.txt")
-                        with open(config_file, "w") as f:
-                            f.write(student_id)
-                    except Exception as e:
-                        print(f"保存学号时出错: {str(e)}")
-                else:
-                    return
-            
-            # 确保使用绝对路径
-            assignment_path = os.path.abspath(self.current_assignment)
-            
-            # 显示打包中提示，但不强制更新UI
-            self.result_text.append("<span style='color:blue;'>正在打包作业文件...</span>")
-            
-            # 创建打包文件
-            zip_path = create_zip_package(assignment_path, student_id)
-            
-            if zip_path:
-                self.result_text.append(f"<span style='color:green; font-weight:bold;'>打包成功! 文件已保存为: {zip_path}</span>")
-                QMessageBox.information(self, "打包成功", f"作业已成功打包为:\n{zip_path}")
-            else:
-                self.result_text.append("<span style='color:red; font-weight:bold;'>打包失败!</span>")
-                QMessageBox.critical(self, "打包失败", "未能成功打包作业文件。请查看详情。")
-        
-        except Exception as e:
-            error_msg = f"打包过程中出错: {str(e)}"
-            self.result_text.append(f"<span style='color:red;'>{error_msg}</span>")
-            QMessageBox.critical(self, "错误", error_msg)
-
-    def update_assignments_tree_style(self):
-        """更新作业列表树控件的样式，根据当前主题"""
-        if hasattr(self, 'assignments_tree'):
-            colors = Colors.current()
-            self.assignments_tree.setStyleSheet(f"""
-                QTreeWidget {{
-                    background-color: {colors['bg_secondary']};
-                    alternate-background-color: {colors['bg_tertiary']};
-                    color: {colors['text_primary']};
-                    border: 1px solid {colors['border']};
-                    border-radius: 6px;
-                    outline: none;
-                }}
-                
-                QTreeWidget::item {{
-                    padding: 3px 6px;
-                    border-radius: 4px;
-                    min-height: 22px;
-                }}
-                
-                QTreeWidget::item:selected {{
-                    background-color: {colors['accent']};
-                    color: white;
-                }}
-                
-                QTreeWidget::item:hover {{
-                    background-color: {colors['highlight']};
-                }}
-            """)
+                extract_submission(zip_path, dest_dir)
+            except (zipfile.BadZipFile, OSError) as e:
+                submission['error'] = f"无法解压: {e}"
+            submissions.append((submission, dest_dir))
+        log(f"已解压 {len(submissions)} 份提交到 {temp_dir}")
+        
+        # 按内容去重后编译，编译器在子进程中运行，用线程并行即可
+        main_paths = {}  # 缓存键 -> 任一份源文件的路径
+        keys = {}  # (提交序号, 题目) -> 缓存键，没有源文件时不在其中
+        for number, (submission, dest_dir) in enumerate(submissions):
+            if submission['error']:
+                continue
+            for task in tasks:
+                main_path = os.path.join(dest_dir, task, exec_name[task][0])
+                if os.path.exists(main_path):
+                    key = cache.compute_key(main_path)
+                    keys[number, task] = key
+                    main_paths.setdefault(key, main_path)
+        log(f"共 {len(keys)} 份源文件，去重后需要编译 {len(main_paths)} 份")
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            builds = dict(zip(main_paths, executor.map(
+                lambda main_path: cache.get_or_build(main_path, use_manifest=False), main_paths.values())))
+        log(cache.format_stats())
+        
+        # 每个编译成功的程序在每道题目上只运行一次。学生程序在子进程中运行，用线程并行即可，
+        # 同时运行的程序数量由run_program中的_process_slots限制，不用再创建工作进程
+        runs = sorted({(key, task) for (_, task), key in keys.items() if builds[key][0]})
+        # 测试数据只读取一次，所有线程共享同一份
+        test_data.preload([path for task in tasks for _, *files in points[task] for path in files])
+        log(test_data.format_stats())
+        log(f"运行 {len(runs)} 个程序的测试点（{jobs} 个线程，资源限制: {resource_limits.describe()}）")
+        cancel_token = CancelToken()
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {run: [executor.submit(run_test_point, builds[run[0]][1], index, input_file, standard_file,
+                                             None, cancel_token=cancel_token)
+                             for index, input_file, standard_file in points[run[1]]]
+                       for run in runs}
+            try:
+                point_results = {}
+                for done, (run, run_futures) in enumerate(futures.items(), 1):
+                    point_results[run] = [future.result().to_dict() for future in run_futures]
+                    if done % max(1, len(futures) // 10) == 0 or done == len(futures):
+                        log(f"已完成 {done}/{len(futures)}")
+            except KeyboardInterrupt:
+                # 结束正在运行的学生程序，还没有开始的测试点不再运行
+                cancel_token.cancel()
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    binary_cache.evict()
+    
+    # 汇总每份提交的成绩
+    for number, (submission, _) in enumerate(submissions):
+        for task in tasks:
+            full_score = FULL_SCORE * len(points[task])
+            key = keys.get((number, task))
+            entry = {'task': task, 'source_key': key, 'submitted': key is not None, 'compiled': False,
+                     'compile_error': None, 'score': 0, 'full_score': full_score, 'points': []}
+            if key is not None:
+                compiled, _, compile_error, _ = builds[key]
+                entry['compiled'] = compiled
+                if compile_error:
+                    # 编译错误中的路径是某一份相同提交解压到临时目录后的路径，只保留 题目/文件名
+                    entry['compile_error'] = _GRADING_TEMP_PATH_PATTERN.sub("", compile_error)
+                if compiled:
+                    entry['points'] = point_results[key, task]
+                    entry['score'] = sum(point['score'] for point in entry['points'])
+            submission['tasks'].append(entry)
+        submission['score'] = sum(entry['score'] for entry in submission['tasks'])
+        submission['full_score'] = sum(entry['full_score'] for entry in submission['tasks'])
+    
+    return {
+        'assignment': assignment_path,
+        'tasks': tasks,
+        'elapsed': time.time() - start_time,
+        'sources': len(keys),
+        'builds': len(main_paths),
+        'submissions': [submission for submission, _ in submissions],
+    }
+
+# 成绩单csv的列：每个测试点一行，未提交、编译错误或无法解压时每道题目一行
+GRADEBOOK_CSV_FIELDS = ['student', 'task', 'point', 'verdict', 'score', 'wall_time', 'cpu_user', 'cpu_sys',
+                        'peak_rss_kb', 'message']
 
-def main():
+def write_gradebook_csv(gradebook, path):
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:  # 带BOM，Excel打开时不会乱码
+        writer = csv.DictWriter(f, fieldnames=GRADEBOOK_CSV_FIELDS)
+        writer.writeheader()
+        for submission in gradebook['submissions']:
+            if submission['error']:
+                writer.writerow({'student': submission['student'], 'verdict': "无法解压", 'score': 0,
+                                 'message': submission['error']})
+                continue
+            for entry in submission['tasks']:
+                row = {'student': submission['student'], 'task': entry['task']}
+                if not entry['submitted']:
+                    writer.writerow(dict(row, verdict="未提交", score=0))
+                elif not entry['compiled']:
+                    writer.writerow(dict(row, verdict="编译错误", score=0,
+                                         message=(entry['compile_error'] or "").strip()[:200]))
+                for point in entry['points']:
+                    usage = point['usage'] or {}
+                    times = {name: round(usage[name], 4) for name in ('wall_time', 'cpu_user', 'cpu_sys')
+                             if usage.get(name) is not None}
+                    writer.writerow(dict(row, point=point['index'], verdict=point['verdict'], score=point['score'],
+                                         peak_rss_kb=usage.get('peak_rss_kb'), **times,
+                                         message=(point['message'] or "").splitlines()[0][:200] if point['message'] else None))
+
+def format_grade_entry(entry):
+    """成绩汇总中一道题目的简短描述"""
+    if not entry['submitted']:
+        return f"{entry['task']} 未提交"
+    if not entry['compiled']:
+        return f"{entry['task']} 编译错误"
+    return f"{entry['task']} {entry['score']}/{entry['full_score']}"
+
+def grade_main(argv):
+    """批量评测学生提交的zip并生成成绩单，返回进程退出码"""
+    parser = argparse.ArgumentParser(
+        prog=os.path.basename(sys.argv[0]) + " --grade",
+        description="评测目录中所有学生提交的zip（学号.zip），生成成绩单")
+    parser.add_argument('--grade', metavar='SUBMISSIONS', required=True, help="存放提交zip的目录")
+    parser.add_argument('assignment', help="包含data目录和judger_batch.py的作业文件夹")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="同时编译和运行的进程数（默认为CPU核数）")
+    parser.add_argument('--csv', metavar='FILE',
+                        help="每个测试点一行的成绩单，默认为提交目录下的gradebook.csv")
+    parser.add_argument('--json', metavar='FILE', help="完整的成绩单json，FILE为-时写到标准输出")
+    add_limit_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs必须是正整数")
+    apply_limit_arguments(args)
+    if not os.path.isdir(args.grade):
+        parser.error(f"找不到提交目录: {args.grade}")
+    if find_judger_batch(os.path.abspath(args.assignment)) is None:
+        parser.error(f"作业文件夹中找不到judger_batch.py: {args.assignment}")
+    
+    report = sys.stderr if args.json == '-' else sys.stdout
     try:
-        app = QApplication(sys.argv)
-        
-        # 设置应用字体
-        try:
-            fonts = set_app_fonts(app)
-        except Exception as e:
-            print(f"设置应用字体时出错: {str(e)}")
-            print(traceback.format_exc())
-        
-        # 设置应用主题
-        apply_theme(app, dark_mode=True)
+        gradebook = grade_submissions(args.grade, args.assignment, args.jobs,
+                                      log=lambda message: print(message, file=report, flush=True))
+    except KeyboardInterrupt:
+        print("\n评分已中断", file=report)
+        return 130
+    
+    # 每个学生一行：各题得分和总分
+    for submission in gradebook['submissions']:
+        if submission['error']:
+            print(f"{submission['student']:<16} {submission['error']}", file=report)
+            continue
+        scores = "  ".join(format_grade_entry(entry) for entry in submission['tasks'])
+        print(f"{submission['student']:<16} {submission['score']:>4}/{submission['full_score']:<4} {scores}", file=report)
+    print(f"\n共 {len(gradebook['submissions'])} 份提交，{gradebook['sources']} 份源文件编译了 {gradebook['builds']} 次，"
+          f"用时 {gradebook['elapsed']:.2f} 秒", file=report)
+    
+    csv_path = args.csv or os.path.join(args.grade, "gradebook.csv")
+    write_gradebook_csv(gradebook, csv_path)
+    print(f"成绩单已写入 {csv_path}", file=report)
+    if args.json == '-':
+        json.dump(gradebook, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+    elif args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(gradebook, f, ensure_ascii=False, indent=2)
+    return 0
 
-        window = MainWindow()
-        window.fonts = fonts  # 将字体信息传递给主窗口
-        window.show()
-        
-        sys.exit(app.exec_())
-    except Exception as e:
-        error_msg = f"程序启动出错: {str(e)}"
-        
-        # 尝试显示错误对话框
-        try:
-            app = QApplication.instance()
-            if not app:
-                app = QApplication(sys.argv)
-            QMessageBox.critical(None, "程序错误", error_msg)
-        except:
-            # 如果连错误对话框都无法显示，则写入错误日志
-            with open("error.log", "w", encoding="utf-8") as f:
-                f.write(f"{error_msg}\n")
-                f.write(traceback.format_exc())
+def main(argv=None):
+    """程序入口，没有参数时启动图形界面
+
+    --headless和--grade在命令行中判题（见headless_main和grade_main），不切换工作目录，也不导入PyQt5，
+    没有显示器（或没有安装PyQt5）的机器上也能运行
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if "--grade" in argv:
+        return grade_main(argv)
+    if "--headless" in argv:
+        return headless_main(argv)
+    mark_startup("导入判题模块")
+    
+    # 添加调试信息
+    print(f"程序启动时的当前目录: {os.getcwd()}")
+    print(f"可执行文件路径: {sys.executable if getattr(sys, 'frozen', False) else __file__}")
+    
+    # 强制切换到当前脚本（或 EXE）的目录
+    if getattr(sys, 'frozen', False):  # 如果是 EXE 运行
+        os.chdir(os.path.dirname(sys.executable))  # EXE 所在目录
+    else:  # Python 运行时
+        os.chdir(os.path.dirname(os.path.abspath(__file__)))  # .py 所在目录
+    print(f"切换后的当前工作目录：{os.getcwd()}")
+    
+    import codesentry_gui
+    return codesentry_gui.main()
 
 if __name__ == "__main__":
+    # 界面模块通过import gui_judger使用判题引擎，直接运行本文件时让它使用这一份，不再重新导入
+    sys.modules.setdefault('gui_judger', sys.modules[__name__])
     try:
-        main()
+        sys.exit(main())
     except Exception as e:
         error_msg = f"程序出错: {str(e)}"
         print(error_msg)
         traceback.print_exc()
-        